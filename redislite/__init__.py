@@ -96,6 +96,14 @@ if os.path.exists(os.path.join(os.path.dirname(__file__), "bin/redis-server")):
         'bin/redis-server'
     )  # pragma: no cover
 
-__all__ = ['client', 'configuration', 'debug', 'patch']
+__all__ = [
+    'analyze', 'benchmark', 'bulk', 'cache', 'client', 'cluster',
+    'configuration', 'debug', 'export', 'exporter', 'instrumentation',
+    'metrics', 'patch', 'pool', 'rdb', 'replication', 'sharding', 'tuning'
+]
 
 from .client import Redis, StrictRedis  # NOQA
+from .cluster import Cluster  # NOQA
+from .pool import ServerPool  # NOQA
+from .replication import ReplicaSet  # NOQA
+from .sharding import ShardedRedis  # NOQA
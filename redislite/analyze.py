@@ -0,0 +1,437 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite keyspace memory analyzer
+
+This module contains functions that report which key patterns and types use
+the memory of a redis server, which keys are the largest and how much memory
+could be saved by compactly encoding the hashes, sets and sorted sets.
+
+The keys are found with SCAN and the TYPE, MEMORY USAGE and OBJECT ENCODING
+commands for each batch of keys are pipelined.  The batches are processed in
+parallel on several connections while the scan continues.
+
+This module can be run from the command line to analyze a redislite db file,
+using the running redis-server for the db file if there is one::
+
+    $ python -m redislite.analyze /tmp/redis.db
+    Keyspace analysis: 12000 keys, 3.1 MB
+
+    Pattern                                  Type       Keys     Memory  Encodings
+    user:*                                   hash      10000     2.6 MB  ziplist=10000
+    ...
+"""
+from __future__ import print_function
+import argparse
+import collections
+import concurrent.futures
+import heapq
+import json
+import logging
+import re
+from .client import Redis
+from .tuning import LENGTH_COMMANDS, MAX_ENTRIES
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+# The encodings of each collection type that use less memory
+COMPACT_ENCODINGS = {
+    'hash': ['ziplist', 'listpack'],
+    'set': ['intset', 'listpack'],
+    'zset': ['ziplist', 'listpack'],
+}
+
+# Key segments that identify an individual item rather than a kind of key,
+# segments with digits and hex strings like hashes and uuids
+_ID_SEGMENT = re.compile(r'[0-9]|^[0-9a-f-]{8,}$', re.IGNORECASE)
+
+
+def _decode(value):
+    """
+    Return a server response as a str
+    """
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return value
+
+
+def key_pattern(key, separator=':'):
+    """
+    Get the pattern of a key, with the segments that look like ids replaced
+    with '*'
+
+    Parameters
+    ----------
+    key : str or bytes
+        The key
+
+    separator : str, optional
+        The separator between the segments of the key, default=':'
+
+    Returns
+    -------
+    str
+        The key pattern, for example 'user:*:profile' for 'user:1234:profile'
+    """
+    return separator.join(
+        '*' if _ID_SEGMENT.search(segment) else segment
+        for segment in _decode(key).split(separator)
+    )
+
+
+def _analyze_batch(connection, keys):
+    """
+    Get the type, encoding, memory use and length of a batch of keys
+
+    Returns
+    -------
+    list
+        A (key, type, encoding, memory, length) tuple for each key that still
+        exists, the length is None for types other than hash, set and zset.
+    """
+    pipe = connection.pipeline(transaction=False)
+    for key in keys:
+        pipe.type(key)
+        pipe.object('encoding', key)
+        pipe.memory_usage(key)
+    results = pipe.execute(raise_on_error=False)
+
+    analyzed = []
+    for index, key in enumerate(keys):
+        key_type, encoding, memory = results[index * 3:index * 3 + 3]
+        key_type = _decode(key_type)
+        if key_type == 'none' or isinstance(encoding, Exception):
+            # The key was deleted after it was scanned
+            continue
+        analyzed.append([key, key_type, _decode(encoding), memory or 0, None])
+
+    sized = [item for item in analyzed if item[1] in LENGTH_COMMANDS]
+    for item in sized:
+        pipe.execute_command(LENGTH_COMMANDS[item[1]], item[0])
+    for item, length in zip(sized, pipe.execute(raise_on_error=False)):
+        if not isinstance(length, Exception):
+            item[4] = length
+    return [tuple(item) for item in analyzed]
+
+
+class _KeyspaceSummary(object):
+    """
+    Aggregation of the analyzed keys by pattern and type
+    """
+    def __init__(self, separator=':', top=10):
+        self.separator = separator
+        self.top = top
+        self.keys = 0
+        self.memory = 0
+        self.groups = collections.defaultdict(
+            lambda: {'keys': 0, 'memory': 0, 'encodings': collections.Counter()}
+        )
+        self.biggest = []
+        # Memory and element counts of the collections by type and by
+        # whether they are compactly encoded
+        self.collections = collections.defaultdict(
+            lambda: {'memory': 0, 'elements': 0, 'keys': 0}
+        )
+        self.convertible = collections.defaultdict(
+            lambda: {'memory': 0, 'elements': 0, 'keys': 0}
+        )
+
+    def add(self, key, key_type, encoding, memory, length):
+        """
+        Add an analyzed key
+        """
+        self.keys += 1
+        self.memory += memory
+        group = self.groups[(key_pattern(key, self.separator), key_type)]
+        group['keys'] += 1
+        group['memory'] += memory
+        group['encodings'][encoding] += 1
+
+        item = (memory, _decode(key), key_type, encoding)
+        if len(self.biggest) < self.top:
+            heapq.heappush(self.biggest, item)
+        elif item > self.biggest[0]:
+            heapq.heapreplace(self.biggest, item)
+
+        if length:
+            compact = encoding in COMPACT_ENCODINGS[key_type]
+            totals = self.collections[(key_type, compact)]
+            totals['memory'] += memory
+            totals['elements'] += length
+            totals['keys'] += 1
+            if not compact and length <= MAX_ENTRIES:
+                totals = self.convertible[key_type]
+                totals['memory'] += memory
+                totals['elements'] += length
+                totals['keys'] += 1
+
+    def savings(self):
+        """
+        Estimate the memory saved by compactly encoding the collections that
+        are small enough, based on the memory per element of the compactly
+        encoded collections of the same type.
+        """
+        savings = {}
+        for key_type, totals in self.convertible.items():
+            compact = self.collections.get((key_type, True))
+            if not compact or not compact['elements']:
+                # No compactly encoded collections to compare with
+                savings[key_type] = None
+                continue
+            per_element = compact['memory'] / compact['elements']
+            savings[key_type] = {
+                'keys': totals['keys'],
+                'memory': totals['memory'],
+                'estimated_savings': max(
+                    int(totals['memory'] - totals['elements'] * per_element),
+                    0
+                ),
+            }
+        return savings
+
+    def report(self):
+        """
+        Return the summary as a dict
+        """
+        groups = [
+            {
+                'pattern': pattern,
+                'type': key_type,
+                'keys': group['keys'],
+                'memory': group['memory'],
+                'encodings': dict(group['encodings']),
+            }
+            for (pattern, key_type), group in self.groups.items()
+        ]
+        groups.sort(key=lambda group: group['memory'], reverse=True)
+        return {
+            'keys': self.keys,
+            'memory': self.memory,
+            'patterns': groups,
+            'biggest_keys': [
+                {
+                    'key': key, 'type': key_type, 'encoding': encoding,
+                    'memory': memory
+                }
+                for memory, key, key_type, encoding in sorted(
+                    self.biggest, reverse=True
+                )
+            ],
+            'encoding_savings': self.savings(),
+        }
+
+
+def analyze(
+        connection, batch_size=1000, workers=4, sample_size=None, top=10,
+        separator=':'
+):
+    """
+    Analyze the memory use of the keys of a redis server
+
+    Parameters
+    ----------
+    connection : redis.Redis
+        Connection to the redis server, its connection pool is used for the
+        parallel connections.
+
+    batch_size : int, optional
+        Number of keys to request with each SCAN command and to analyze in one
+        pipeline, default=1000
+
+    workers : int, optional
+        Number of batches to analyze in parallel, default=4
+
+    sample_size : int, optional
+        Stop after analyzing this many keys, default is to analyze all keys
+
+    top : int, optional
+        Number of biggest keys to report, default=10
+
+    separator : str, optional
+        The separator between the segments of the keys, used to group them
+        into patterns, default=':'
+
+    Returns
+    -------
+    dict
+        The number of keys and their memory use in bytes, the memory use by
+        key pattern and type, the biggest keys and the estimated memory saving
+        if the collections small enough for a compact encoding used it.
+    """
+    summary = _KeyspaceSummary(separator=separator, top=top)
+    pending = set()
+
+    def collect(done):
+        for future in done:
+            for item in future.result():
+                summary.add(*item)
+
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='redislite-analyze'
+    ) as executor:
+        cursor = 0
+        scanned = 0
+        while True:
+            cursor, keys = connection.scan(cursor=cursor, count=batch_size)
+            if sample_size is not None:
+                keys = keys[:sample_size - scanned]
+            scanned += len(keys)
+            if keys:
+                pending.add(executor.submit(_analyze_batch, connection, keys))
+            if len(pending) >= workers * 2:
+                # Limit the number of batches held in memory
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                collect(done)
+            if not int(cursor) or (
+                    sample_size is not None and scanned >= sample_size
+            ):
+                break
+        collect(concurrent.futures.as_completed(pending))
+    return summary.report()
+
+
+def analyze_db(dbfilename, **kwargs):
+    """
+    Analyze the memory use of the keys in a redislite db file
+
+    The redis-server already running for the db file is used if there is one,
+    otherwise one is started and shut down afterwards without saving.
+
+    Parameters
+    ----------
+    dbfilename : str
+        The redislite db file
+
+    **kwargs : optional
+        Passed to :func:`analyze`
+
+    Returns
+    -------
+    dict
+        The analysis, see :func:`analyze`
+    """
+    connection = Redis(dbfilename)
+    if connection.running:
+        # Don't rewrite the db file with the server started for the analysis
+        connection.shutdown_save = 'nosave'
+    try:
+        return analyze(connection, **kwargs)
+    finally:
+        connection._cleanup()
+
+
+def _format_bytes(value):
+    """
+    Return a number of bytes in a readable unit
+    """
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(value) < 1024 or unit == 'GB':
+            break
+        value /= 1024.0
+    if unit == 'B':
+        return '%d B' % value
+    return '%.1f %s' % (value, unit)
+
+
+def format_report(report):
+    """
+    Format an analysis as text
+
+    Parameters
+    ----------
+    report : dict
+        The analysis, see :func:`analyze`
+
+    Returns
+    -------
+    str
+        The analysis as a multi-line string
+    """
+    lines = [
+        'Keyspace analysis: %d keys, %s' % (
+            report['keys'], _format_bytes(report['memory'])
+        ),
+        '',
+        '%-40s %-6s %8s %10s  %s' % (
+            'Pattern', 'Type', 'Keys', 'Memory', 'Encodings'
+        ),
+    ]
+    for group in report['patterns']:
+        lines.append('%-40s %-6s %8d %10s  %s' % (
+            group['pattern'], group['type'], group['keys'],
+            _format_bytes(group['memory']),
+            ' '.join(
+                '%s=%d' % item for item in sorted(group['encodings'].items())
+            )
+        ))
+    lines += ['', 'Biggest keys:']
+    for key in report['biggest_keys']:
+        lines.append('    %-50s %-6s %-10s %10s' % (
+            key['key'], key['type'], key['encoding'],
+            _format_bytes(key['memory'])
+        ))
+    lines += ['', 'Estimated savings with compact encodings:']
+    for key_type, savings in sorted(report['encoding_savings'].items()):
+        if savings is None:
+            lines.append(
+                '    %-6s no compactly encoded %s to compare with' % (
+                    key_type, key_type
+                )
+            )
+            continue
+        lines.append('    %-6s %d keys using %s, about %s could be saved' % (
+            key_type, savings['keys'], _format_bytes(savings['memory']),
+            _format_bytes(savings['estimated_savings'])
+        ))
+    return '\n'.join(lines)
+
+
+def main(args=None):
+    """
+    Analyze the db file given on the command line and print the analysis
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m redislite.analyze',
+        description='Report the memory use of the keys in a redislite db file'
+    )
+    parser.add_argument('dbfilename', help='The redislite db file')
+    parser.add_argument(
+        '--batch-size', type=int, default=1000,
+        help='Number of keys to analyze in each pipeline'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help='Number of batches to analyze in parallel'
+    )
+    parser.add_argument(
+        '--sample-size', type=int, default=None,
+        help='Stop after analyzing this many keys'
+    )
+    parser.add_argument(
+        '--top', type=int, default=10, help='Number of biggest keys to list'
+    )
+    parser.add_argument(
+        '--separator', default=':', help='The separator of the key segments'
+    )
+    parser.add_argument(
+        '--json', action='store_true', help='Print the analysis as json'
+    )
+    options = parser.parse_args(args)
+    report = analyze_db(
+        options.dbfilename, batch_size=options.batch_size,
+        workers=options.workers, sample_size=options.sample_size,
+        top=options.top, separator=options.separator
+    )
+    if options.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print(format_report(report))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
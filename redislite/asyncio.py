@@ -0,0 +1,414 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite asyncio client
+
+This module contains an extended version of the :class:`redis.asyncio.Redis()`
+class.  It sets up and runs the embedded redis server the first time it is
+awaited, and shuts down the server when it is closed, without blocking the
+event loop.  Otherwise it is functionally identical to the
+:class:`redis.asyncio.Redis()` class.
+
+Example:
+  To start an embedded redis server from a coroutine, then set and retrieve
+  some data::
+
+      >>> import redislite.asyncio
+      >>> connection = await redislite.asyncio.Redis.create('/tmp/redis.db')
+      >>> await connection.set('key', 'value')
+      True
+      >>> await connection.get('key')
+      b'value'
+      >>> await connection.aclose()
+"""
+import asyncio
+import logging
+import os
+import redis
+import redis.asyncio
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+import signal
+import time
+from .client import RedisMixin, RedisLiteServerStartError, \
+    _get_server_process
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+async def _close(client, *args):
+    """
+    Close a redis.asyncio client, older versions of the redis module only
+    provide the close() method.
+    """
+    close = getattr(client, 'aclose', None) or client.close
+    await close(*args)
+
+
+class AsyncRedisMixin(RedisMixin):
+    """
+    Extended version of the redis.asyncio.Redis class with code to start/stop
+    the embedded redis server without blocking the event loop.
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        Wrapper for redis.asyncio.Redis that configures a redis instance based
+        on the passed settings.
+
+        The arguments are the same as for :class:`redislite.Redis()`.  The
+        redis-server is started when the instance is first awaited, see
+        :meth:`create`.
+        """
+        self.timings = {}
+        self._start_server = False
+        self._server_ready = False
+        self._server_lock = asyncio.Lock()
+
+        # If the user is specifying settings we can't configure just pass the
+        # request to the redis.asyncio.Redis module
+        if 'host' in kwargs.keys() or 'port' in kwargs.keys():
+            self._server_ready = True
+            # noinspection PyArgumentList
+            super(RedisMixin, self).__init__(
+                *args, **kwargs
+            )  # pragma: no cover
+            return
+
+        instrument = kwargs.pop('instrument', None)
+        args, kwargs, self._start_server = self._setup_server(args, kwargs)
+
+        kwargs['unix_socket_path'] = self.socket_file
+        # noinspection PyArgumentList
+        logger.debug('Calling binding with %s, %s', args, kwargs)
+        # noinspection PyArgumentList
+        super(RedisMixin, self).__init__(*args, **kwargs)
+        if instrument:
+            self.instrument(*([] if instrument is True else instrument))
+
+    @classmethod
+    async def create(cls, *args, **kwargs):
+        """
+        Create an instance and wait until its redis-server is ready
+
+        Parameters
+        ----------
+        *args, **kwargs : optional
+            The arguments supported by the class
+
+        Returns
+        -------
+        A new instance of the class
+        """
+        return await cls(*args, **kwargs)
+
+    async def initialize(self):
+        """
+        Start the embedded redis-server if needed and wait until it is ready
+        to handle requests.
+
+        Returns
+        -------
+        The instance
+        """
+        if not self._server_ready:
+            async with self._server_lock:
+                if not self._server_ready:
+                    if self._start_server:
+                        await self._async_start_redis()
+                        self._start_server = False
+                    logger.debug(
+                        "Pinging the server to ensure we're connected"
+                    )
+                    await self._async_wait_for_server_start()
+                    self._server_ready = True
+        return await super(AsyncRedisMixin, self).initialize()
+
+    async def _async_start_redis(self):
+        """
+        Start the redis server
+        """
+        command, daemonize = self._write_redis_configuration()
+        start = time.time()
+        server_process = await asyncio.get_running_loop().run_in_executor(
+            None, self._spawn_redis, command, daemonize
+        )
+        delay = .001
+        deadline = time.time() + self.start_timeout
+        while not self._socket_ready(server_process, deadline):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, .1)
+        self.timings['spawn'] = time.time() - start
+        self._save_setting_registry()
+        self._acquire_server()
+        self.running = True
+
+    async def _async_wait_for_server_start(self):
+        """
+        Wait until the server is not busy when receiving a request
+
+        Raises
+        ------
+        RedisLiteServerStartError - Server start timed out
+        """
+        start = time.time()
+        delay = .001
+        deadline = start + self.start_timeout
+        # Commands sent on this instance wait for initialize() to finish, so
+        # the server is checked on a separate connection.
+        client = BaseRedis(
+            unix_socket_path=self.socket_file, **self._server_credentials()
+        )
+        try:
+            while True:
+                try:
+                    await client.ping()
+                    if self.running:
+                        # The time the server spent loading the db file
+                        self.timings.setdefault('load', time.time() - start)
+                    return
+                except (redis.BusyLoadingError, redis.ConnectionError):
+                    pass
+                if time.time() >= deadline:  # pragma: no cover
+                    raise RedisLiteServerStartError(
+                        'The redis-server process failed to start; '
+                        'unreachable after {0} seconds'.format(
+                            self.start_timeout
+                        )
+                    )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, .1)
+        finally:
+            await _close(client)
+
+    @staticmethod
+    async def _async_wait_for_server_exit(server_process, timeout=10):
+        """
+        Wait for a redis-server process to exit
+
+        Parameters
+        ----------
+        server_process : redislite.client._ServerProcess
+            The handle of the redis-server, if the server is a child of this
+            process it is reaped once it exits.
+
+        timeout : float, optional
+            Number of seconds to wait for the process to exit
+
+        Returns
+        -------
+        bool
+            True if the process is no longer running
+        """
+        if not server_process.is_running():
+            return True
+        if server_process.pidfd is not None:
+            # The pidfd becomes readable when the process exits
+            loop = asyncio.get_running_loop()
+            exited = loop.create_future()
+            loop.add_reader(server_process.pidfd, exited.set_result, None)
+            try:
+                await asyncio.wait_for(exited, timeout)
+            except asyncio.TimeoutError:  # pragma: no cover
+                return False
+            finally:
+                loop.remove_reader(server_process.pidfd)
+            return server_process.wait(timeout=0)
+        delay = .001  # pragma: no cover
+        deadline = time.time() + timeout  # pragma: no cover
+        while server_process.is_running():  # pragma: no cover
+            if time.time() >= deadline:
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, .1)
+        return True  # pragma: no cover
+
+    async def _async_send_shutdown(self):
+        """
+        Send the shutdown command for the save mode of this instance
+
+        The commands are sent on a separate connection that doesn't retry
+        them, a retry would only wait for the server that closed the
+        connection by exiting.
+        """
+        mode = self._shutdown_save_mode()
+        client = BaseRedis(
+            unix_socket_path=self.socket_file, retry=Retry(NoBackoff(), 0),
+            **self._server_credentials()
+        )
+        try:
+            if mode == 'bgsave':
+                try:
+                    await client.bgsave()
+                except redis.ResponseError:  # pragma: no cover
+                    # A background save is already running
+                    pass
+                delay = .001
+                deadline = time.time() + 10
+                while (
+                    await client.info('persistence')
+                )['rdb_bgsave_in_progress']:
+                    if time.time() >= deadline:  # pragma: no cover
+                        raise redis.TimeoutError(
+                            'The background save did not finish in 10 seconds'
+                        )
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, .1)
+            # The NOW and FORCE options need redis 7, so they aren't used.
+            await client.shutdown(save=mode == 'save', nosave=mode != 'save')
+        finally:
+            await _close(client)
+
+    async def _async_shutdown_server(self):
+        """
+        Shut down the redis-server and wait for it to exit
+        """
+        server_process = _get_server_process(self.socket_file, self.pidfile)
+        if not server_process:  # pragma: no cover
+            return
+        pid = server_process.pid
+        logger.debug(
+            'Shutting down redis server with pid of %r', pid
+        )
+        start = time.time()
+        try:
+            await self._async_send_shutdown()
+            if not await self._async_wait_for_server_exit(
+                server_process, timeout=10
+            ):  # pragma: no cover
+                raise redis.TimeoutError(
+                    'The redis-server did not exit in 10 seconds'
+                )
+        except redis.RedisError:  # pragma: no cover
+            if not await self._async_wait_for_server_exit(
+                server_process, timeout=0
+            ):
+                logger.info(f'Redis shutdown failed, sending sigterm to {pid}')
+                os.kill(pid, signal.SIGTERM)
+                # default shutdown timeout is 10 seconds
+                if not await self._async_wait_for_server_exit(
+                    server_process, timeout=12
+                ):
+                    logger.warning('Redis graceful shutdown failed, forcefully killing pid %r', pid)
+                    os.kill(pid, signal.SIGKILL)
+                    await self._async_wait_for_server_exit(
+                        server_process, timeout=1
+                    )
+        self.timings['shutdown'] = time.time() - start
+        _get_server_process(self.socket_file, None)
+
+    async def eviction_stats(self):
+        """
+        Get the memory use and eviction counters of the redis-server, see
+        :meth:`redislite.Redis.eviction_stats`
+        """
+        return self._eviction_stats(await self.info())
+
+    async def metrics(self):
+        """
+        Get the metrics of the redis-server, see
+        :meth:`redislite.Redis.metrics`
+
+        A new snapshot is taken in the default executor, so the event loop
+        isn't blocked.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, super(AsyncRedisMixin, self).metrics
+        )
+
+    async def aclose(self, close_connection_pool=None):
+        """
+        Close the connections of this instance, and shut down the redis-server
+        if this is the last client using it.
+
+        Parameters
+        ----------
+        close_connection_pool : bool, optional
+            Passed on to :meth:`redis.asyncio.Redis.aclose`
+        """
+        self.stop_metrics()
+        if self._server_reference and self.pid:
+            if self._release_server() == 0:
+                logger.debug(
+                    'Last client using the connection, shutting down the '
+                    'redis connection on socket: %s',
+                    self.socket_file
+                )
+                await self._async_shutdown_server()
+                self._remove_server_files()
+            else:
+                logger.debug(
+                    'Other clients are still connected to the redis server, '
+                    'not shutting down the connection on socket: %s',
+                    self.socket_file
+                )
+        elif self._start_server:
+            # The server was never started
+            self._remove_server_files()
+
+        self._server_reference = False
+        self.running = False
+        self.redis_dir = None
+        self.pidfile = None
+        await _close(super(AsyncRedisMixin, self), close_connection_pool)
+
+    def _cleanup(self, deadline=None):
+        """
+        Stop the redis-server for this instance if it's running and aclose()
+        was not awaited.
+
+        This runs when the instance is deleted or the interpreter exits, when
+        there may be no event loop to run on, so it talks to the server using
+        a temporary synchronous connection.
+
+        Parameters
+        ----------
+        deadline : float, optional
+            The time.time() value by which the redis-server has to be shut
+            down, it is killed if it's still running then.
+        """
+        self.stop_metrics()
+        if self._server_reference and self.pid:
+            if self._release_server() == 0:
+                connection = self._shutdown_connection(deadline)
+                try:
+                    self._shutdown_server(connection, deadline)
+                finally:
+                    connection.close()
+                self._remove_server_files()
+        elif self._start_server:
+            # The server was never started
+            self._remove_server_files()
+
+        self._server_reference = False
+        self.running = False
+        self.redis_dir = None
+        self.pidfile = None
+
+
+class BaseRedis(redis.asyncio.Redis):
+    pass
+
+
+# noinspection PyUnresolvedReferences
+class Redis(AsyncRedisMixin, BaseRedis):
+    """
+    This class provides an enhanced version of the
+    :class:`redis.asyncio.Redis()` class that uses an embedded redis-server by
+    default.
+
+    The arguments and attributes are the same as for
+    :class:`redislite.Redis()`.  The embedded redis-server is started when the
+    instance is first awaited and shut down by :meth:`aclose`, all without
+    blocking the event loop.
+
+    Example
+    -------
+
+    redis_connection = await :class:`redislite.asyncio.Redis.create('/tmp/redis.db')`
+    """
+    pass
+
+
+StrictRedis = Redis
@@ -0,0 +1,248 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite threaded I/O benchmark
+
+This module contains functions that measure the throughput of an embedded
+redis-server over its unix socket with different io-threads settings, to see
+whether threaded I/O helps for a number of concurrent clients on this host.
+
+Each client is a separate process, so the clients are not limited by the
+python global interpreter lock, that sends SET and GET commands to its own
+keys.  Threaded I/O helps when the main thread of the server is busy with the
+socket reads and writes of many clients and there are spare cpus for the I/O
+threads.  With few clients or cpus the I/O threads only add overhead.
+
+This module can be run from the command line, by default it compares a
+server without I/O threads to the settings chosen for the number of clients
+by :func:`redislite.configuration.io_thread_settings`.  On a host with a
+single cpu the I/O threads compete with the main thread for the cpu::
+
+    $ python -m redislite.benchmark --clients 4 --requests 2000 \\
+          --io-threads 1 --io-threads 2
+    Threaded I/O benchmark: 4 clients, 1.0 cpus, 2000 requests per client
+
+    io-threads   Requests   Seconds   Requests/s
+             1       8000      0.74        10764
+             2       8000     31.37          255
+"""
+from __future__ import print_function
+import argparse
+import json
+import logging
+import multiprocessing
+import redis
+import time
+from . import configuration
+from .client import Redis
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+def _client(socket_file, client_id, requests, pipeline, value_size, start):
+    """
+    Send requests SET and GET commands from a client process
+
+    Returns
+    -------
+    tuple
+        The times the client started and finished sending its requests
+    """
+    connection = redis.Redis(unix_socket_path=socket_file)
+    connection.ping()
+    value = b'x' * value_size
+    keys = ['benchmark:{0}:{1}'.format(client_id, index) for index in range(
+        100
+    )]
+    time.sleep(max(start - time.time(), 0))
+    started = time.time()
+    sent = 0
+    while sent < requests:
+        pipe = connection.pipeline(transaction=False)
+        for index in range(sent, min(sent + pipeline, requests)):
+            key = keys[index % len(keys)]
+            if index % 2:
+                pipe.get(key)
+            else:
+                pipe.set(key, value)
+        sent += len(pipe)
+        pipe.execute()
+    finished = time.time()
+    connection.close()
+    return started, finished
+
+
+def run(
+        io_threads=1, clients=16, requests=10000, pipeline=1, value_size=64
+):
+    """
+    Measure the throughput of a server with an io-threads setting
+
+    Parameters
+    ----------
+    io_threads : int, optional
+        The io-threads setting of the server, 1 disables threaded I/O,
+        default=1
+
+    clients : int, optional
+        Number of client processes, default=16
+
+    requests : int, optional
+        Number of commands each client sends, default=10000
+
+    pipeline : int, optional
+        Number of commands each client sends at once, default=1
+
+    value_size : int, optional
+        Size of the values set in bytes, default=64
+
+    Returns
+    -------
+    dict
+        The io_threads, clients, requests, seconds and requests_per_second
+    """
+    server = Redis(
+        profile='ephemeral', serverconfig={
+            'io-threads': str(io_threads),
+            'io-threads-do-reads': 'yes' if io_threads > 1 else 'no',
+            'maxclients': str(max(clients * 2, 128)),
+        }
+    )
+    try:
+        # Give the client processes time to start before they all begin
+        start = time.time() + 1 + clients * .05
+        with multiprocessing.Pool(clients) as pool:
+            times = pool.starmap(_client, [
+                (server.socket_file, client_id, requests, pipeline, value_size,
+                 start)
+                for client_id in range(clients)
+            ])
+    finally:
+        server._cleanup()
+    seconds = max(end for _, end in times) - min(begin for begin, _ in times)
+    total = clients * requests
+    return {
+        'io_threads': io_threads,
+        'clients': clients,
+        'requests': total,
+        'seconds': seconds,
+        'requests_per_second': total / seconds if seconds else 0.0,
+    }
+
+
+def compare(io_threads=None, clients=16, **kwargs):
+    """
+    Measure the throughput with several io-threads settings
+
+    Parameters
+    ----------
+    io_threads : list, optional
+        The io-threads settings to compare, default is 1 and the setting
+        :func:`redislite.configuration.io_thread_settings` chooses for the
+        clients
+
+    clients : int, optional
+        Number of client processes, default=16
+
+    **kwargs : optional
+        The requests, pipeline and value_size passed to :func:`run`
+
+    Returns
+    -------
+    list
+        The result of :func:`run` for each setting
+    """
+    if not io_threads:
+        chosen = int(
+            configuration.io_thread_settings(clients)['io-threads']
+        )
+        io_threads = sorted({1, chosen})
+    return [
+        run(io_threads=setting, clients=clients, **kwargs)
+        for setting in io_threads
+    ]
+
+
+def format_results(results):
+    """
+    Format benchmark results as text
+
+    Parameters
+    ----------
+    results : list
+        The results, see :func:`compare`
+
+    Returns
+    -------
+    str
+        The results as a multi-line string
+    """
+    lines = [
+        'Threaded I/O benchmark: %d clients, %.1f cpus, %d requests per '
+        'client' % (
+            results[0]['clients'], configuration.cpu_limit(),
+            results[0]['requests'] // results[0]['clients']
+        ),
+        '',
+        '%10s %10s %9s %12s' % (
+            'io-threads', 'Requests', 'Seconds', 'Requests/s'
+        ),
+    ]
+    for result in results:
+        lines.append('%10d %10d %9.2f %12d' % (
+            result['io_threads'], result['requests'], result['seconds'],
+            result['requests_per_second']
+        ))
+    return '\n'.join(lines)
+
+
+def main(args=None):
+    """
+    Run the benchmark with the settings given on the command line and print
+    the results
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m redislite.benchmark',
+        description='Compare the throughput of the embedded redis-server '
+                    'with different io-threads settings'
+    )
+    parser.add_argument(
+        '--io-threads', type=int, action='append',
+        help='An io-threads setting to measure, can be repeated, default is '
+             '1 and the setting chosen for the number of clients'
+    )
+    parser.add_argument(
+        '--clients', type=int, default=16,
+        help='Number of concurrent client processes'
+    )
+    parser.add_argument(
+        '--requests', type=int, default=10000,
+        help='Number of commands each client sends'
+    )
+    parser.add_argument(
+        '--pipeline', type=int, default=1,
+        help='Number of commands each client sends at once'
+    )
+    parser.add_argument(
+        '--value-size', type=int, default=64,
+        help='Size of the values in bytes'
+    )
+    parser.add_argument(
+        '--json', action='store_true', help='Print the results as json'
+    )
+    options = parser.parse_args(args)
+    results = compare(
+        io_threads=options.io_threads, clients=options.clients,
+        requests=options.requests, pipeline=options.pipeline,
+        value_size=options.value_size
+    )
+    if options.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print(format_results(results))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,292 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite bulk loader
+
+This module contains the :func:`load` function, which loads large numbers of
+commands into a redis-server the way ``redis-cli --pipe`` does.  The commands
+are encoded in the redis protocol into large buffers that are streamed over
+the unix socket of the server while the replies are read and checked as they
+arrive, without waiting for the reply of each command.  The number of
+commands waiting for a reply is limited, so the memory used by the client and
+the server stays bounded however many commands are loaded.
+
+Example:
+  Load a million keys into a redislite instance::
+
+      >>> import redislite
+      >>> import redislite.bulk
+      >>> connection = redislite.Redis('/tmp/redis.db')
+      >>> stats = redislite.bulk.load(
+      ...     (('key%d' % i, i) for i in range(1000000)), connection,
+      ...     command='SET'
+      ... )
+      >>> stats['commands'], stats['errors']
+      (1000000, 0)
+"""
+import itertools
+import logging
+import redis
+import selectors
+import socket
+import time
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+class _ReplyParser(object):
+    """
+    Incremental parser counting the replies in the data read from the server
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+
+    def _line_end(self, position):
+        """
+        Get the position of the end of the line starting at position, -1 if
+        the line is incomplete
+        """
+        return self.buffer.find(b'\r\n', position)
+
+    def _parse(self, position):
+        """
+        Parse the reply starting at position
+
+        Returns
+        -------
+        tuple or None
+            The position after the reply and the error message if the reply
+            is an error, None if the reply is incomplete
+        """
+        end = self._line_end(position)
+        if end < 0:
+            return None
+        kind = self.buffer[position:position + 1]
+        line = bytes(self.buffer[position + 1:end])
+        position = end + 2
+        if kind == b'-':
+            return position, line.decode('utf-8', 'replace')
+        if kind in [b'+', b':']:
+            return position, None
+        if kind == b'$':
+            length = int(line)
+            if length < 0:
+                return position, None
+            if len(self.buffer) < position + length + 2:
+                return None
+            return position + length + 2, None
+        if kind == b'*':
+            error = None
+            for _ in range(max(int(line), 0)):
+                parsed = self._parse(position)
+                if parsed is None:
+                    return None
+                position, error = parsed[0], error or parsed[1]
+            return position, error
+        raise redis.InvalidResponse('Protocol error: %r' % line)
+
+    def feed(self, data):
+        """
+        Parse the data read from the server
+
+        Returns
+        -------
+        list
+            The error message, or None, of each complete reply
+        """
+        self.buffer += data
+        replies = []
+        while True:
+            parsed = self._parse(self.position)
+            if parsed is None:
+                break
+            self.position, error = parsed
+            replies.append(error)
+        if self.position:
+            del self.buffer[:self.position]
+            self.position = 0
+        return replies
+
+
+def _encode(value):
+    """
+    Return a command argument as bytes
+    """
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    if isinstance(value, float):
+        return repr(value).encode()
+    return str(value).encode()
+
+
+def encode_command(args):
+    """
+    Encode a command in the redis protocol
+
+    Parameters
+    ----------
+    args : list
+        The command and its arguments, as bytes, str, int or float
+
+    Returns
+    -------
+    bytes
+        The encoded command
+    """
+    encoded = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        arg = _encode(arg)
+        encoded.append(b'$%d\r\n' % len(arg))
+        encoded.append(arg)
+        encoded.append(b'\r\n')
+    return b''.join(encoded)
+
+
+def load(
+        iterable, connection, command=None, buffer_size=1024 * 1024,
+        max_pending=100000, raise_on_error=True, max_errors=10
+):
+    """
+    Stream commands to a redis-server without waiting for each reply
+
+    Parameters
+    ----------
+    iterable : iterable
+        The commands to send, each a list or tuple with the command and its
+        arguments, or with the arguments only if command is given.  The
+        iterable is consumed lazily.
+
+    connection : redislite.Redis
+        The instance to load the commands into, the commands are sent over a
+        separate connection to the unix socket of its server.
+
+    command : str, optional
+        The command to send for each item, for example 'SET' to load an
+        iterable of (key, value) tuples
+
+    buffer_size : int, optional
+        Number of bytes of encoded commands to send at once, default=1MB
+
+    max_pending : int, optional
+        Maximum number of commands sent without having received their reply,
+        default=100000
+
+    raise_on_error : bool, optional
+        Raise a redis.ResponseError after the load if any command failed,
+        default=True
+
+    max_errors : int, optional
+        Number of error replies to keep in the returned statistics,
+        default=10
+
+    Returns
+    -------
+    dict
+        The number of commands, errors and bytes sent, the seconds the load
+        took, the commands_per_second and the first error_messages as
+        (command index, message) tuples
+
+    Raises
+    ------
+    redis.ResponseError - A command failed and raise_on_error is True
+    """
+    kwargs = connection.connection_pool.connection_kwargs
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(kwargs['path'])
+    sock.setblocking(False)
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+
+    stats = {
+        'commands': 0, 'errors': 0, 'bytes': 0, 'error_messages': [],
+    }
+    start = time.time()
+    commands = iter(iterable)
+    if command is not None:
+        commands = ((command,) + tuple(args) for args in commands)
+    # The loading connection authenticates like the instance and uses its
+    # database
+    setup = []
+    if kwargs.get('password'):
+        setup.append(
+            ('AUTH', kwargs['username'], kwargs['password'])
+            if kwargs.get('username') else ('AUTH', kwargs['password'])
+        )
+    if kwargs.get('db'):
+        setup.append(('SELECT', kwargs['db']))
+    offset = len(setup)
+    if offset:
+        commands = itertools.chain(setup, commands)
+    parser = _ReplyParser()
+    output = bytearray()
+    sent = 0
+    replies = 0
+    exhausted = False
+    try:
+        while True:
+            # Fill the output buffer unless too many replies are pending
+            while not exhausted and len(output) < buffer_size and \
+                    sent - replies < max_pending:
+                try:
+                    args = next(commands)
+                except StopIteration:
+                    exhausted = True
+                    break
+                output += encode_command(args)
+                sent += 1
+            if exhausted and not output and replies == sent:
+                break
+
+            selector.modify(
+                sock,
+                selectors.EVENT_READ | (selectors.EVENT_WRITE if output else 0)
+            )
+            for _, events in selector.select():
+                if events & selectors.EVENT_WRITE:
+                    try:
+                        written = sock.send(output)
+                    except BlockingIOError:  # pragma: no cover
+                        written = 0
+                    del output[:written]
+                    stats['bytes'] += written
+                if events & selectors.EVENT_READ:
+                    data = sock.recv(1024 * 1024)
+                    if not data:
+                        raise redis.ConnectionError(
+                            'Connection closed by the redis-server'
+                        )
+                    for error in parser.feed(data):
+                        if error is not None:
+                            stats['errors'] += 1
+                            if len(stats['error_messages']) < max_errors:
+                                stats['error_messages'].append(
+                                    (replies - offset, error)
+                                )
+                        replies += 1
+    finally:
+        selector.close()
+        sock.close()
+
+    stats['commands'] = sent - offset
+    stats['seconds'] = time.time() - start
+    stats['commands_per_second'] = (
+        stats['commands'] / stats['seconds'] if stats['seconds'] else 0.0
+    )
+    logger.debug(
+        'Loaded %d commands in %.2f seconds, %.0f commands per second, '
+        '%d errors', stats['commands'], stats['seconds'],
+        stats['commands_per_second'], stats['errors']
+    )
+    if stats['errors'] and raise_on_error:
+        raise redis.ResponseError(
+            '%d of %d commands failed, the first error was: %s' % (
+                stats['errors'], stats['commands'],
+                stats['error_messages'][0][1]
+            )
+        )
+    return stats
@@ -0,0 +1,470 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite client-side cache
+
+This module contains the :class:`ClientCache()` class, a local cache for the
+GET, MGET, HGET and HGETALL reads of a redislite instance.  The cache is kept
+consistent with the redis-server using the server assisted client side caching
+of redis 6 and newer, the server tracks the keys read through the cache and
+sends an invalidation message when one of them changes.
+
+The invalidation messages are redirected to a connection subscribed to the
+``__redis__:invalidate`` channel, and are applied before each cached read is
+served, so no background thread is needed.  Reads always see the changes made
+through the same instance, changes made by other clients are seen once their
+invalidation message has arrived.
+
+Example:
+  Cache the reads of a redislite instance, up to 10000 entries::
+
+      >>> import redislite
+      >>> connection = redislite.Redis(client_cache={'max_entries': 10000})
+      >>> connection.set('flag', 'on')
+      True
+      >>> connection.get('flag')
+      b'on'
+      >>> connection.get('flag')
+      b'on'
+      >>> connection.client_cache.stats()['hits']
+      1
+"""
+import collections
+import logging
+import redis
+import threading
+import time
+from .instrumentation import _size
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+# The channel the invalidation messages are published on
+INVALIDATE_CHANNEL = '__redis__:invalidate'
+
+# Approximate per entry memory use besides the key and value
+_ENTRY_OVERHEAD = 100
+
+
+def _key(key):
+    """
+    Return a key as bytes, as it's sent in the invalidation messages
+    """
+    if isinstance(key, bytes):
+        return key
+    if isinstance(key, str):
+        return key.encode('utf-8')
+    return str(key).encode('utf-8')
+
+
+class ClientCache(object):
+    """
+    Bounded LRU cache of reads, invalidated by the redis-server
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Maximum number of cached reads, default=10000
+
+    max_bytes : int, optional
+        Maximum approximate size of the cached keys and values, default=64MB
+
+    ttl : float, optional
+        Number of seconds a read is cached for, default is until it's
+        invalidated or evicted
+
+    bcast : bool, optional
+        If True, use the broadcasting mode of the server, it sends
+        invalidations for all the keys that start with the prefixes instead of
+        remembering the keys read, which uses no server memory.
+
+    prefixes : list, optional
+        Only the keys starting with one of these prefixes are cached, in
+        bcast mode the server only sends invalidations for these prefixes.
+    """
+    def __init__(
+            self, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl=None,
+            bcast=False, prefixes=None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bcast = bcast
+        self.prefixes = [_key(prefix) for prefix in prefixes or []]
+        self.client = None
+        self._entries = collections.OrderedDict()
+        # The cache keys of each redis key
+        self._keys = collections.defaultdict(set)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._reader = None
+        self._listener = None
+        self._tracking = None
+        self._dirty = False
+        self._counters = collections.Counter()
+
+    def _connect(self):
+        """
+        Connect the invalidation listener and the tracked reader connection
+        """
+        kwargs = self.client.connection_pool.connection_kwargs
+        listener_kwargs = {
+            'path': kwargs['path'], 'username': kwargs.get('username'),
+            'password': kwargs.get('password'),
+        }
+        # The messages are read as RESP2 pubsub messages.  The versions of the
+        # redis module that support RESP3 have a protocol setting, which may
+        # select RESP3 push messages, older versions only speak RESP2.
+        if 'protocol' in kwargs:
+            listener_kwargs['protocol'] = 2
+        self._listener = redis.connection.UnixDomainSocketConnection(
+            **listener_kwargs
+        )
+        self._listener.connect()
+        self._listener.send_command('CLIENT', 'ID')
+        listener_id = self._listener.read_response()
+        self._listener.send_command('SUBSCRIBE', INVALIDATE_CHANNEL)
+        self._listener.read_response()
+
+        self._tracking = [
+            'CLIENT', 'TRACKING', 'ON', 'REDIRECT', listener_id
+        ]
+        if self.bcast:
+            self._tracking.append('BCAST')
+            for prefix in self.prefixes:
+                self._tracking += ['PREFIX', prefix]
+
+        self._reader = redis.Redis(
+            unix_socket_path=kwargs['path'], single_connection_client=True,
+            db=kwargs.get('db', 0), username=kwargs.get('username'),
+            password=kwargs.get('password'),
+            encoding=kwargs.get('encoding', 'utf-8'),
+            encoding_errors=kwargs.get('encoding_errors', 'strict'),
+            decode_responses=kwargs.get('decode_responses', False)
+        )
+        self._enable_tracking(self._reader.connection)
+        # Tracking is a setting of the connection, enable it again if the
+        # reader reconnects.
+        self._reader.connection.register_connect_callback(
+            self._enable_tracking
+        )
+
+    def _enable_tracking(self, connection):
+        """
+        Enable tracking of the keys read on a connection
+        """
+        connection.send_command(*self._tracking)
+        connection.read_response()
+
+    def _disconnect(self):
+        """
+        Close the connections and drop the cached reads
+        """
+        if self._listener:
+            self._listener.disconnect()
+            self._listener = None
+        if self._reader:
+            self._reader.close()
+            self._reader = None
+        self.clear()
+
+    def _invalidate(self, key):
+        """
+        Drop the cached reads of a redis key
+        """
+        for cache_key in list(self._keys.get(key, ())):
+            self._remove(cache_key)
+            self._counters['invalidations'] += 1
+
+    def _process_invalidations(self):
+        """
+        Apply the invalidation messages sent by the server
+
+        If commands were sent through the client since the last read, a PING
+        is sent on the listener connection and the messages are read until
+        the reply arrives, so the invalidations for changes made by these
+        commands are applied.  Otherwise only the messages that already
+        arrived are applied.
+        """
+        if not self._listener:
+            self._connect()
+            return
+        barrier = self._dirty
+        try:
+            if barrier:
+                self._listener.send_command('PING')
+            while barrier or self._listener.can_read(0):
+                message = self._listener.read_response()
+                if not isinstance(message, list):
+                    continue
+                if message[0] == b'pong':
+                    barrier = False
+                    continue
+                if message[0] != b'message':
+                    continue
+                if message[2] is None:
+                    # The server flushed the db or its tracking table
+                    self._counters['invalidations'] += len(self._entries)
+                    self.clear()
+                    continue
+                for key in message[2]:
+                    self._invalidate(key)
+        except (
+                redis.ConnectionError, redis.exceptions.InvalidResponse,
+                OSError
+        ) as error:
+            # Invalidations may have been lost.  Redis 6 also sends the flush
+            # message with a RESP3 null on RESP2 connections, which can't be
+            # parsed.
+            logger.debug('Client cache listener failed: %s', error)
+            self._disconnect()
+            self._connect()
+        self._dirty = False
+
+    def _cacheable(self, key):
+        """
+        Check if the reads of a key are cached
+        """
+        return not self.prefixes or any(
+            key.startswith(prefix) for prefix in self.prefixes
+        )
+
+    def _remove(self, cache_key):
+        """
+        Remove an entry
+        """
+        entry = self._entries.pop(cache_key, None)
+        if entry:
+            self._bytes -= entry[2]
+        cache_keys = self._keys.get(cache_key[1])
+        if cache_keys:
+            cache_keys.discard(cache_key)
+            if not cache_keys:
+                del self._keys[cache_key[1]]
+
+    def _lookup(self, cache_key):
+        """
+        Get a cached read
+
+        Returns
+        -------
+        tuple
+            A (found, value) tuple
+        """
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            self._counters['misses'] += 1
+            return False, None
+        value, expires, _ = entry
+        if expires is not None and expires < time.time():
+            self._remove(cache_key)
+            self._counters['expirations'] += 1
+            self._counters['misses'] += 1
+            return False, None
+        self._entries.move_to_end(cache_key)
+        self._counters['hits'] += 1
+        return True, value
+
+    def _store(self, cache_key, value):
+        """
+        Cache a read, evicting the least recently used reads if the cache is
+        full
+        """
+        size = _size(cache_key) + _size(value) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        self._remove(cache_key)
+        expires = time.time() + self.ttl if self.ttl else None
+        self._entries[cache_key] = (value, expires, size)
+        self._keys[cache_key[1]].add(cache_key)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or \
+                self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._counters['evictions'] += 1
+
+    def _cache_key(self, command, key, *args):
+        """
+        Get the cache key of a read, None if the key isn't cached
+        """
+        name = _key(key)
+        if not self._cacheable(name):
+            return None
+        return (command, name) + tuple(_key(arg) for arg in args)
+
+    def _read(self, command, key, *args):
+        """
+        Serve a read from the cache or from the tracked reader connection
+        """
+        cache_key = self._cache_key(command, key, *args)
+        if cache_key is None:
+            return self._reader_command(command, key, *args)
+        with self._lock:
+            # A change after the read is invalidated by a message that is
+            # applied before the next read is served.
+            self._process_invalidations()
+            found, value = self._lookup(cache_key)
+            if not found:
+                value = getattr(self._reader, command)(key, *args)
+                self._store(cache_key, value)
+        if isinstance(value, dict):
+            return dict(value)
+        return value
+
+    def _reader_command(self, command, *args):
+        """
+        Run a read on the reader connection without caching it
+        """
+        with self._lock:
+            if not self._reader:
+                self._connect()
+            return getattr(self._reader, command)(*args)
+
+    def get(self, name):
+        """
+        Return the value at key ``name``, or None if the key doesn't exist
+        """
+        return self._read('get', name)
+
+    def hget(self, name, key):
+        """
+        Return the value of ``key`` within the hash ``name``
+        """
+        return self._read('hget', name, key)
+
+    def hgetall(self, name):
+        """
+        Return a Python dict of the hash's name/value pairs
+        """
+        return self._read('hgetall', name)
+
+    def mget(self, keys, *args):
+        """
+        Returns a list of values ordered identically to ``keys``
+        """
+        if isinstance(keys, (bytes, str)):
+            keys = [keys]
+        keys = list(keys) + list(args)
+        values = [None] * len(keys)
+        missing = []
+        with self._lock:
+            self._process_invalidations()
+            for index, key in enumerate(keys):
+                cache_key = self._cache_key('get', key)
+                found = False
+                if cache_key is not None:
+                    found, values[index] = self._lookup(cache_key)
+                if not found:
+                    missing.append((index, key, cache_key))
+            if missing:
+                read = self._reader.mget([key for _, key, _ in missing])
+                for (index, _, cache_key), value in zip(missing, read):
+                    values[index] = value
+                    if cache_key is not None:
+                        self._store(cache_key, value)
+        return values
+
+    def clear(self):
+        """
+        Drop all cached reads
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Get the cache statistics
+
+        Returns
+        -------
+        dict
+            The number of hits, misses, invalidations, evictions and
+            expirations, the hit_ratio and the number of entries and bytes
+            cached
+        """
+        with self._lock:
+            stats = {
+                name: self._counters[name] for name in [
+                    'hits', 'misses', 'invalidations', 'evictions',
+                    'expirations'
+                ]
+            }
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            return stats
+
+    def _wrap_execute_command(self, execute_command):
+        """
+        Wrap the execute_command method of a client to note that the
+        invalidations have to be read before the next cached read
+        """
+        def execute_command_and_invalidate(*args, **options):
+            self._dirty = True
+            return execute_command(*args, **options)
+        return execute_command_and_invalidate
+
+    def _wrap_pipeline(self, pipeline):
+        """
+        Wrap the pipeline method of a client, so executing a pipeline notes
+        that the invalidations have to be read before the next cached read
+        """
+        def pipeline_and_invalidate(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            pipe.execute = self._wrap_execute_command(pipe.execute)
+            return pipe
+        return pipeline_and_invalidate
+
+    def install_hooks(self, client):
+        """
+        Wrap the execute_command and pipeline methods of a client, so the
+        reads after a command sent through the client see its changes
+
+        Parameters
+        ----------
+        client : redis.Redis
+            The client to cache the reads of
+        """
+        client.execute_command = self._wrap_execute_command(
+            client.execute_command
+        )
+        client.pipeline = self._wrap_pipeline(client.pipeline)
+
+    def install(self, client):
+        """
+        Serve the reads of a redis client from the cache
+
+        The get, mget, hget, hgetall, execute_command and pipeline methods of
+        the client instance are replaced, other instances of the class are not
+        affected.
+
+        Parameters
+        ----------
+        client : redis.Redis
+            The client to cache the reads of
+        """
+        self.client = client
+        with self._lock:
+            self._connect()
+        for name in ['get', 'mget', 'hget', 'hgetall']:
+            setattr(client, name, getattr(self, name))
+        self.install_hooks(client)
+
+    def uninstall(self):
+        """
+        Stop caching the reads of the client and close the cache connections
+        """
+        if self.client is None:
+            return
+        for name in [
+                'get', 'mget', 'hget', 'hgetall', 'execute_command', 'pipeline'
+        ]:
+            self.client.__dict__.pop(name, None)
+        with self._lock:
+            self._disconnect()
+        self.client = None
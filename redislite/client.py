@@ -11,24 +11,545 @@ they are functionally identical to the :class:`redis.Redis()` and
 :class:`redis.StrictRedis()` classes.
 """
 import atexit
+import fcntl
 import json
 import logging
 import os
 import psutil
 import redis
+import select
 import shutil
 import signal
 import subprocess
 import tempfile
+import threading
 import time
 import sys
+import weakref
+from redis.backoff import NoBackoff
+from redis.retry import Retry
 from . import configuration
 from . import __redis_executable__
+from .cache import ClientCache
+from .instrumentation import Instrumentation, default_sink
+from .metrics import MetricsCollector
 
 
 logger = logging.getLogger(__name__)  # pylint: disable=C0103
 
 
+# Handles for the redis-server processes used by this python process, keyed
+# by the server's unix socket.  The handles of servers started in supervised
+# (non-daemonized) mode hold the child process, so any instance that shuts one
+# of these servers down can reap it.
+_server_processes = {}
+
+# The redislite instances that may be using a redis-server.  Only weak
+# references are held, so instances can still be garbage collected, the
+# servers of the instances that are alive when the interpreter exits are shut
+# down by _cleanup_instances().
+_instances = weakref.WeakSet()
+
+# The settings read from the registry files of the redis-servers used by this
+# python process, keyed by the registry file, so instances for a db file that
+# is already in use don't read the registry or the pidfile again.
+_registry_settings = {}
+
+# Connection pools shared by the redislite instances of this python process
+# that connect to the same redis-server with the same connection settings,
+# keyed by the server's unix socket and then by the connection settings.
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+# Number of seconds _cleanup_instances() waits past its deadline for the
+# servers that are killed at the deadline to exit
+_CLEANUP_GRACE = 2
+
+# ioctl request number for cloning a file on Linux filesystems with reflink
+# support (btrfs, xfs), python 3.12 and newer provide it as fcntl.FICLONE.
+_FICLONE = getattr(fcntl, 'FICLONE', 0x40049409)
+
+
+class _ServerProcess(object):
+    """
+    Handle for a running redis-server process
+
+    On Linux a pidfd is held for the process, so checking if the server is
+    running and waiting for it to exit doesn't need pidfile reads, /proc
+    lookups or sleeping.  Otherwise the process handle of a child process or
+    a :class:`psutil.Process()` is used.
+
+    Parameters
+    ----------
+    pid : int
+        The process id of the redis-server
+
+    popen : subprocess.Popen, optional
+        The process handle if the server is a child of this process, it's
+        not used in processes forked from this process
+
+    Raises
+    ------
+    psutil.NoSuchProcess - There is no process with the pid
+    """
+    def __init__(self, pid, popen=None):
+        self.pid = pid
+        self.popen = popen
+        self.owner = os.getpid()
+        self.process = None
+        self.pidfd = None
+        if popen is None:
+            self.process = psutil.Process(pid)
+        if hasattr(os, 'pidfd_open'):
+            try:
+                self.pidfd = os.pidfd_open(pid)
+            except OSError:  # pragma: no cover
+                pass
+        # Make sure the pidfd isn't for a new process that reused the pid
+        if self.process and not self.process.is_running():  # pragma: no cover
+            self.close()
+            raise psutil.NoSuchProcess(pid)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """
+        Release the pidfd
+        """
+        if self.pidfd is not None:
+            os.close(self.pidfd)
+            self.pidfd = None
+
+    def _child(self):
+        """
+        Get the process handle if the server is a child of the current
+        process
+
+        Returns
+        -------
+        subprocess.Popen or None
+            The process handle, None in a process forked from the one that
+            started the server, which can't reap it
+        """
+        if self.popen is None or self.owner == os.getpid():
+            return self.popen
+        if self.pidfd is None and self.process is None:  # pragma: no cover
+            self.process = psutil.Process(self.pid)
+        return None
+
+    def is_running(self):
+        """
+        Check if the process is running, a child process that exited is
+        reaped.
+
+        Returns
+        -------
+        bool
+            True if the process is running
+        """
+        popen = self._child()
+        if popen is not None:
+            return popen.poll() is None
+        if self.pidfd is not None:
+            return not select.select([self.pidfd], [], [], 0)[0]
+        return self.process.is_running()  # pragma: no cover
+
+    def wait(self, timeout=None):
+        """
+        Wait for the process to exit, a child process is reaped.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Number of seconds to wait, wait forever if None
+
+        Returns
+        -------
+        bool
+            True if the process is no longer running
+        """
+        popen = self._child()
+        if self.pidfd is not None:
+            poller = select.poll()
+            poller.register(self.pidfd, select.POLLIN)
+            if not poller.poll(
+                    None if timeout is None else int(timeout * 1000)
+            ):
+                return False
+            if popen is None:
+                return True
+        if popen is not None:
+            try:
+                popen.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:  # pragma: no cover
+                return False
+            return True
+        try:  # pragma: no cover
+            self.process.wait(timeout=timeout)
+        except psutil.TimeoutExpired:  # pragma: no cover
+            return False
+        return True  # pragma: no cover
+
+
+def _get_server_process(socket_file, pidfile):
+    """
+    Get the handle for the redis-server listening on a unix socket
+
+    The pidfile is only read the first time a server is looked up, after
+    that the cached handle is used.
+
+    Parameters
+    ----------
+    socket_file : str
+        The unix socket of the redis-server
+
+    pidfile : str
+        The pidfile of the redis-server
+
+    Returns
+    -------
+    _ServerProcess or None
+        The handle of the redis-server or None if it isn't running
+    """
+    server_process = _server_processes.get(socket_file)
+    if server_process is None and pidfile and os.path.exists(pidfile):
+        with open(pidfile) as file_handle:
+            pid = int(file_handle.read().strip() or 0)
+        if not pid:  # pragma: no cover
+            return None
+        try:
+            server_process = _ServerProcess(pid)
+        except psutil.NoSuchProcess:  # pragma: no cover
+            return None
+        if socket_file:
+            _server_processes[socket_file] = server_process
+    if server_process and not server_process.is_running():
+        if _server_processes.get(socket_file) is server_process:
+            del _server_processes[socket_file]
+        server_process.close()
+        return None
+    return server_process
+
+
+def _read_setting_registry(settingregistryfile):
+    """
+    Get the settings of the running redis-server for a registry file
+
+    The registry file is only read the first time a server is looked up,
+    after that the cached settings are used for as long as the handle of the
+    server shows it's running.
+
+    Parameters
+    ----------
+    settingregistryfile : str
+        The registry file written by the instance that started the server
+
+    Returns
+    -------
+    dict or None
+        The pidfile, unixsocket, dbdir and dbfilename settings of the
+        redis-server or None if it isn't running
+    """
+    settings = _registry_settings.get(settingregistryfile)
+    if settings and _get_server_process(settings['unixsocket'], None):
+        return settings
+    _registry_settings.pop(settingregistryfile, None)
+    if not os.path.exists(settingregistryfile):
+        return None
+    with open(settingregistryfile) as file_handle:
+        settings = json.load(file_handle)
+    if not _get_server_process(
+            settings['unixsocket'], settings.get('pidfile', '')
+    ):
+        return None
+    _registry_settings[settingregistryfile] = settings
+    return settings
+
+
+def _shared_pool_key(kwargs):
+    """
+    Get the key for the connection settings of an instance in the shared
+    connection pools of its redis-server
+
+    Parameters
+    ----------
+    kwargs : dict
+        The keyword arguments passed to the redis bindings
+
+    Returns
+    -------
+    str
+        The key, instances with the same connection settings get the same key
+    """
+    return repr(sorted(
+        (key, value) for key, value in kwargs.items()
+        if key not in ['unix_socket_path', 'connection_pool']
+    ))
+
+
+def _create_shared_pool(
+        pool, max_connections=None, blocking=False, timeout=20, warm=0
+):
+    """
+    Create the connection pool to share from the pool of the first instance
+
+    Parameters
+    ----------
+    pool : redis.ConnectionPool
+        The connection pool created by the redis bindings for the instance
+
+    max_connections : int, optional
+        Maximum number of connections the pool opens, defaults to the limit
+        of the redis bindings
+
+    blocking : bool, optional
+        If True, a :class:`redis.BlockingConnectionPool()` is used, so
+        clients wait for a free connection when all of them are in use
+        instead of getting an error, default=False
+
+    timeout : float, optional
+        Number of seconds a client of a blocking pool waits for a connection,
+        default=20
+
+    warm : int, optional
+        Number of connections to open in advance, default=0
+
+    Returns
+    -------
+    redis.ConnectionPool
+        The connection pool
+    """
+    if blocking:
+        pool = redis.BlockingConnectionPool(
+            max_connections=max_connections or pool.max_connections,
+            timeout=timeout, connection_class=pool.connection_class,
+            **pool.connection_kwargs
+        )
+    elif max_connections:
+        pool = redis.ConnectionPool(
+            connection_class=pool.connection_class,
+            max_connections=max_connections, **pool.connection_kwargs
+        )
+    connections = [
+        pool.get_connection()
+        for _ in range(min(warm, pool.max_connections))
+    ]
+    for connection in connections:
+        pool.release(connection)
+    return pool
+
+
+def _discard_shared_pools(socket_file):
+    """
+    Disconnect and forget the shared connection pools of a redis-server that
+    has been shut down
+
+    Parameters
+    ----------
+    socket_file : str
+        The unix socket of the redis-server
+    """
+    with _shared_pools_lock:
+        pools = _shared_pools.pop(socket_file, {})
+    for pool in pools.values():
+        pool.disconnect()
+
+
+def _cleanup_instances(timeout=30):
+    """
+    Clean up all the redislite instances that are still alive.  This runs
+    when the interpreter exits.
+
+    The redis-servers are shut down in parallel and the whole teardown is
+    limited to the timeout, servers that haven't exited by then are killed.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Maximum number of seconds for shutting down all the servers,
+        default=30
+
+    Returns
+    -------
+    dict
+        The number of seconds each server took to shut down, keyed by the
+        server's unix socket
+    """
+    deadline = time.time() + timeout
+    cleanups = []
+    for instance in list(_instances):
+        thread = threading.Thread(
+            target=instance._cleanup, kwargs={'deadline': deadline},
+            name='redislite-cleanup', daemon=True
+        )
+        thread.start()
+        cleanups.append((instance, instance.socket_file, thread))
+
+    shutdown_timings = {}
+    for instance, socket_file, thread in cleanups:
+        # Allow for killing the server once the deadline has passed
+        thread.join(max(deadline - time.time(), 0) + _CLEANUP_GRACE)
+        if thread.is_alive():  # pragma: no cover
+            logger.warning(
+                'Shutting down the redis server on socket %s did not finish '
+                'in time', socket_file
+            )
+        elif 'shutdown' in instance.timings:
+            shutdown_timings[socket_file] = instance.timings['shutdown']
+            logger.debug(
+                'Shut down the redis server on socket %s in %.3f seconds',
+                socket_file, instance.timings['shutdown']
+            )
+    return shutdown_timings
+
+
+def _remaining(timeout, deadline=None):
+    """
+    Limit a timeout to the time left before a deadline
+
+    Parameters
+    ----------
+    timeout : float
+        The timeout in seconds
+
+    deadline : float, optional
+        The time.time() value of the deadline, no limit if None
+
+    Returns
+    -------
+    float
+        The limited timeout, 0 if the deadline has passed
+    """
+    if deadline is None:
+        return timeout
+    return max(min(timeout, deadline - time.time()), 0)
+
+
+atexit.register(_cleanup_instances)
+
+
+def _process_running(pid):
+    """
+    Check if a process is running, a process that exited but hasn't been
+    reaped by its parent yet is not running.
+
+    Parameters
+    ----------
+    pid : int
+        The process id
+
+    Returns
+    -------
+    bool
+        True if the process is running
+    """
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+def _update_reference_count(refcount_file, increment=0):
+    """
+    Update the number of redislite instances using a redis-server
+
+    The count is kept in a file next to the server's unix socket, so the
+    instances of all processes sharing the server use the same count.  The
+    file is locked while it's updated.
+
+    The file holds the pid of the process of each instance, the entries of
+    processes that are no longer running are dropped, so instances of a
+    process that crashed or exited without cleaning up don't keep the
+    server running.
+
+    Parameters
+    ----------
+    refcount_file : str
+        The reference count file of the redis-server
+
+    increment : int, optional
+        The amount to change the count by, only the instances of the current
+        process are added or removed, default=0
+
+    Returns
+    -------
+    int
+        The updated reference count
+    """
+    if not increment and not os.path.exists(refcount_file):
+        return 0
+    fd = os.open(refcount_file, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        data = b''
+        chunk = os.read(fd, 4096)
+        while chunk:
+            data += chunk
+            chunk = os.read(fd, 4096)
+        own_pid = os.getpid()
+        pids = [int(pid) for pid in data.split()]
+        running = {
+            pid: pid == own_pid or _process_running(pid) for pid in set(pids)
+        }
+        updated = [pid for pid in pids if running[pid]]
+        if increment > 0:
+            updated += [own_pid] * increment
+        for _ in range(-increment):
+            if own_pid in updated:
+                updated.remove(own_pid)
+        if updated != pids:
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, ' '.join(str(pid) for pid in updated).encode())
+        return len(updated)
+    finally:
+        os.close(fd)
+
+
+def _clone_file(source, destination):
+    """
+    Create a copy of a file that shares its data blocks when possible
+
+    A reflink clone is tried first, then a hard link, and a regular copy is
+    made when neither is supported.  A hard link is safe for redis rdb files
+    because redis-server always writes a new file and renames it over the
+    db file, so the source file is never modified.
+
+    Parameters
+    ----------
+    source : str
+        Path of the file to copy
+
+    destination : str
+        Path of the new file
+
+    Returns
+    -------
+    str
+        The method used to create the file, one of 'reflink', 'hardlink' or
+        'copy'
+    """
+    if sys.platform.startswith('linux'):
+        with open(source, 'rb') as source_handle:
+            with open(destination, 'wb') as destination_handle:
+                try:
+                    fcntl.ioctl(
+                        destination_handle.fileno(), _FICLONE,
+                        source_handle.fileno()
+                    )
+                    return 'reflink'  # pragma: no cover
+                except OSError:
+                    pass
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+        return 'hardlink'
+    except OSError:  # pragma: no cover
+        shutil.copyfile(source, destination)
+        return 'copy'
+
+
 class RedisLiteException(Exception):
     """
     Redislite Client Error exception class
@@ -61,110 +582,338 @@ class RedisMixin(object):
     cleanupregistry = False
     redis_configuration = None
     redis_configuration_filename = None
-
-    def _cleanup(self, sys_modules=None):
+    server_pool = None
+    shutdown_save = None
+    profile = None
+    memory_budget = None
+    concurrency = None
+    metrics_collector = None
+    instrumentation = None
+    client_cache = None
+    shared_pool = None
+    _server_reference = False
+    _shared_pool = False
+
+    def _cleanup(self, deadline=None):
         """
         Stop the redis-server for this instance if it's running
-        :return:
-        """
-        if sys_modules:     # pragma: no cover
-            import sys
-            sys.modules.update(sys_modules)
 
-        if self.pid:
-            # logger.debug('Connection count: %s', self._connection_count())
-            if self._connection_count() <= 1:
+        Parameters
+        ----------
+        deadline : float, optional
+            The time.time() value by which the redis-server has to be shut
+            down, it is killed if it's still running then.
+        """
+        self.stop_metrics()
+        self.disable_client_cache()
+        if self._server_reference and self.pid:
+            if self._release_server() == 0:
                 logger.debug(
                     'Last client using the connection, shutting down the '
                     'redis connection on socket: %s',
                     self.socket_file
                 )
-                # noinspection PyUnresolvedReferences
-                logger.debug(
-                    'Shutting down redis server with pid of %r', self.pid
-                )
-                try:
-                    self.shutdown(save=True, now=True, force=True)
-                    try:  # pragma: no cover
-                        process = psutil.Process(self.pid)
-                    except psutil.NoSuchProcess:  # pragma: no cover
-                        process = None
-                    if process:   # pragma: no cover
-                        for i in range(50):
-                            if not process.is_running():
-                                break
-                            time.sleep(.2)
-                except redis.RedisError:  # pragma: no cover
-                    if self.pid != 0:
-                        try:
-                            process = psutil.Process(self.pid)
-                            if process.is_running() and process.pid != 0:
-                                logger.info(f'Redis shutdown failed, sending sigterm to {self.pid}')
-                                os.kill(self.pid, signal.SIGTERM)
-                                for i in range(120):  # default shutdown timeout is 10 seconds
-                                    if not process.is_running():
-                                        break
-                                    time.sleep(.1)
-                            if process.is_running() and process.pid != 0:
-                                logger.warning('Redis graceful shutdown failed, forcefully killing pid %r', self.pid)
-                                os.kill(self.pid, signal.SIGKILL)
-                        except psutil.NoSuchProcess:
-                            pass
-                self.socket_file = None
-
-                if self.pidfile and os.path.exists(
-                        self.pidfile
-                ):   # pragma: no cover
-                    # noinspection PyTypeChecker
-                    pid = int(open(self.pidfile).read())
-                    try:
-                        process = psutil.Process(pid)
-                        if process.is_running():
-                            os.kill(pid, signal.SIGKILL)
-                    except psutil.NoSuchProcess:
-                        pass
-
-                if self.redis_dir and os.path.isdir(
-                        self.redis_dir
-                ):  # pragma: no cover
-                    shutil.rmtree(self.redis_dir)
-
-                if self.cleanupregistry and os.path.exists(
-                        self.settingregistryfile
-                ):
-                    os.remove(self.settingregistryfile)
-                    self.settingregistryfile = None
+                self._shutdown_server(deadline=deadline)
+                self._remove_server_files()
             else:
                 logger.debug(
                     'Other clients are still connected to the redis server, '
                     'not shutting down the connection on socket: %s',
                     self.socket_file
                 )
-                self.connection_pool.disconnect()
+                # A shared pool is still used by the other instances of this
+                # process, it is disconnected when the server shuts down.
+                if not self._shared_pool:
+                    self.connection_pool.disconnect()
 
+        self._server_reference = False
         self.running = False
         self.redis_dir = None
         self.pidfile = None
 
+    @property
+    def _refcount_file(self):
+        """
+        The file holding the number of instances using the redis-server
+        """
+        return self.socket_file + '.refs'
+
+    def _acquire_server(self):
+        """
+        Register this instance as a user of the redis-server
+        """
+        if not self._server_reference:
+            _update_reference_count(self._refcount_file, 1)
+            self._server_reference = True
+
+    def _release_server(self):
+        """
+        Unregister this instance as a user of the redis-server
+
+        Returns
+        -------
+        int
+            The number of instances still using the redis-server
+        """
+        self._server_reference = False
+        count = _update_reference_count(self._refcount_file, -1)
+        if count == 0:
+            # The last user removes the registry, even if another instance
+            # created it.
+            self.cleanupregistry = True
+        return count
+
+    def _shutdown_server(self, client=None, deadline=None):
+        """
+        Shut down the redis-server and wait for it to exit
+
+        The time the shutdown took is stored in the 'shutdown' entry of the
+        timings attribute.
+
+        Parameters
+        ----------
+        client : redis.Redis, optional
+            The connection to send the shutdown command on, defaults to this
+            instance
+
+        deadline : float, optional
+            The time.time() value by which the redis-server has to be shut
+            down, it is killed if it's still running then.
+        """
+        server_process = _get_server_process(self.socket_file, self.pidfile)
+        if not server_process:  # pragma: no cover
+            return
+        pid = server_process.pid
+        # noinspection PyUnresolvedReferences
+        logger.debug(
+            'Shutting down redis server with pid of %r', pid
+        )
+        start = time.time()
+        connection = None
+        if client is None:
+            client = connection = self._shutdown_connection(deadline)
+        try:
+            self._send_shutdown(client, deadline)
+            if not server_process.wait(timeout=_remaining(10, deadline)):
+                raise redis.TimeoutError(
+                    'The redis server did not exit after the shutdown'
+                )  # pragma: no cover
+        except redis.RedisError:  # pragma: no cover
+            if not server_process.wait(timeout=0):
+                logger.info(f'Redis shutdown failed, sending sigterm to {pid}')
+                os.kill(pid, signal.SIGTERM)
+                # default shutdown timeout is 10 seconds
+                if not server_process.wait(timeout=_remaining(12, deadline)):
+                    logger.warning('Redis graceful shutdown failed, forcefully killing pid %r', pid)
+                    os.kill(pid, signal.SIGKILL)
+                    server_process.wait(timeout=1)
+        finally:
+            if connection:
+                connection.close()
+        self.timings['shutdown'] = time.time() - start
+        _get_server_process(self.socket_file, None)
+
+    @property
+    def _ephemeral(self):
+        """
+        True if the db file is in the temporary directory of the redis-server,
+        so it is deleted when the server shuts down.
+        """
+        return bool(self.pidfile) and \
+            os.path.dirname(self.pidfile) == self.dbdir
+
+    def _shutdown_save_mode(self):
+        """
+        Return how the data is saved when the redis-server is shut down
+
+        Returns
+        -------
+        str
+            The shutdown_save setting, if not set 'nosave' for servers with a
+            temporary db file and 'save' otherwise.
+        """
+        if self.shutdown_save:
+            return self.shutdown_save
+        return 'nosave' if self._ephemeral else 'save'
+
+    def _send_shutdown(self, client, deadline=None):
+        """
+        Send the shutdown command for the save mode of this instance
+
+        Parameters
+        ----------
+        client : redis.Redis
+            The connection to send the commands on
+
+        deadline : float, optional
+            The time.time() value by which the redis-server has to be shut
+            down
+        """
+        mode = self._shutdown_save_mode()
+        if mode == 'bgsave':
+            self._background_save(client, deadline)
+        # The NOW and FORCE options need redis 7, so they aren't used.
+        client.shutdown(save=mode == 'save', nosave=mode != 'save')
+
+    @staticmethod
+    def _background_save(client, deadline=None):
+        """
+        Save the data with a background save and wait for it to finish
+
+        Parameters
+        ----------
+        client : redis.Redis
+            The connection to send the commands on
+
+        deadline : float, optional
+            The time.time() value to stop waiting at
+
+        Raises
+        ------
+        redis.TimeoutError - The save did not finish by the deadline
+        """
+        try:
+            client.bgsave()
+        except redis.ResponseError:  # pragma: no cover
+            # A background save is already running
+            pass
+        delay = .001
+        while client.info('persistence')['rdb_bgsave_in_progress']:
+            if deadline is not None and time.time() >= deadline:
+                raise redis.TimeoutError(
+                    'The background save did not finish in time'
+                )  # pragma: no cover
+            time.sleep(delay)
+            delay = min(delay * 2, .1)
+
+    def _shutdown_connection(self, deadline=None):
+        """
+        Open a separate connection for shutting down the redis-server
+
+        The shutdown command is not retried, a retry would only wait for the
+        server that closed the connection by exiting, and it times out at the
+        deadline.
+
+        Parameters
+        ----------
+        deadline : float, optional
+            The time.time() value by which the redis-server has to be shut
+            down
+
+        Returns
+        -------
+        redislite.client.BaseRedis
+            The connection
+        """
+        return BaseRedis(
+            unix_socket_path=self.socket_file,
+            socket_timeout=_remaining(10, deadline) or .001,
+            retry=Retry(NoBackoff(), 0), **self._server_credentials()
+        )
+
+    def _server_credentials(self):
+        """
+        Get the username and password this instance authenticates to the
+        redis-server with
+
+        Returns
+        -------
+        dict
+            The username and password arguments for a redis client, None if
+            not set
+        """
+        pool = getattr(self, 'connection_pool', None)
+        kwargs = getattr(pool, 'connection_kwargs', {})
+        return {
+            'username': kwargs.get('username'),
+            'password': kwargs.get('password'),
+        }
+
+    def _server_password(self):
+        """
+        Get the password this instance authenticates to the redis-server with
+
+        Returns
+        -------
+        str or None
+            The password, None if the server doesn't require one
+        """
+        return self._server_credentials()['password']
+
+    def _remove_server_files(self):
+        """
+        Remove the files of a redis-server that has been shut down, killing
+        the server if it is still running.
+        """
+        if self.socket_file and os.path.exists(self._refcount_file):
+            os.remove(self._refcount_file)
+        if self.socket_file:
+            _discard_shared_pools(self.socket_file)
+        self.socket_file = None
+
+        if self.pidfile and os.path.exists(
+                self.pidfile
+        ):   # pragma: no cover
+            # noinspection PyTypeChecker
+            pid = int(open(self.pidfile).read())
+            try:
+                process = psutil.Process(pid)
+                if process.is_running():
+                    os.kill(pid, signal.SIGKILL)
+            except psutil.NoSuchProcess:
+                pass
+
+        if self.redis_dir and os.path.isdir(
+                self.redis_dir
+        ):  # pragma: no cover
+            shutil.rmtree(self.redis_dir)
+
+        if self.cleanupregistry and os.path.exists(
+                self.settingregistryfile
+        ):
+            os.remove(self.settingregistryfile)
+            _registry_settings.pop(self.settingregistryfile, None)
+            self.settingregistryfile = None
+
+    def _adopt_server(self, other):
+        """
+        Take over the embedded redis-server started by another instance
+
+        Parameters
+        ----------
+        other : RedisMixin or None
+            The instance that started the server, it no longer manages the
+            server afterwards.
+
+        Returns
+        -------
+        bool
+            True if a server was adopted
+        """
+        if not other:
+            return False
+        for attribute in [
+            'redis_dir', 'pidfile', 'logfile', 'socket_file', 'dbdir',
+            'dbfilename', 'settingregistryfile', 'cleanupregistry',
+            'redis_configuration', 'redis_configuration_filename', 'running',
+            'timings', '_server_reference'
+        ]:
+            setattr(self, attribute, getattr(other, attribute))
+            # Fall back to the class defaults, so cleaning up the other
+            # instance leaves the server alone.
+            other.__dict__.pop(attribute, None)
+        other.connection_pool.disconnect()
+        return True
+
     def _connection_count(self):
         """
-        Return the number of active connections to the redis server.
+        Return the number of redislite instances using the redis server.
         :return:
         """
-        if not self._is_redis_running():  # pragma: no cover
+        if not self.pid:  # pragma: no cover
             return 0
 
-        active_connections = 0
-        client_list = self.client_list()
-        if not client_list:  # pragma: no cover
-            return 0
-
-        for client in client_list:
-            flags = client.get('flags', '')
-            flags = flags.upper()
-            if 'U' in flags or 'N' in flags:  # pragma: no cover
-                active_connections += 1
-        return active_connections
+        return _update_reference_count(self._refcount_file)
 
     def _create_redis_directory_tree(self):
         """
@@ -186,12 +935,34 @@ class RedisMixin(object):
         Start the redis server
         :return:
         """
-
+        command, daemonize = self._write_redis_configuration()
+        start = time.time()
+        server_process = self._spawn_redis(command, daemonize)
+        self._wait_for_socket(server_process)
+        self.timings['spawn'] = time.time() - start
+        self._save_setting_registry()
+        self._acquire_server()
+        self.running = True
+
+    def _write_redis_configuration(self):
+        """
+        Write the redis-server configuration file to the redis directory
+
+        Returns
+        -------
+        tuple
+            The command line to start the redis-server and a bool that is True
+            if the server is configured to daemonize itself
+        """
         self.redis_configuration_filename = os.path.join(
             self.redis_dir, 'redis.config'
         )
 
         kwargs = dict(self.server_config)
+        # Unless the caller asked for a daemonized server, run redis-server
+        # supervised as a direct child so the pid is known immediately and
+        # an early exit can be detected without waiting for the timeout.
+        kwargs.setdefault('daemonize', 'no')
         kwargs.update(
             {
                 'pidfile': self.pidfile,
@@ -202,7 +973,10 @@ class RedisMixin(object):
             }
         )
         # Write a redis.config to our temp directory
-        self.redis_configuration = configuration.config(**kwargs)
+        self.redis_configuration = configuration.config(
+            profile=self.profile, memory_budget=self.memory_budget,
+            concurrency=self.concurrency, **kwargs
+        )
         with open(self.redis_configuration_filename, 'w') as file_handle:
             file_handle.write(self.redis_configuration)
 
@@ -210,34 +984,138 @@ class RedisMixin(object):
         if not redis_executable:  # pragma: no cover
             redis_executable = 'redis-server'
         command = [redis_executable, self.redis_configuration_filename]
+        return command, kwargs['daemonize'] == 'yes'
+
+    def _spawn_redis(self, command, daemonize=False):
+        """
+        Run the redis-server
+
+        Parameters
+        ----------
+        command : list
+            The redis-server command line
+
+        daemonize : bool, optional
+            True if the server daemonizes itself
+
+        Returns
+        -------
+        _ServerProcess or None
+            The handle of the supervised redis-server, None if the server
+            daemonized itself
+        """
         logger.debug('Running: %s', ' '.join(command))
-        rc = subprocess.call(command)
-        if rc:  # pragma: no cover
-            logger.debug('The binary redis-server failed to start')
-            logger.debug('Redis Server log:\n%s', self.redis_log)
-            raise RedisLiteException('The binary redis-server failed to start')
-
-        # Wait for Redis to start
-        timeout = True
-        for i in range(0, self.start_timeout * 10):
-            if os.path.exists(self.socket_file):
-                timeout = False
-                break
-            time.sleep(.1)
-        if timeout:  # pragma: no cover
+        if daemonize:
+            rc = subprocess.call(command)
+            if rc:  # pragma: no cover
+                logger.debug('The binary redis-server failed to start')
+                logger.debug('Redis Server log:\n%s', self.redis_log)
+                raise RedisLiteException(
+                    'The binary redis-server failed to start'
+                )
+            return None
+
+        # A new session keeps terminal signals aimed at the python process
+        # from reaching the server, like daemonize does.
+        popen = subprocess.Popen(
+            command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        server_process = _ServerProcess(popen.pid, popen)
+        _server_processes[self.socket_file] = server_process
+        return server_process
+
+    def _clone_template(self, template):
+        """
+        Create the db file for this instance from a template rdb file
+
+        Parameters
+        ----------
+        template : str
+            Path of the redis rdb file to use as the initial dataset
+
+        Raises
+        ------
+        RedisLiteException - The db file already exists
+        """
+        destination = os.path.join(self.dbdir, self.dbfilename)
+        if os.path.exists(destination):
+            raise RedisLiteException(
+                'Unable to create %s from template %s, the db file already '
+                'exists' % (destination, template)
+            )
+        start = time.time()
+        method = _clone_file(template, destination)
+        self.timings['clone'] = time.time() - start
+        logger.debug(
+            'Created db file %s from template %s using %s in %.3f seconds',
+            destination, template, method, self.timings['clone']
+        )
+
+    def _wait_for_socket(self, server_process=None):
+        """
+        Wait for the redis-server to create its unix socket
+
+        The socket is checked with an exponential backoff starting at 1ms, so
+        the wait ends close to the actual server boot time.
+
+        Parameters
+        ----------
+        server_process : _ServerProcess, optional
+            The handle of a supervised redis-server, if the process exits
+            before the socket appears the start fails immediately.
+
+        Raises
+        ------
+        RedisLiteServerStartError - Server start failed or timed out
+        """
+        delay = .001
+        deadline = time.time() + self.start_timeout
+        while not self._socket_ready(server_process, deadline):
+            time.sleep(delay)
+            delay = min(delay * 2, .1)
+
+    def _socket_ready(self, server_process, deadline):
+        """
+        Check if the redis-server has created its unix socket
+
+        Parameters
+        ----------
+        server_process : _ServerProcess or None
+            The handle of a supervised redis-server
+
+        deadline : float
+            The time the server has to be started by
+
+        Returns
+        -------
+        bool
+            True if the socket exists
+
+        Raises
+        ------
+        RedisLiteServerStartError - Server start failed or timed out
+        """
+        if os.path.exists(self.socket_file):
+            return True
+        if server_process and \
+                not server_process.is_running():  # pragma: no cover
+            _server_processes.pop(self.socket_file, None)
             logger.debug('Redis Server log:\n%s', self.redis_log)
             raise RedisLiteServerStartError(
-                'The redis-server process failed to start'
+                'The redis-server process exited with return code '
+                '{0}'.format(server_process.popen.returncode)
             )
-
-        if not os.path.exists(self.socket_file):  # pragma: no cover
+        if time.time() >= deadline:  # pragma: no cover
+            if server_process:
+                _server_processes.pop(self.socket_file, None)
+                server_process.popen.kill()
+                server_process.wait()
             logger.debug('Redis Server log:\n%s', self.redis_log)
-            raise RedisLiteException(
-                'Redis socket file %s is not present' % self.socket_file
+            raise RedisLiteServerStartError(
+                'The redis-server process failed to start'
             )
-
-        self._save_setting_registry()
-        self.running = True
+        return False
 
     def _wait_for_server_start(self):
         """
@@ -247,20 +1125,25 @@ class RedisMixin(object):
         ------
         RedisLiteServerStartError - Server start timed out
         """
-        timeout = True
-        for i in range(0, self.start_timeout * 10):
+        start = time.time()
+        delay = .001
+        deadline = start + self.start_timeout
+        while True:
             try:
                 self.ping()
-                timeout = False
-                break
-            except redis.BusyLoadingError:
+                if self.running:
+                    # The time the server spent loading the db file
+                    self.timings.setdefault('load', time.time() - start)
+                return
+            except (redis.BusyLoadingError, redis.ConnectionError):
                 pass
-            time.sleep(.1)
-        if timeout:  # pragma: no cover
-            raise RedisLiteServerStartError(
-                'The redis-server process failed to start; unreachable after '
-                '{0} seconds'.format(self.start_timeout)
-            )
+            if time.time() >= deadline:  # pragma: no cover
+                raise RedisLiteServerStartError(
+                    'The redis-server process failed to start; unreachable '
+                    'after {0} seconds'.format(self.start_timeout)
+                )
+            time.sleep(delay)
+            delay = min(delay * 2, .1)
 
     def _is_redis_running(self):
         """
@@ -270,27 +1153,7 @@ class RedisMixin(object):
         if not self.settingregistryfile:
             return False
 
-        if os.path.exists(self.settingregistryfile):
-            with open(self.settingregistryfile) as file_handle:
-                settings = json.load(file_handle)
-
-            if not os.path.exists(settings['pidfile']):
-                return False
-
-            with open(settings['pidfile']) as file_handle:
-                pid = file_handle.read().strip()   # NOQA
-                pid = int(pid)
-                if pid:  # pragma: no cover
-                    try:
-                        process = psutil.Process(pid)
-                    except psutil.NoSuchProcess:
-                        return False
-                    if not process.is_running():
-                        return False
-                else:  # pragma: no cover
-                    return False
-            return True
-        return False
+        return _read_setting_registry(self.settingregistryfile) is not None
 
     def _save_setting_registry(self):
         """
@@ -306,6 +1169,7 @@ class RedisMixin(object):
         with open(self.settingregistryfile, 'w') as fh:
             os.fchmod(fh.fileno(), 0o0600)  # Only owner can access
             json.dump(settings, fh)
+        _registry_settings[self.settingregistryfile] = settings
         self.cleanupregistry = True
 
     def _load_setting_registry(self):
@@ -313,64 +1177,37 @@ class RedisMixin(object):
         Load the settings config from a registry file
         :return:
         """
-        with open(self.settingregistryfile) as fh:
-            settings = json.load(fh)
+        settings = _read_setting_registry(self.settingregistryfile)
         logger.debug('loading settings, found: %s', settings)
-        pidfile = settings.get('pidfile', '')
-        if os.path.exists(pidfile):
-            # noinspection PyUnusedLocal
-            pid_number = 0
-            with open(pidfile) as fh:
-                pid_number = int(fh.read())
-            if pid_number:
-                process = psutil.Process(pid_number)
-                if not process.is_running():  # pragma: no cover
-                    logger.warning(
-                        'Loaded registry for non-existent redis-server'
-                    )
-                    return
-        else:  # pragma: no cover
-            logger.warning('No pidfile found')
+        if not settings:  # pragma: no cover
+            logger.warning(
+                'Loaded registry for non-existent redis-server'
+            )
             return
         self.pidfile = settings['pidfile']
         self.socket_file = settings['unixsocket']
         self.dbdir = settings['dbdir']
         self.dbfilename = settings['dbfilename']
 
-    def __init__(self, *args, **kwargs):
+    def _setup_server(self, args, kwargs):
         """
-        Wrapper for redis.Redis that configures a redis instance based on the
-        passed settings.
+        Handle the redislite specific arguments and locate the redis-server
+        to use, preparing the directory for a new server if needed.
 
         Parameters
-        ==========
-        db_filename : str, optional
-            Path to the redis rdb file to back the redis instance, if not
-            specified one will be created inside a temporary directory for
-            the instance.
-
-        serverconfig : dict, optional
-            A dict containing redis server settings.  The key is the setting
-            the value can be a string, list or None.
-
-            If the value is a string it will be used as the value in the redis
-            configuration.
+        ----------
+        args : tuple
+            The positional arguments passed to the class
 
-            If the value is a list the same setting will be repeated multiple
-            times in the redis configuration with each value in order.
+        kwargs : dict
+            The keyword arguments passed to the class
 
-            If the value is None, the setting will be removed from the
-            default configuration if it is set.
+        Returns
+        -------
+        tuple
+            The positional and keyword arguments for the redis bindings and
+            a bool that is True if a new redis-server needs to be started
         """
-        # If the user is specifying settings we can't configure just pass the
-        # request to the redis.Redis module
-        if 'host' in kwargs.keys() or 'port' in kwargs.keys():
-            # noinspection PyArgumentList
-            super(RedisMixin, self).__init__(
-                *args, **kwargs
-            )  # pragma: no cover
-            return
-
         self.socket_file = kwargs.get('unix_socket_path', None)
         if self.socket_file and self.socket_file == os.path.basename(
                 self.socket_file
@@ -391,6 +1228,32 @@ class RedisMixin(object):
             del kwargs['dbfilename']
 
         self.server_config = kwargs.pop('serverconfig', {})
+        self.profile = kwargs.pop('profile', self.profile)
+        if self.profile and self.profile not in configuration.PROFILES:
+            raise RedisLiteException(
+                'Unknown configuration profile {0!r}'.format(self.profile)
+            )
+        self.memory_budget = kwargs.pop('memory_budget', self.memory_budget)
+        if self.memory_budget:
+            try:
+                configuration.memory_settings(self.memory_budget)
+            except ValueError as error:
+                raise RedisLiteException(str(error))
+        self.concurrency = kwargs.pop('concurrency', self.concurrency)
+        if self.concurrency:
+            try:
+                configuration.io_thread_settings(self.concurrency, cpus=1)
+            except ValueError as error:
+                raise RedisLiteException(str(error))
+        server_pool = kwargs.pop('server_pool', self.server_pool)
+        self.shutdown_save = kwargs.pop('shutdown_save', self.shutdown_save)
+        if self.shutdown_save not in [None, 'save', 'bgsave', 'nosave']:
+            raise RedisLiteException(
+                'Invalid shutdown_save setting {0!r}'.format(
+                    self.shutdown_save
+                )
+            )
+        template = kwargs.pop('template', None)
 
         if db_filename and db_filename == os.path.basename(db_filename):
             db_filename = os.path.join(os.getcwd(), db_filename)
@@ -402,15 +1265,31 @@ class RedisMixin(object):
             self.settingregistryfile = repr(os.path.join(
                 self.dbdir, self.dbfilename + '.settings'
             )).strip("'")
+        else:
+            # Keep the db file settings redislite.patch may have set on the
+            # class, so unpatching doesn't change existing instances.
+            self.dbdir = self.dbdir
+            self.dbfilename = self.dbfilename
+            self.settingregistryfile = self.settingregistryfile
 
         logger.debug('Setting up redis with rdb file: %s', self.dbfilename)
         logger.debug('Setting up redis with socket file: %s', self.socket_file)
-        atexit.register(self._cleanup, sys.modules.copy())
+        _instances.add(self)
         if self._is_redis_running() and not self.socket_file:
             self._load_setting_registry()
             logger.debug(
                 'Socket file after registry load: %s', self.socket_file
             )
+            if self.socket_file:
+                self._acquire_server()
+        elif server_pool and not template and not self.dbdir and \
+                not self.socket_file and not self.memory_budget and \
+                not self.concurrency and self._adopt_server(
+                    server_pool.checkout(self.server_config, self.profile)
+                ):
+            logger.debug(
+                'Using pooled redis server on socket: %s', self.socket_file
+            )
         else:
             self._create_redis_directory_tree()
 
@@ -419,20 +1298,216 @@ class RedisMixin(object):
                 self.settingregistryfile = repr(os.path.join(
                     self.dbdir, self.dbfilename + '.settings'
                 )).strip("'")
+            if template:
+                self._clone_template(template)
+            return args, kwargs, True
+        return args, kwargs, False
+
+    def __init__(self, *args, **kwargs):
+        """
+        Wrapper for redis.Redis that configures a redis instance based on the
+        passed settings.
+
+        Parameters
+        ==========
+        db_filename : str, optional
+            Path to the redis rdb file to back the redis instance, if not
+            specified one will be created inside a temporary directory for
+            the instance.
+
+        serverconfig : dict, optional
+            A dict containing redis server settings.  The key is the setting
+            the value can be a string, list or None.
+
+            If the value is a string it will be used as the value in the redis
+            configuration.
+
+            If the value is a list the same setting will be repeated multiple
+            times in the redis configuration with each value in order.
+
+            If the value is None, the setting will be removed from the
+            default configuration if it is set.
+
+        profile : str, optional
+            The name of a workload profile from
+            :data:`redislite.configuration.PROFILES`, 'ephemeral', 'cache',
+            'durable-rdb' or 'durable-aof', that sets the persistence and
+            eviction settings of the redis-server.  The serverconfig settings
+            override the profile.
+
+        memory_budget : int or float, optional
+            The memory the redis-server may use, in bytes or as a fraction of
+            the cgroup or host memory limit.  It is used to set maxmemory,
+            leaving headroom for copy-on-write if the server saves to disk,
+            and an eviction policy if none is configured.
+
+        concurrency : int, optional
+            The number of clients expected to send commands at the same time.
+            It is used to enable the threaded I/O of the redis-server when
+            there are enough clients and cpus, see
+            :func:`redislite.configuration.io_thread_settings`.
+
+        server_pool : redislite.ServerPool, optional
+            A pool of idle servers to take the redis-server from when no
+            db_filename or unix_socket_path is given, defaults to the pool
+            installed with :meth:`redislite.ServerPool.install`.
+
+        template : str, optional
+            Path to a redis rdb file to use as the initial dataset when a new
+            redis-server is started, see :meth:`from_template`.
+
+        shutdown_save : str, optional
+            How the data is saved when the redis-server is shut down, 'save'
+            to save before exiting, 'bgsave' to save with a background save
+            before exiting or 'nosave' to exit without saving.  Defaults to
+            'nosave' if no db_filename is given and 'save' otherwise.
+
+        metrics_interval : float, optional
+            If set, the metrics of the redis-server are sampled in a
+            background thread every metrics_interval seconds, see
+            :meth:`start_metrics`.
+
+        metrics_callback : callable, optional
+            Function called with each metrics snapshot taken by the
+            background thread.
+
+        instrument : bool or list, optional
+            If True, the commands sent by this instance are recorded in the
+            default in-memory sink, see :meth:`instrument`.  A list of sinks
+            to record the commands in can also be passed.
+
+        client_cache : bool or dict, optional
+            If True, the GET, MGET, HGET and HGETALL reads of this instance
+            are cached locally, see :meth:`enable_client_cache`.  A dict with
+            the arguments for :meth:`enable_client_cache` can also be passed.
+
+        shared_pool : bool or dict, optional
+            If True, the instances of this process that connect to the same
+            redis-server with the same connection settings share a connection
+            pool, so they reuse the open connections.  A dict with the
+            max_connections, blocking, timeout and warm (number of
+            connections to open in advance) settings of the shared pool can
+            also be passed, the settings of the first instance are used.
+        """
+        self.timings = {}
+
+        # If the user is specifying settings we can't configure just pass the
+        # request to the redis.Redis module
+        if 'host' in kwargs.keys() or 'port' in kwargs.keys():
+            # noinspection PyArgumentList
+            super(RedisMixin, self).__init__(
+                *args, **kwargs
+            )  # pragma: no cover
+            return
+
+        metrics_interval = kwargs.pop('metrics_interval', None)
+        metrics_callback = kwargs.pop('metrics_callback', None)
+        instrument = kwargs.pop('instrument', None)
+        client_cache = kwargs.pop('client_cache', None)
+        shared_pool = kwargs.pop('shared_pool', self.shared_pool)
+        if shared_pool not in [None, True, False] and \
+                not isinstance(shared_pool, dict):
+            raise RedisLiteException(
+                'Invalid shared_pool setting {0!r}'.format(shared_pool)
+            )
+        args, kwargs, start_server = self._setup_server(args, kwargs)
+        if start_server:
             self._start_redis()
 
         kwargs['unix_socket_path'] = self.socket_file
+        pool_key = None
+        if shared_pool and 'connection_pool' not in kwargs and \
+                not kwargs.get('single_connection_client'):
+            pool_key = _shared_pool_key(kwargs)
+            with _shared_pools_lock:
+                pool = _shared_pools.get(self.socket_file, {}).get(pool_key)
+            if pool:
+                kwargs['connection_pool'] = pool
         # noinspection PyArgumentList
         logger.debug('Calling binding with %s, %s', args, kwargs)
         # noinspection PyArgumentList
         super(RedisMixin, self).__init__(*args, **kwargs)  # pragma: no cover
+        if pool_key:
+            self._attach_shared_pool(
+                pool_key, {} if shared_pool is True else shared_pool
+            )
 
         logger.debug("Pinging the server to ensure we're connected")
         self._wait_for_server_start()
 
+        if metrics_interval or metrics_callback:
+            self.start_metrics(
+                interval=metrics_interval or 10, callback=metrics_callback
+            )
+        if instrument:
+            self.instrument(*([] if instrument is True else instrument))
+        if client_cache:
+            self.enable_client_cache(
+                **({} if client_cache is True else client_cache)
+            )
+
     def __del__(self):
         self._cleanup()  # pragma: no cover
 
+    def _attach_shared_pool(self, pool_key, options):
+        """
+        Use the connection pool shared by the instances of this process that
+        connect to the same redis-server with the same settings, the pool is
+        created from the pool of this instance if there is none yet.
+
+        Parameters
+        ----------
+        pool_key : str
+            The key of the connection settings of this instance
+
+        options : dict
+            The max_connections, blocking, timeout and warm arguments used to
+            create the shared pool
+        """
+        self._shared_pool = True
+        # The pool is disconnected when the redis-server shuts down, not when
+        # an instance using it is closed.
+        self.auto_close_connection_pool = False
+        with _shared_pools_lock:
+            pool = _shared_pools.get(self.socket_file, {}).get(pool_key)
+        if pool is self.connection_pool:
+            return
+        created = _create_shared_pool(self.connection_pool, **options)
+        with _shared_pools_lock:
+            pool = _shared_pools.setdefault(
+                self.socket_file, {}
+            ).setdefault(pool_key, created)
+        if pool is not created:  # pragma: no cover
+            # Another thread created the shared pool first
+            created.disconnect()
+        self.connection_pool = pool
+
+    @classmethod
+    def from_template(cls, template, *args, **kwargs):
+        """
+        Create an instance with a private copy of a template rdb file
+
+        The db file is created in the temporary directory of the instance as
+        a reflink clone or hard link of the template when the filesystem
+        allows it, so many instances can start from the same large dataset
+        without copying it.  The time spent cloning and loading the data is
+        available in the :attr:`timings` attribute.
+
+        Parameters
+        ----------
+        template : str
+            Path to the redis rdb file to use as the initial dataset
+
+        **kwargs : optional
+            All other arguments supported by the class, except for the
+            db filename.
+
+        Returns
+        -------
+        A new instance of the class
+        """
+        return cls(*args, template=template, **kwargs)
+
     def redis_log_tail(self, lines=1, width=80):
         """
         The redis log output
@@ -496,31 +1571,198 @@ class RedisMixin(object):
         """
         return os.path.join(self.dbdir, self.dbfilename)
 
+    @staticmethod
+    def _eviction_stats(info):
+        """
+        Get the eviction statistics from an INFO result
+        """
+        return {
+            key: info.get(key, 0) for key in [
+                'used_memory', 'used_memory_peak', 'maxmemory',
+                'maxmemory_policy', 'evicted_keys', 'expired_keys',
+                'keyspace_hits', 'keyspace_misses'
+            ]
+        }
+
+    def eviction_stats(self):
+        """
+        Get the memory use and eviction counters of the redis-server, for
+        tuning the memory_budget
+
+        Returns
+        -------
+        dict
+            The used_memory, used_memory_peak, maxmemory and maxmemory_policy
+            settings and the evicted_keys, expired_keys, keyspace_hits and
+            keyspace_misses counters from the INFO command
+        """
+        return self._eviction_stats(self.info())
+
+    def start_metrics(
+            self, interval=10, callback=None, latency_threshold=None
+    ):
+        """
+        Sample the metrics of the redis-server in a background thread
+
+        The collector uses its own connection, so it doesn't compete with
+        the commands of this instance.  It is stopped when the instance is
+        cleaned up.
+
+        Parameters
+        ----------
+        interval : float, optional
+            Number of seconds between samples, default=10
+
+        callback : callable, optional
+            Function called with each metrics snapshot
+
+        latency_threshold : int, optional
+            If set, the latency monitor of the redis-server reports events
+            that take longer than this number of milliseconds.
+
+        Returns
+        -------
+        redislite.metrics.MetricsCollector
+            The running collector
+        """
+        self.stop_metrics()
+        self.metrics_collector = MetricsCollector(
+            self.socket_file, pid=self.pid, interval=interval,
+            callback=callback, latency_threshold=latency_threshold,
+            password=self._server_password()
+        )
+        self.metrics_collector.start()
+        return self.metrics_collector
+
+    def stop_metrics(self):
+        """
+        Stop the background metrics collection
+        """
+        if self.metrics_collector:
+            self.metrics_collector.stop()
+            self.metrics_collector = None
+
+    def instrument(self, *sinks):
+        """
+        Record the commands sent by this instance
+
+        The name, round trip time and number of bytes sent and received of
+        each command and pipeline execution are passed to the sinks as
+        :class:`redislite.instrumentation.CommandEvent()` tuples.  Instances
+        that are not instrumented don't have any overhead.
+
+        Parameters
+        ----------
+        *sinks : optional
+            The sinks to record the commands in, objects with a record(event)
+            method like :class:`redislite.instrumentation.MemorySink()` and
+            :class:`redislite.instrumentation.LoggingSink()`.  Defaults to
+            :data:`redislite.instrumentation.default_sink`, which can be
+            queried with :func:`redislite.debug.command_stats`.
+
+        Returns
+        -------
+        redislite.instrumentation.Instrumentation
+            The instrumentation of this instance
+        """
+        self.instrumentation = Instrumentation(sinks or [default_sink])
+        self._install_command_hooks()
+        return self.instrumentation
+
+    def uninstrument(self):
+        """
+        Stop recording the commands sent by this instance
+        """
+        if self.instrumentation:
+            self.instrumentation = None
+            self._install_command_hooks()
+
+    def _install_command_hooks(self):
+        """
+        Wrap the execute_command and pipeline methods of this instance with
+        the enabled client cache and instrumentation hooks
+        """
+        for name in ['execute_command', 'pipeline']:
+            self.__dict__.pop(name, None)
+        if self.client_cache:
+            self.client_cache.install_hooks(self)
+        if self.instrumentation:
+            self.instrumentation.install(self)
+
+    def enable_client_cache(self, **kwargs):
+        """
+        Cache the GET, MGET, HGET and HGETALL reads of this instance locally
+
+        The redis-server tracks the keys read through the cache and sends an
+        invalidation when one of them is changed by any client, so the cache
+        stays consistent.  The hits and misses are available from
+        client_cache.stats().
+
+        Parameters
+        ----------
+        **kwargs : optional
+            The max_entries, max_bytes, ttl, bcast and prefixes arguments of
+            :class:`redislite.cache.ClientCache()`
+
+        Returns
+        -------
+        redislite.cache.ClientCache
+            The cache of this instance
+        """
+        self.disable_client_cache()
+        self.client_cache = ClientCache(**kwargs)
+        self.client_cache.install(self)
+        self._install_command_hooks()
+        return self.client_cache
+
+    def disable_client_cache(self):
+        """
+        Stop caching the reads of this instance
+        """
+        if self.client_cache:
+            self.client_cache.uninstall()
+            self.client_cache = None
+            self._install_command_hooks()
+
+    def metrics(self):
+        """
+        Get the metrics of the redis-server
+
+        Returns
+        -------
+        dict
+            The most recent snapshot of the background collector, or a new
+            snapshot if no collector is running or it hasn't taken one yet,
+            see :meth:`redislite.metrics.MetricsCollector.sample`
+        """
+        if self.metrics_collector and self.metrics_collector.snapshot:
+            return self.metrics_collector.snapshot
+        collector = MetricsCollector(
+            self.socket_file, pid=self.pid, password=self._server_password()
+        )
+        try:
+            return collector.sample()
+        finally:
+            collector.stop()
+
     @property
     def pid(self):
         """
         Get the current redis-server process id.
 
+        The process id is looked up once, after that a handle to the process
+        is used to check that it is still running.
+
         Returns:
             pid(int):
                 The process id of the redis-server process associated with this
                 redislite instance or None.  If the redis-server is not
                 running.
         """
-        if self.pidfile and os.path.exists(self.pidfile):
-            with open(self.pidfile) as file_handle:
-                pid = int(file_handle.read().strip())
-                if pid:  # pragma: no cover
-                    try:
-                        process = psutil.Process(pid)
-                    except psutil.NoSuchProcess:
-                        return 0
-                    if not process.is_running():
-                        return 0
-                else:  # pragma: no cover
-                    return 0
-            return int(pid)
-        return 0  # pragma: no cover
+        server_process = _get_server_process(self.socket_file, self.pidfile)
+        if server_process:
+            return server_process.pid
+        return 0
 
 
 class BaseRedis(redis.Redis):
@@ -554,6 +1796,20 @@ class Redis(RedisMixin, BaseRedis):
         instance so both instances share the same redis-server process
         and don't corrupt the db file.
 
+    template : str, optional
+
+        The name of a Redis rdb file to use as the initial dataset of a new
+        embedded redis server, see :meth:`from_template`.
+
+    shutdown_save : str, optional
+
+        How the data is saved when the embedded redis server is shut down.
+
+        'save' saves the db file before the server exits, 'bgsave' saves it
+        with a background save first and 'nosave' exits without saving.  The
+        default is 'nosave' if no dbfilename was given, since the temporary
+        db file is deleted with the server, and 'save' otherwise.
+
     serverconfig : dict, optional
 
         A dictionary of additional redis-server configuration settings.
@@ -569,6 +1825,52 @@ class Redis(RedisMixin, BaseRedis):
         If the value is None, the setting will be removed from the default
         setting values if it exists in the defaults.
 
+    profile : str, optional
+
+        The name of a workload profile that sets the persistence, fsync, lazy
+        freeing and eviction settings of the embedded redis server together.
+
+        'ephemeral' and 'cache' disable snapshots and the append only file,
+        'cache' also evicts the least recently used keys when maxmemory is
+        set.  'durable-rdb' saves periodic snapshots and 'durable-aof' logs
+        every write to an append only file synced every second.
+
+        Settings in serverconfig override the profile settings.
+
+    memory_budget : int or float, optional
+
+        The amount of memory the embedded redis server may use.  An int is a
+        number of bytes, a float between 0 and 1 is a fraction of the memory
+        limit of the container (cgroup) or host.
+
+        The budget sets the maxmemory setting, less headroom for the
+        copy-on-write memory used while snapshots are written, and the
+        allkeys-lfu eviction policy unless the profile or serverconfig set a
+        policy.  Use :meth:`eviction_stats` to see how often keys are evicted.
+
+    concurrency : int, optional
+
+        The number of clients expected to send commands to the embedded redis
+        server at the same time.
+
+        When the clients and the cpus of the container (cgroup cpu quota) or
+        host allow it, the io-threads setting is raised so socket reads and
+        writes are spread over several threads.  An io-threads setting in
+        serverconfig overrides it.
+
+    shared_pool : bool or dict, optional
+
+        Share a connection pool with the other instances of this process that
+        use the same redis server and connection settings.
+
+        Instances created for every request then reuse the open connections
+        of the earlier instances instead of connecting again.  A dict sets up
+        the pool when the first instance creates it, 'max_connections' limits
+        the number of connections, 'blocking' makes clients wait up to
+        'timeout' seconds for a free connection instead of raising an error
+        when the limit is reached and 'warm' opens a number of connections in
+        advance.  The pool is disconnected when the server shuts down.
+
     host : str, optional
 
         The hostname or ip address of the redis server to connect to.
@@ -630,6 +1932,13 @@ class Redis(RedisMixin, BaseRedis):
     start_timeout : float
         Number of seconds to wait for the redis-server process to start
         before generating a RedisLiteServerStartError exception.
+
+    timings : dict
+        Number of seconds spent in each step of starting and stopping the
+        embedded redis-server, keyed by step name.  The steps are 'clone' for
+        creating the db file from a template, 'spawn' for starting the
+        process, 'load' for loading the db file and 'shutdown' for shutting
+        the server down.
     """
     pass
 
@@ -0,0 +1,254 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite local cluster
+
+This module contains the :class:`Cluster()` class, a
+:class:`redis.cluster.RedisCluster` client for a redis cluster of embedded
+redis servers.  The servers are started in parallel with redislite, the hash
+slots are spread evenly over them and the nodes are joined into a cluster, so
+the writes to different keys can use several cores.
+
+Example:
+  Start a cluster of 3 servers that saves its data in /tmp/cluster::
+
+      >>> import redislite
+      >>> cluster = redislite.Cluster(nodes=3, dbdir='/tmp/cluster')
+      >>> cluster.set('key', 'value')
+      True
+      >>> cluster.close()
+"""
+import concurrent.futures
+import logging
+import os
+import random
+import socket
+import time
+from redis.cluster import RedisCluster, REDIS_CLUSTER_HASH_SLOTS
+from .client import (
+    BaseRedis, RedisMixin, RedisLiteException, RedisLiteServerStartError
+)
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+class _ClusterNodeRedis(RedisMixin, BaseRedis):
+    """
+    Redislite class used to start the cluster nodes, it doesn't pick up the
+    db file settings :mod:`redislite.patch` sets on :class:`redislite.Redis`.
+    """
+    pass
+
+
+# The cluster bus of a node listens on its port plus this offset
+CLUSTER_BUS_PORT_OFFSET = 10000
+
+
+def _free_port():
+    """
+    Get a tcp port on the loopback interface that is not in use and whose
+    cluster bus port is not in use either
+    """
+    while True:
+        port = random.randint(20000, 65535 - CLUSTER_BUS_PORT_OFFSET)
+        try:
+            for candidate in [port, port + CLUSTER_BUS_PORT_OFFSET]:
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                    sock.bind(('127.0.0.1', candidate))
+        except OSError:  # pragma: no cover
+            continue
+        return port
+
+
+def _cluster_info(node):
+    """
+    Get the CLUSTER INFO of a node as a dict
+    """
+    return node.execute_command('CLUSTER INFO')
+
+
+def _slot_ranges(count):
+    """
+    Split the hash slots into count ranges of about the same size
+
+    Returns
+    -------
+    list
+        A (first slot, last slot) tuple for each range
+    """
+    size, extra = divmod(REDIS_CLUSTER_HASH_SLOTS, count)
+    ranges = []
+    first = 0
+    for index in range(count):
+        last = first + size + (1 if index < extra else 0) - 1
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+class Cluster(RedisCluster):
+    """
+    A redis cluster client for a cluster of embedded redis servers
+
+    Each node is a redislite server with cluster mode enabled that listens on
+    a port of the loopback interface, since the cluster bus and the cluster
+    clients connect to the nodes over tcp.  The servers are shut down when
+    the client is closed.
+
+    Parameters
+    ----------
+    nodes : int, optional
+        Number of cluster nodes to start, default=3
+
+    dbdir : str, optional
+        Directory the nodes save their db files and cluster configuration
+        in.  A cluster started again with the same directory keeps its data
+        and slot assignment.  By default the nodes don't save their data.
+
+    serverconfig : dict, optional
+        Additional redis server settings for the nodes
+
+    profile : str, optional
+        The configuration profile of the nodes
+
+    memory_budget : int or float, optional
+        The memory budget of each node
+
+    concurrency : int, optional
+        The number of clients expected to use each node at the same time
+
+    cluster_timeout : float, optional
+        Number of seconds to wait for the cluster to be ready, default=30
+
+    **kwargs : optional
+        Passed to :class:`redis.cluster.RedisCluster`
+
+    Attributes
+    ----------
+    servers : list
+        The redislite instances of the cluster nodes
+    """
+    servers = []
+
+    def __init__(self, nodes=3, dbdir=None, **kwargs):
+        if nodes < 1:
+            raise RedisLiteException(
+                'A cluster needs at least one node, not {0}'.format(nodes)
+            )
+        node_kwargs = {
+            key: kwargs.pop(key) for key in [
+                'profile', 'memory_budget', 'concurrency', 'shutdown_save'
+            ] if key in kwargs
+        }
+        serverconfig = kwargs.pop('serverconfig', None) or {}
+        cluster_timeout = kwargs.pop('cluster_timeout', 30)
+        if dbdir:
+            dbdir = os.path.abspath(dbdir)
+            if not os.path.isdir(dbdir):
+                os.makedirs(dbdir)
+
+        def start_node(index):
+            config = {
+                'bind': '127.0.0.1',
+                'port': str(_free_port()),
+                'cluster-enabled': 'yes',
+                'cluster-config-file': 'node-{0}.conf'.format(index),
+                'cluster-node-timeout': '5000',
+            }
+            config.update(serverconfig)
+            if dbdir:
+                return _ClusterNodeRedis(
+                    os.path.join(dbdir, 'node-{0}.db'.format(index)),
+                    serverconfig=config, **node_kwargs
+                )
+            return _ClusterNodeRedis(serverconfig=config, **node_kwargs)
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=nodes, thread_name_prefix='redislite-cluster'
+        ) as executor:
+            futures = [
+                executor.submit(start_node, index) for index in range(nodes)
+            ]
+        self.servers = [
+            future.result() for future in futures if not future.exception()
+        ]
+        try:
+            if len(self.servers) < nodes:
+                # Raise the error of the first node that failed to start
+                for future in futures:
+                    future.result()
+            ports = [
+                int(server.config_get('port')['port'])
+                for server in self.servers
+            ]
+            self._create(ports, cluster_timeout)
+            super(Cluster, self).__init__(
+                host='127.0.0.1', port=ports[0], **kwargs
+            )
+        except Exception:
+            self._shutdown_servers()
+            raise
+
+    def _create(self, ports, timeout):
+        """
+        Assign the hash slots to the nodes unless they already have them,
+        join the nodes into a cluster and wait until it is ready
+        """
+        servers = self.servers
+        if not any(
+                int(_cluster_info(server)['cluster_slots_assigned'])
+                for server in servers
+        ):
+            for epoch, (server, (first, last)) in enumerate(zip(
+                    servers, _slot_ranges(len(servers))
+            )):
+                # Distinct config epochs avoid the collision handling when
+                # the nodes meet
+                server.execute_command('CLUSTER SET-CONFIG-EPOCH', epoch + 1)
+                server.execute_command(
+                    'CLUSTER ADDSLOTS', *range(first, last + 1)
+                )
+        # Meeting the nodes again also tells a restarted cluster the new
+        # ports of its nodes
+        for port in ports[1:]:
+            servers[0].execute_command('CLUSTER MEET', '127.0.0.1', port)
+
+        deadline = time.time() + timeout
+        for server in servers:
+            while True:
+                info = _cluster_info(server)
+                if info['cluster_state'] == 'ok' and \
+                        int(info['cluster_known_nodes']) == len(servers):
+                    break
+                if time.time() > deadline:
+                    raise RedisLiteServerStartError(
+                        'The cluster was not ready in {0} seconds, the '
+                        'state of {1} is {2}'.format(
+                            timeout, server.db, info['cluster_state']
+                        )
+                    )
+                time.sleep(.05)
+        logger.debug('Cluster of %d nodes is ready', len(servers))
+
+    def _shutdown_servers(self):
+        """
+        Shut down the redis servers of the cluster nodes
+        """
+        servers, self.servers = self.servers, []
+        for server in servers:
+            server._cleanup()
+
+    def close(self):
+        """
+        Close the connections and shut down the cluster nodes
+        """
+        super(Cluster, self).close()
+        self._shutdown_servers()
+
+    def _cleanup(self):
+        """
+        Shut down the cluster nodes, like :class:`redislite.Redis` instances
+        """
+        self.close()
@@ -6,6 +6,8 @@ This module contains functions to generate a redis configuration from a
 configuration template.
 """
 import logging
+import os
+import psutil
 from copy import copy
 
 
@@ -61,12 +63,302 @@ DEFAULT_REDIS_SETTINGS = {
 }
 
 
-def settings(**kwargs):
+# Settings for common workloads that are applied on top of the defaults.  Each
+# profile sets the persistence, fsync, lazy freeing and eviction settings
+# together.
+PROFILES = {
+    # Data that is thrown away with the server, nothing is written to disk
+    'ephemeral': {
+        'save': '""',
+        'appendonly': 'no',
+        'lazyfree-lazy-eviction': 'yes',
+        'lazyfree-lazy-expire': 'yes',
+        'lazyfree-lazy-server-del': 'yes',
+        'maxmemory-policy': 'noeviction',
+    },
+    # Data that can be recreated, nothing is written to disk and the least
+    # recently used keys are evicted when maxmemory is set
+    'cache': {
+        'save': '""',
+        'appendonly': 'no',
+        'lazyfree-lazy-eviction': 'yes',
+        'lazyfree-lazy-expire': 'yes',
+        'lazyfree-lazy-server-del': 'yes',
+        'maxmemory-policy': 'allkeys-lru',
+    },
+    # Data is saved with periodic snapshots
+    'durable-rdb': {
+        'save': ['900 1', '300 100', '60 200', '15 1000'],
+        'appendonly': 'no',
+        'stop-writes-on-bgsave-error': 'yes',
+        'lazyfree-lazy-eviction': 'no',
+        'lazyfree-lazy-expire': 'yes',
+        'lazyfree-lazy-server-del': 'yes',
+        'maxmemory-policy': 'noeviction',
+    },
+    # Every write is logged to an append only file that is synced once a
+    # second, snapshots are only taken when the file is rewritten
+    'durable-aof': {
+        'save': '""',
+        'appendonly': 'yes',
+        'appendfsync': 'everysec',
+        'aof-use-rdb-preamble': 'yes',
+        'no-appendfsync-on-rewrite': 'no',
+        'lazyfree-lazy-eviction': 'no',
+        'lazyfree-lazy-expire': 'yes',
+        'lazyfree-lazy-server-del': 'yes',
+        'maxmemory-policy': 'noeviction',
+    },
+}
+
+
+# Part of a memory budget that is not given to redis as maxmemory when the
+# server forks to write snapshots or rewrite the append only file, pages
+# changed while the child process runs are copied.
+COPY_ON_WRITE_HEADROOM = .25
+
+# Eviction policy used with a memory budget if none is configured
+DEFAULT_MAXMEMORY_POLICY = 'allkeys-lfu'
+
+
+def _cgroup_memory_files():
+    """
+    Return the cgroup memory limit files that may apply to this process, the
+    most specific first.
+    """
+    filenames = []
+    try:
+        with open('/proc/self/cgroup') as file_handle:
+            lines = file_handle.read().splitlines()
+    except OSError:  # pragma: no cover
+        lines = []
+    for line in lines:
+        _, controllers, path = line.split(':', 2)
+        path = path.lstrip('/')
+        if not controllers:
+            # cgroup v2
+            filenames += [
+                os.path.join('/sys/fs/cgroup', path, 'memory.max'),
+                '/sys/fs/cgroup/memory.max',
+            ]
+        elif 'memory' in controllers.split(','):
+            # cgroup v1
+            filenames += [
+                os.path.join(
+                    '/sys/fs/cgroup/memory', path, 'memory.limit_in_bytes'
+                ),
+                '/sys/fs/cgroup/memory/memory.limit_in_bytes',
+            ]
+    return filenames
+
+
+def memory_limit():
+    """
+    Get the amount of memory available to this process
+
+    Returns
+    -------
+    int
+        The memory limit of the process's cgroup in bytes, or the host memory
+        if it is lower or there is no cgroup limit.
+    """
+    limit = psutil.virtual_memory().total
+    for filename in _cgroup_memory_files():
+        try:
+            with open(filename) as file_handle:
+                value = file_handle.read().strip()
+        except OSError:
+            continue
+        if value.isdigit():
+            limit = min(limit, int(value))
+        break
+    return limit
+
+
+def memory_settings(memory_budget, current_settings=None):
+    """
+    Get the maxmemory settings for a memory budget
+
+    Parameters
+    ----------
+    memory_budget : int or float
+        The memory budget of the redis server.  An int is a number of bytes,
+        a float between 0 and 1 is a fraction of the memory limit of the
+        process, see :func:`memory_limit`.
+
+    current_settings : dict, optional
+        The other settings of the redis server.  If the server writes
+        snapshots or an append only file, COPY_ON_WRITE_HEADROOM of the budget
+        is left for copy-on-write during the saves.  A configured
+        maxmemory-policy is kept.
+
+    Returns
+    -------
+    dict
+        The maxmemory and maxmemory-policy settings
+
+    Raises
+    ------
+    ValueError - The memory budget is not valid
+    """
+    current_settings = current_settings or {}
+    if isinstance(memory_budget, float):
+        if not 0 < memory_budget <= 1:
+            raise ValueError(
+                'A fractional memory budget must be between 0 and 1, '
+                'got {0!r}'.format(memory_budget)
+            )
+        memory_budget = int(memory_limit() * memory_budget)
+    if isinstance(memory_budget, bool) or \
+            not isinstance(memory_budget, int) or memory_budget <= 0:
+        raise ValueError(
+            'Invalid memory budget {0!r}'.format(memory_budget)
+        )
+
+    save = current_settings.get('save')
+    if (save and save != '""') or current_settings.get('appendonly') == 'yes':
+        memory_budget = int(memory_budget * (1 - COPY_ON_WRITE_HEADROOM))
+
+    return {
+        'maxmemory': str(memory_budget),
+        'maxmemory-policy': current_settings.get(
+            'maxmemory-policy', DEFAULT_MAXMEMORY_POLICY
+        ),
+    }
+
+
+# Threaded I/O only pays off with enough concurrently active clients per I/O
+# thread, and redis gains little from more than 8 I/O threads.
+CLIENTS_PER_IO_THREAD = 4
+MAX_IO_THREADS = 8
+
+
+def _cgroup_cpu_files():
+    """
+    Return the cgroup cpu quota files that may apply to this process, the
+    most specific first, as (quota filename, period filename) tuples.  With
+    cgroup v2 both values are in the same file.
+    """
+    filenames = []
+    try:
+        with open('/proc/self/cgroup') as file_handle:
+            lines = file_handle.read().splitlines()
+    except OSError:  # pragma: no cover
+        lines = []
+    for line in lines:
+        _, controllers, path = line.split(':', 2)
+        path = path.lstrip('/')
+        if not controllers:
+            # cgroup v2
+            for directory in [os.path.join('/sys/fs/cgroup', path),
+                              '/sys/fs/cgroup']:
+                filename = os.path.join(directory, 'cpu.max')
+                filenames.append((filename, filename))
+        elif 'cpu' in controllers.split(','):
+            # cgroup v1
+            for directory in [
+                os.path.join('/sys/fs/cgroup/cpu', path), '/sys/fs/cgroup/cpu'
+            ]:
+                filenames.append((
+                    os.path.join(directory, 'cpu.cfs_quota_us'),
+                    os.path.join(directory, 'cpu.cfs_period_us'),
+                ))
+    return filenames
+
+
+def cpu_limit():
+    """
+    Get the number of cpus available to this process
+
+    Returns
+    -------
+    float
+        The cpu quota of the process's cgroup, or the number of cpus in the
+        process's affinity mask if it is lower or there is no cgroup quota.
+    """
+    try:
+        limit = float(len(os.sched_getaffinity(0)))
+    except AttributeError:  # pragma: no cover
+        limit = float(psutil.cpu_count() or 1)
+    for quota_filename, period_filename in _cgroup_cpu_files():
+        try:
+            with open(quota_filename) as file_handle:
+                values = file_handle.read().split()
+            if quota_filename != period_filename:
+                with open(period_filename) as file_handle:
+                    values += file_handle.read().split()
+        except OSError:
+            continue
+        if len(values) == 2 and values[0].isdigit() and values[1].isdigit() \
+                and int(values[1]):
+            limit = min(limit, int(values[0]) / int(values[1]))
+        break
+    return limit
+
+
+def io_thread_settings(concurrency, cpus=None):
+    """
+    Get the io-threads settings for the expected number of concurrent clients
+
+    Redis uses one I/O thread, its main thread, by default.  Additional I/O
+    threads only help when the main thread is busy with socket I/O for many
+    concurrently active clients and there are cores to spare, so one cpu is
+    left for the main thread and each I/O thread needs
+    CLIENTS_PER_IO_THREAD clients.
+
+    Parameters
+    ----------
+    concurrency : int
+        The number of clients expected to send commands at the same time
+
+    cpus : float, optional
+        The number of cpus available, default is the detected
+        :func:`cpu_limit`
+
+    Returns
+    -------
+    dict
+        The io-threads and io-threads-do-reads settings
+
+    Raises
+    ------
+    ValueError - The concurrency is not valid
+    """
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or \
+            concurrency <= 0:
+        raise ValueError('Invalid concurrency {0!r}'.format(concurrency))
+    if cpus is None:
+        cpus = cpu_limit()
+    threads = max(min(
+        int(cpus) - 1, concurrency // CLIENTS_PER_IO_THREAD, MAX_IO_THREADS
+    ), 1)
+    return {
+        'io-threads': str(threads),
+        'io-threads-do-reads': 'yes' if threads > 1 else 'no',
+    }
+
+
+def settings(profile=None, memory_budget=None, concurrency=None,
+             **kwargs):
     """
     Get config settings based on the defaults and the arguments passed
 
     Parameters
     ----------
+    profile : str, optional
+        The name of a workload profile from PROFILES to apply on top of the
+        default settings.  The other arguments override the profile settings.
+
+    memory_budget : int or float, optional
+        The memory budget of the redis server in bytes or as a fraction of
+        the memory limit, used to set maxmemory, see :func:`memory_settings`.
+        A maxmemory in the other arguments overrides it.
+
+    concurrency : int, optional
+        The number of clients expected to send commands at the same time,
+        used to set io-threads, see :func:`io_thread_settings`.  An io-threads
+        setting in the other arguments overrides it.
+
     **kwargs
         Redis server arguments, the keyword is the setting, the value is the
         value.
@@ -83,6 +375,18 @@ def settings(**kwargs):
         the setting will be repeated with each specified value.
     """
     new_settings = copy(DEFAULT_REDIS_SETTINGS)
+    if profile:
+        if profile not in PROFILES:
+            raise ValueError(
+                'Unknown configuration profile {0!r}'.format(profile)
+            )
+        new_settings.update(PROFILES[profile])
+    if memory_budget:
+        new_settings.update(
+            memory_settings(memory_budget, dict(new_settings, **kwargs))
+        )
+    if concurrency:
+        new_settings.update(io_thread_settings(concurrency))
     new_settings.update(kwargs)
 
     return new_settings
@@ -112,17 +416,34 @@ def config_line(setting, value):
     return '{setting} {value}'.format(setting=setting, value=value)
 
 
-def config(**kwargs):
+def config(profile=None, memory_budget=None, concurrency=None, **kwargs):
     """
     Generate a redis configuration file based on the passed arguments
 
+    Parameters
+    ----------
+    profile : str, optional
+        The name of a workload profile from PROFILES to use
+
+    memory_budget : int or float, optional
+        The memory budget of the redis server, see :func:`settings`
+
+    concurrency : int, optional
+        The expected number of concurrent clients, see :func:`settings`
+
+    **kwargs
+        Redis server arguments, see :func:`settings`
+
     Returns
     -------
     str
         Redis server configuration
     """
     # Get our settings
-    config_dict = settings(**kwargs)
+    config_dict = settings(
+        profile=profile, memory_budget=memory_budget,
+        concurrency=concurrency, **kwargs
+    )
     config_dict['dir'] = config_dict['dbdir']
     del config_dict['dbdir']
 
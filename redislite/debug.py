@@ -43,6 +43,10 @@ This will output information like the following::
 
 When run from the command line this will print a dump of information about
 the module and it's build information.
+
+The commands recorded by instrumented redislite instances, see
+:meth:`redislite.Redis.instrument`, can be shown with
+:func:`print_command_stats`.
 """
 from __future__ import print_function
 from distutils.spawn import find_executable
@@ -50,6 +54,7 @@ import os
 from .__init__ import __version__, __git_version__, __source_url__, \
     __git_hash__, __git_origin__, __git_branch__, __redis_server_info__, \
     __redis_executable__
+from . import instrumentation
 
 
 def debug_info_list():
@@ -100,5 +105,72 @@ def print_debug_info():
     print(debug_info())
 
 
+def command_stats(sink=None):
+    """
+    Return the commands recorded by instrumented redislite instances
+
+    Parameters
+    ----------
+    sink : redislite.instrumentation.MemorySink, optional
+        The sink to query, default is the default in-memory sink
+
+    Returns
+    -------
+    dict
+        The aggregate of the sink, see
+        :meth:`redislite.instrumentation.MemorySink.stats`
+    """
+    return (sink or instrumentation.default_sink).stats()
+
+
+def command_stats_list(sink=None):
+    """
+    Return a list of lines with the commands recorded by instrumented
+    redislite instances, the commands using the most time first
+    :return:
+    """
+    stats = command_stats(sink)
+    info = [
+        '%-16s %6s %7s %10s %10s %8s %8s %8s' % (
+            'Command', 'Calls', 'Errors', 'Sent', 'Received', 'p50 ms',
+            'p99 ms', 'max ms'
+        )
+    ]
+    commands = sorted(
+        stats['commands'].items(),
+        key=lambda item: item[1]['latency']['mean'] * item[1]['calls'],
+        reverse=True
+    )
+    for name, command in commands:
+        if not command['calls']:
+            # Only executed in pipelines
+            continue
+        latency = command['latency']
+        info.append('%-16s %6d %7d %10d %10d %8.3f %8.3f %8.3f' % (
+            name, command['calls'], command['errors'], command['bytes_sent'],
+            command['bytes_received'], latency['p50'] / 1000.0,
+            latency['p99'] / 1000.0, latency['max'] / 1000.0
+        ))
+    batch_sizes = stats['pipeline_batch_sizes']
+    if batch_sizes['count']:
+        info.append('')
+        info.append(
+            'Pipeline batch sizes: mean %.1f, p50 %d, p99 %d, max %d' % (
+                batch_sizes['mean'], batch_sizes['p50'], batch_sizes['p99'],
+                batch_sizes['max']
+            )
+        )
+    return info
+
+
+def print_command_stats(sink=None):
+    """
+    Display the commands recorded by instrumented redislite instances on
+    stdout.
+    :return:
+    """
+    print(os.linesep.join(command_stats_list(sink)))
+
+
 if __name__ == '__main__':  # pragma: no cover
     print_debug_info()
@@ -0,0 +1,359 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite keyspace export
+
+This module contains functions that export the keys of a redis server with
+their type, time to live and value as JSON lines or CSV rows.
+
+The keys are found with SCAN, the TYPE and PTTL commands for each batch of
+keys are pipelined and then the values are fetched with one pipelined command
+per key chosen by its type.  The batches are fetched in parallel on several
+connections while the scan continues, and the rows are generated as the
+batches complete so only a few batches are held in memory at any time.
+
+This module can be run from the command line to export a redislite db file,
+using the running redis-server for the db file if there is one::
+
+    $ python -m redislite.export /tmp/redis.db --type hash --pattern 'user:*'
+    {"key": "user:1", "type": "hash", "pttl": null, "value": {"name": "a"}}
+    ...
+"""
+from __future__ import print_function
+import argparse
+import concurrent.futures
+import csv
+import json
+import logging
+import sys
+from .client import Redis
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+# The columns of the exported rows
+FIELDS = ['key', 'type', 'pttl', 'value']
+
+# The command used to fetch the value of each type of key
+VALUE_COMMANDS = {
+    'string': lambda pipe, key: pipe.get(key),
+    'list': lambda pipe, key: pipe.lrange(key, 0, -1),
+    'set': lambda pipe, key: pipe.smembers(key),
+    'hash': lambda pipe, key: pipe.hgetall(key),
+    'zset': lambda pipe, key: pipe.zrange(key, 0, -1, withscores=True),
+    'stream': lambda pipe, key: pipe.xrange(key),
+}
+
+
+def _text(value):
+    """
+    Return a server response as a str, bytes that are not utf-8 are kept as
+    backslash escapes
+    """
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'backslashreplace')
+    return value
+
+
+def _value(key_type, value):
+    """
+    Convert the value of a key into json serializable types
+    """
+    if key_type == 'string':
+        return _text(value)
+    if key_type == 'list':
+        return [_text(item) for item in value]
+    if key_type == 'set':
+        return sorted(_text(item) for item in value)
+    if key_type == 'hash':
+        return {_text(field): _text(item) for field, item in value.items()}
+    if key_type == 'zset':
+        return [[_text(member), score] for member, score in value]
+    return [
+        [_text(entry_id), _value('hash', fields)] for entry_id, fields in value
+    ]
+
+
+def _fetch_batch(connection, keys, types=None):
+    """
+    Get the type, time to live and value of a batch of keys
+
+    Returns
+    -------
+    list
+        A row dict for each key that still exists and has one of the types
+    """
+    pipe = connection.pipeline(transaction=False)
+    for key in keys:
+        pipe.type(key)
+        pipe.pttl(key)
+    results = pipe.execute(raise_on_error=False)
+
+    fetched = []
+    for index, key in enumerate(keys):
+        key_type, pttl = results[index * 2:index * 2 + 2]
+        key_type = _text(key_type)
+        if key_type not in VALUE_COMMANDS or (types and key_type not in types):
+            # Deleted after it was scanned, filtered out or a module type
+            continue
+        VALUE_COMMANDS[key_type](pipe, key)
+        fetched.append((key, key_type, pttl if pttl >= 0 else None))
+
+    rows = []
+    for (key, key_type, pttl), value in zip(
+            fetched, pipe.execute(raise_on_error=False)
+    ):
+        if isinstance(value, Exception) or value is None or (
+                key_type != 'string' and not value
+        ):
+            # Replaced or deleted after its type was read, an empty string is
+            # a value but redis deletes the collections that become empty
+            continue
+        rows.append({
+            'key': _text(key),
+            'type': key_type,
+            'pttl': pttl,
+            'value': _value(key_type, value),
+        })
+    return rows
+
+
+def iter_rows(
+        connection, pattern=None, types=None, batch_size=1000, workers=4
+):
+    """
+    Generate a row for each key of a redis server
+
+    Parameters
+    ----------
+    connection : redis.Redis
+        Connection to the redis server, its connection pool is used for the
+        parallel connections.
+
+    pattern : str, optional
+        Only export the keys matching this glob-style pattern
+
+    types : list, optional
+        Only export the keys of these types, for example ['hash', 'zset']
+
+    batch_size : int, optional
+        Number of keys to request with each SCAN command and to fetch in one
+        pipeline, default=1000
+
+    workers : int, optional
+        Number of batches to fetch in parallel, default=4
+
+    Yields
+    ------
+    dict
+        The key, type, pttl (milliseconds to live, None if the key does not
+        expire) and value of each key.  The values are str for strings, lists
+        for lists, sorted lists for sets, dicts for hashes, lists of
+        [member, score] for sorted sets and lists of [id, fields] for streams.
+    """
+    types = set(types or [])
+    scan_type = list(types)[0] if len(types) == 1 else None
+    pending = set()
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='redislite-export'
+    ) as executor:
+        cursor = 0
+        while True:
+            cursor, keys = connection.scan(
+                cursor=cursor, match=pattern, count=batch_size,
+                _type=scan_type
+            )
+            if keys:
+                pending.add(
+                    executor.submit(_fetch_batch, connection, keys, types)
+                )
+            if len(pending) >= workers * 2:
+                # Limit the number of batches held in memory
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    for row in future.result():
+                        yield row
+            if not int(cursor):
+                break
+        for future in concurrent.futures.as_completed(pending):
+            for row in future.result():
+                yield row
+
+
+def write_jsonl(rows, output):
+    """
+    Write rows as JSON lines
+
+    Parameters
+    ----------
+    rows : iterable
+        The rows, see :func:`iter_rows`
+
+    output : file
+        The text file to write to
+
+    Returns
+    -------
+    int
+        The number of rows written
+    """
+    count = 0
+    for row in rows:
+        output.write(json.dumps(row) + '\n')
+        count += 1
+    return count
+
+
+def write_csv(rows, output):
+    """
+    Write rows as CSV with a header, the values other than strings are
+    written as JSON
+
+    Parameters
+    ----------
+    rows : iterable
+        The rows, see :func:`iter_rows`
+
+    output : file
+        The text file to write to, opened with newline=''
+
+    Returns
+    -------
+    int
+        The number of rows written
+    """
+    writer = csv.writer(output)
+    writer.writerow(FIELDS)
+    count = 0
+    for row in rows:
+        value = row['value']
+        writer.writerow([
+            row['key'], row['type'], '' if row['pttl'] is None else row['pttl'],
+            value if row['type'] == 'string' else json.dumps(value)
+        ])
+        count += 1
+    return count
+
+
+WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+}
+
+
+def export(connection, output, output_format='jsonl', **kwargs):
+    """
+    Export the keys of a redis server
+
+    Parameters
+    ----------
+    connection : redis.Redis
+        Connection to the redis server
+
+    output : file
+        The text file to write to
+
+    output_format : str, optional
+        'jsonl' or 'csv', default='jsonl'
+
+    **kwargs : optional
+        The pattern, types, batch_size and workers passed to
+        :func:`iter_rows`
+
+    Returns
+    -------
+    int
+        The number of keys exported
+    """
+    if output_format not in WRITERS:
+        raise ValueError('Unknown export format %r' % output_format)
+    return WRITERS[output_format](iter_rows(connection, **kwargs), output)
+
+
+def export_db(dbfilename, output, **kwargs):
+    """
+    Export the keys in a redislite db file
+
+    The redis-server already running for the db file is used if there is one,
+    otherwise one is started and shut down afterwards without saving.
+
+    Parameters
+    ----------
+    dbfilename : str
+        The redislite db file
+
+    output : file
+        The text file to write to
+
+    **kwargs : optional
+        Passed to :func:`export`
+
+    Returns
+    -------
+    int
+        The number of keys exported
+    """
+    connection = Redis(dbfilename)
+    if connection.running:
+        # Don't rewrite the db file with the server started for the export
+        connection.shutdown_save = 'nosave'
+    try:
+        return export(connection, output, **kwargs)
+    finally:
+        connection._cleanup()
+
+
+def main(args=None):
+    """
+    Export the db file given on the command line
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m redislite.export',
+        description='Export the keys in a redislite db file'
+    )
+    parser.add_argument('dbfilename', help='The redislite db file')
+    parser.add_argument(
+        '--output', default=None,
+        help='The file to write to, default is to write to stdout'
+    )
+    parser.add_argument(
+        '--format', dest='output_format', choices=sorted(WRITERS),
+        default='jsonl', help='The output format'
+    )
+    parser.add_argument(
+        '--pattern', default=None,
+        help='Only export the keys matching this glob-style pattern'
+    )
+    parser.add_argument(
+        '--type', dest='types', action='append',
+        choices=sorted(VALUE_COMMANDS),
+        help='Only export the keys of this type, can be repeated'
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=1000,
+        help='Number of keys to fetch in each pipeline'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help='Number of batches to fetch in parallel'
+    )
+    options = parser.parse_args(args)
+    kwargs = dict(
+        output_format=options.output_format, pattern=options.pattern,
+        types=options.types, batch_size=options.batch_size,
+        workers=options.workers
+    )
+    if options.output is None:
+        count = export_db(options.dbfilename, sys.stdout, **kwargs)
+    else:
+        with open(options.output, 'w', newline='') as output:
+            count = export_db(options.dbfilename, output, **kwargs)
+    logger.debug('Exported %d keys', count)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,363 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite Prometheus exporter
+
+This module renders the metrics of the redis-servers used by the redislite
+instances of this process in the Prometheus text format, and can serve them
+on a local HTTP endpoint.  The instances are found automatically, so every
+embedded server is exported without any wiring.
+
+Example:
+  Serve the metrics on http://127.0.0.1:9121/metrics::
+
+      >>> import redislite
+      >>> import redislite.exporter
+      >>> connection = redislite.Redis()
+      >>> server = redislite.exporter.start_http_server(9121)
+      >>> print(redislite.exporter.render())
+      # HELP redislite_up 1 if the redis-server answered the scrape
+      # TYPE redislite_up gauge
+      redislite_up{socket="/tmp/tmpzhq8g4wn/redis.socket"} 1
+      ...
+      >>> server.shutdown()
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import psutil
+import redis
+import threading
+from . import client
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+# The content type of the Prometheus text format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# The exported INFO fields, the metric name, type, help text and a function
+# converting the INFO value to the metric value
+INFO_METRICS = [
+    (
+        'used_memory', 'redislite_memory_used_bytes', 'gauge',
+        'Memory allocated by the redis-server', None
+    ),
+    (
+        'used_memory_rss', 'redislite_memory_rss_bytes', 'gauge',
+        'Resident memory of the redis-server as reported by the server', None
+    ),
+    (
+        'used_memory_peak', 'redislite_memory_peak_bytes', 'gauge',
+        'Peak memory allocated by the redis-server', None
+    ),
+    (
+        'maxmemory', 'redislite_memory_max_bytes', 'gauge',
+        'The maxmemory setting, 0 if unlimited', None
+    ),
+    (
+        'mem_fragmentation_ratio', 'redislite_memory_fragmentation_ratio',
+        'gauge', 'Ratio of the resident to the allocated memory', None
+    ),
+    (
+        'instantaneous_ops_per_sec', 'redislite_ops_per_second', 'gauge',
+        'Commands processed per second', None
+    ),
+    (
+        'total_commands_processed', 'redislite_commands_processed_total',
+        'counter', 'Commands processed by the redis-server', None
+    ),
+    (
+        'connected_clients', 'redislite_connected_clients', 'gauge',
+        'Client connections to the redis-server', None
+    ),
+    (
+        'evicted_keys', 'redislite_evicted_keys_total', 'counter',
+        'Keys evicted because of the maxmemory limit', None
+    ),
+    (
+        'expired_keys', 'redislite_expired_keys_total', 'counter',
+        'Keys removed because they expired', None
+    ),
+    (
+        'keyspace_hits', 'redislite_keyspace_hits_total', 'counter',
+        'Key lookups that found the key', None
+    ),
+    (
+        'keyspace_misses', 'redislite_keyspace_misses_total', 'counter',
+        'Key lookups that did not find the key', None
+    ),
+    (
+        'latest_fork_usec', 'redislite_latest_fork_seconds', 'gauge',
+        'Duration of the latest fork for a save or rewrite',
+        lambda value: value / 1000000.0
+    ),
+    (
+        'rdb_changes_since_last_save', 'redislite_rdb_changes_since_last_save',
+        'gauge', 'Changes not yet saved to the rdb file', None
+    ),
+    (
+        'rdb_bgsave_in_progress', 'redislite_rdb_bgsave_in_progress', 'gauge',
+        '1 if a background save is running', None
+    ),
+    (
+        'rdb_last_save_time', 'redislite_rdb_last_save_timestamp_seconds',
+        'gauge', 'Time of the last successful save', None
+    ),
+    (
+        'rdb_last_bgsave_status', 'redislite_rdb_last_bgsave_ok', 'gauge',
+        '1 if the last background save succeeded',
+        lambda value: int(value == 'ok')
+    ),
+    (
+        'aof_enabled', 'redislite_aof_enabled', 'gauge',
+        '1 if the append only file is enabled', None
+    ),
+    (
+        'aof_rewrite_in_progress', 'redislite_aof_rewrite_in_progress',
+        'gauge', '1 if an append only file rewrite is running', None
+    ),
+    (
+        'aof_last_bgrewrite_status', 'redislite_aof_last_bgrewrite_ok',
+        'gauge', '1 if the last append only file rewrite succeeded',
+        lambda value: int(value == 'ok')
+    ),
+]
+
+
+def _escape(value):
+    """
+    Escape a label value
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n'
+    )
+
+
+def _labels(labels):
+    """
+    Format the labels of a sample
+    """
+    return '{%s}' % ','.join(
+        '%s="%s"' % (name, _escape(value)) for name, value in labels
+    )
+
+
+def _servers(instances=None):
+    """
+    Get the redis-servers used by redislite instances
+
+    Returns
+    -------
+    dict
+        The pid and password of each running redis-server, keyed by socket
+        file
+    """
+    if instances is None:
+        instances = list(client._instances)
+    servers = {}
+    for instance in instances:
+        socket_file = getattr(instance, 'socket_file', None)
+        if not socket_file or socket_file in servers:
+            continue
+        pid = instance.pid if instance.pidfile else 0
+        if pid:
+            servers[socket_file] = (pid, instance._server_password())
+    return servers
+
+
+def _timings(instances=None):
+    """
+    Get the startup and shutdown durations recorded by redislite instances
+
+    Returns
+    -------
+    list
+        A (socket_file, phase, seconds) tuple for each recorded duration
+    """
+    if instances is None:
+        instances = list(client._instances)
+    timings = {}
+    for instance in instances:
+        socket_file = getattr(instance, 'socket_file', None)
+        if not socket_file:
+            # The socket_file is cleared when the server is shut down, the
+            # connection pool still knows it.
+            pool = getattr(instance, 'connection_pool', None)
+            socket_file = getattr(pool, 'connection_kwargs', {}).get('path')
+        for phase, seconds in getattr(instance, 'timings', {}).items():
+            if socket_file:
+                timings[(socket_file, phase)] = seconds
+    return [
+        (socket_file, phase, seconds)
+        for (socket_file, phase), seconds in sorted(timings.items())
+    ]
+
+
+def _scrape(socket_file, pid, timeout=5, password=None):
+    """
+    Get the INFO and the process statistics of a redis-server
+
+    Returns
+    -------
+    tuple
+        The INFO dict, or None if the server didn't answer, and a dict with
+        the rss and num_fds of the process
+    """
+    connection = redis.Redis(
+        unix_socket_path=socket_file, socket_timeout=timeout,
+        password=password
+    )
+    try:
+        info = connection.info()
+    except redis.RedisError as error:
+        logger.debug('Scraping %s failed: %s', socket_file, error)
+        info = None
+    finally:
+        connection.close()
+
+    process = {}
+    try:
+        server_process = psutil.Process(pid)
+        with server_process.oneshot():
+            process['rss'] = server_process.memory_info().rss
+            process['num_fds'] = server_process.num_fds()
+            process['cpu_seconds'] = sum(server_process.cpu_times()[:2])
+    except psutil.Error:  # pragma: no cover
+        pass
+    return info, process
+
+
+def render(instances=None, timeout=5):
+    """
+    Render the metrics of the redis-servers in the Prometheus text format
+
+    Parameters
+    ----------
+    instances : list, optional
+        The redislite instances to export, default is all the instances of
+        this process
+
+    timeout : float, optional
+        Number of seconds to wait for each redis-server to answer, default=5
+
+    Returns
+    -------
+    str
+        The metrics
+    """
+    samples = {}
+
+    def add(name, labels, value):
+        samples.setdefault(name, []).append((labels, value))
+
+    for socket_file, (pid, password) in sorted(
+            _servers(instances).items()
+    ):
+        labels = [('socket', socket_file)]
+        info, process = _scrape(
+            socket_file, pid, timeout=timeout, password=password
+        )
+        add('redislite_up', labels, int(info is not None))
+        for field, name, _, _, convert in INFO_METRICS:
+            if info and field in info:
+                add(
+                    name, labels,
+                    convert(info[field]) if convert else info[field]
+                )
+        if 'rss' in process:
+            add('redislite_process_resident_memory_bytes', labels,
+                process['rss'])
+            add('redislite_process_open_fds', labels, process['num_fds'])
+            add('redislite_process_cpu_seconds_total', labels,
+                process['cpu_seconds'])
+
+    for socket_file, phase, seconds in _timings(instances):
+        add(
+            'redislite_server_duration_seconds',
+            [('socket', socket_file), ('phase', phase)], seconds
+        )
+
+    metrics = [
+        ('redislite_up', 'gauge', '1 if the redis-server answered the scrape')
+    ]
+    metrics += [(name, kind, text) for _, name, kind, text, _ in INFO_METRICS]
+    metrics += [
+        (
+            'redislite_process_resident_memory_bytes', 'gauge',
+            'Resident memory of the redis-server process'
+        ),
+        (
+            'redislite_process_open_fds', 'gauge',
+            'Open file descriptors of the redis-server process'
+        ),
+        (
+            'redislite_process_cpu_seconds_total', 'counter',
+            'User and system cpu time of the redis-server process'
+        ),
+        (
+            'redislite_server_duration_seconds', 'gauge',
+            'Durations of the last startup and shutdown phases of the '
+            'redis-server'
+        ),
+    ]
+    lines = []
+    for name, kind, text in metrics:
+        if name not in samples:
+            continue
+        lines.append('# HELP %s %s' % (name, text))
+        lines.append('# TYPE %s %s' % (name, kind))
+        for labels, value in samples[name]:
+            lines.append('%s%s %s' % (name, _labels(labels), value))
+    return ''.join(line + '\n' for line in lines)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    HTTP request handler serving the metrics on the /metrics path
+    """
+    def do_GET(self):  # pylint: disable=C0103
+        """
+        Serve the metrics
+        """
+        if self.path.split('?')[0] not in ['/', '/metrics']:
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        logger.debug(format, *args)
+
+
+def start_http_server(port, address='127.0.0.1'):
+    """
+    Serve the metrics on a local HTTP endpoint in a background thread
+
+    Parameters
+    ----------
+    port : int
+        The port to listen on, 0 to use a free port
+
+    address : str, optional
+        The address to listen on, default='127.0.0.1'
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer
+        The running server, its server_address attribute holds the address
+        and port, call its shutdown() method to stop it
+    """
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name='redislite-exporter', daemon=True
+    )
+    thread.start()
+    logger.debug('Serving metrics on %s:%d', *server.server_address[:2])
+    return server
@@ -0,0 +1,460 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite client instrumentation
+
+This module contains the classes that record the commands a redislite
+instance sends to its redis-server, how long each round trip takes and how
+many bytes are sent and received.  Instrumentation is opt-in, instances that
+are not instrumented run the unmodified redis module code.
+
+Each command, or each pipeline execution, is passed to the sinks of the
+instance as a :class:`CommandEvent()`.  A sink is any object with a
+``record(event)`` method, :class:`MemorySink()` aggregates the events into
+per command counters and latency histograms and :class:`LoggingSink()` logs
+them.
+
+Example:
+  Record the commands of an instance in the default in-memory sink and
+  show the aggregate::
+
+      >>> import redislite
+      >>> import redislite.debug
+      >>> connection = redislite.Redis(instrument=True)
+      >>> connection.set('key', 'value')
+      True
+      >>> redislite.debug.print_command_stats()
+      Command          Calls  Errors   Sent  Received   p50 ms   p99 ms   max ms
+      SET                  1       0     12         1    0.031    0.031    0.031
+"""
+import collections
+import inspect
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+# Number of bits of the recorded values kept by the histogram buckets, the
+# buckets are at most 1/2**(_SUB_BUCKET_BITS - 1) of their value wide.
+_SUB_BUCKET_BITS = 5
+_SUB_BUCKETS = 1 << (_SUB_BUCKET_BITS - 1)
+
+
+CommandEvent = collections.namedtuple(
+    'CommandEvent', [
+        'command', 'duration', 'bytes_sent', 'bytes_received', 'error',
+        'batch_size', 'commands'
+    ]
+)
+CommandEvent.__doc__ = """
+A command sent to the redis-server
+
+Attributes
+----------
+command : str
+    The command name, 'PIPELINE' for the execution of a pipeline
+
+duration : float
+    The round trip time in seconds
+
+bytes_sent : int
+    The size of the command arguments
+
+bytes_received : int
+    The size of the strings and integers in the response
+
+error : Exception or None
+    The exception raised by the command
+
+batch_size : int or None
+    The number of commands executed by a pipeline
+
+commands : tuple or None
+    The names of the commands executed by a pipeline
+"""
+
+
+class LatencyHistogram(object):
+    """
+    Histogram of latencies in microseconds
+
+    Values are counted in log-linear buckets like the HdrHistogram, so the
+    percentiles are accurate to a few percent over any range of values while
+    the memory used only depends on the number of distinct magnitudes.
+    """
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def _index(value):
+        """
+        Get the bucket of a value
+        """
+        if value < _SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - _SUB_BUCKET_BITS
+        return _SUB_BUCKETS * (shift + 1) + (value >> shift) - _SUB_BUCKETS
+
+    @staticmethod
+    def _highest_value(index):
+        """
+        Get the highest value counted in a bucket
+        """
+        if index < _SUB_BUCKETS:
+            return index
+        shift = index // _SUB_BUCKETS - 1
+        return (((index % _SUB_BUCKETS) + _SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, value):
+        """
+        Count a value
+
+        Parameters
+        ----------
+        value : int
+            The value in microseconds
+        """
+        value = max(int(value), 0)
+        self.buckets[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percentile):
+        """
+        Get a percentile of the values
+
+        Parameters
+        ----------
+        percentile : float
+            The percentile, between 0 and 100
+
+        Returns
+        -------
+        int
+            The highest value of the bucket holding the percentile, 0 if no
+            values were counted
+        """
+        if not self.count:
+            return 0
+        wanted = max(percentile / 100.0 * self.count, 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= wanted:
+                return min(self._highest_value(index), self.max)
+        return self.max  # pragma: no cover
+
+    def to_dict(self):
+        """
+        Get a summary of the histogram
+
+        Returns
+        -------
+        dict
+            The count, min, max, mean and the 50th, 90th, 99th and 99.9th
+            percentiles, in microseconds
+        """
+        return {
+            'count': self.count,
+            'min': self.min or 0,
+            'max': self.max or 0,
+            'mean': self.total / self.count if self.count else 0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+        }
+
+
+class MemorySink(object):
+    """
+    Aggregate the command events in memory
+
+    The aggregate is kept per command name, the commands executed in
+    pipelines are counted as pipelined, their latency is recorded for the
+    whole pipeline under the 'PIPELINE' name.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._commands = {}
+        self.batch_sizes = LatencyHistogram()
+
+    def _command(self, name):
+        """
+        Get the aggregate of a command
+        """
+        if name not in self._commands:
+            self._commands[name] = {
+                'calls': 0, 'errors': 0, 'pipelined': 0, 'bytes_sent': 0,
+                'bytes_received': 0, 'latency': LatencyHistogram()
+            }
+        return self._commands[name]
+
+    def record(self, event):
+        """
+        Add a command event to the aggregate
+
+        Parameters
+        ----------
+        event : CommandEvent
+            The command event
+        """
+        with self._lock:
+            stats = self._command(event.command)
+            stats['calls'] += 1
+            stats['bytes_sent'] += event.bytes_sent
+            stats['bytes_received'] += event.bytes_received
+            stats['latency'].record(event.duration * 1000000)
+            if event.error is not None:
+                stats['errors'] += 1
+            if event.batch_size is not None:
+                self.batch_sizes.record(event.batch_size)
+                for name in event.commands:
+                    self._command(name)['pipelined'] += 1
+
+    def stats(self):
+        """
+        Get the aggregate
+
+        Returns
+        -------
+        dict
+            The calls, errors, pipelined calls, bytes_sent, bytes_received and
+            latency histogram summary in microseconds of each command name,
+            and the histogram summary of the pipeline batch sizes under the
+            'pipeline_batch_sizes' key
+        """
+        with self._lock:
+            commands = {}
+            for name, stats in self._commands.items():
+                commands[name] = dict(
+                    stats, latency=stats['latency'].to_dict()
+                )
+            return {
+                'commands': commands,
+                'pipeline_batch_sizes': self.batch_sizes.to_dict(),
+            }
+
+    def reset(self):
+        """
+        Clear the aggregate
+        """
+        with self._lock:
+            self._commands = {}
+            self.batch_sizes = LatencyHistogram()
+
+
+class LoggingSink(object):
+    """
+    Log the command events
+
+    Parameters
+    ----------
+    log : logging.Logger, optional
+        The logger to use, default is the logger of this module
+
+    level : int, optional
+        The log level, default=logging.DEBUG
+    """
+    def __init__(self, log=None, level=logging.DEBUG):
+        self.log = log or logger
+        self.level = level
+
+    def record(self, event):
+        """
+        Log a command event
+
+        Parameters
+        ----------
+        event : CommandEvent
+            The command event
+        """
+        if not self.log.isEnabledFor(self.level):
+            return
+        if event.batch_size is None:
+            name = event.command
+        else:
+            name = '%s of %d commands' % (event.command, event.batch_size)
+        self.log.log(
+            self.level, '%s: %.3f ms, %d bytes sent, %d bytes received%s',
+            name, event.duration * 1000, event.bytes_sent,
+            event.bytes_received,
+            '' if event.error is None else ', error %r' % event.error
+        )
+
+
+# The sink used by instances created with instrument=True
+default_sink = MemorySink()
+
+
+def _command_name(args):
+    """
+    Get the command name from the arguments of a command
+    """
+    name = args[0] if args else ''
+    if isinstance(name, bytes):
+        name = name.decode('utf-8', 'replace')
+    return str(name).upper()
+
+
+def _size(value):
+    """
+    Get the approximate number of bytes of a command argument or response
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8', 'replace'))
+    if isinstance(value, (list, tuple, set)):
+        return sum(_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_size(key) + _size(item) for key, item in value.items())
+    if value is None or isinstance(value, Exception):
+        return 0
+    return len(str(value))
+
+
+class Instrumentation(object):
+    """
+    Record the commands of a redis client in sinks
+
+    Parameters
+    ----------
+    sinks : list
+        The sinks to pass the command events to
+    """
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def emit(self, event):
+        """
+        Pass a command event to the sinks, errors in sinks are logged
+        """
+        for sink in self.sinks:
+            try:
+                sink.record(event)
+            except Exception:  # pragma: no cover
+                logger.exception('Instrumentation sink %r failed', sink)
+
+    def _command_event(self, args, start, response, error):
+        """
+        Emit the event for a command
+        """
+        self.emit(CommandEvent(
+            _command_name(args), time.perf_counter() - start, _size(args),
+            _size(response), error, None, None
+        ))
+
+    def _pipeline_event(self, stack, start, response, error):
+        """
+        Emit the event for a pipeline execution
+        """
+        self.emit(CommandEvent(
+            'PIPELINE', time.perf_counter() - start,
+            sum(_size(args) for args, _ in stack), _size(response), error,
+            len(stack), tuple(_command_name(args) for args, _ in stack)
+        ))
+
+    def _wrap_execute_command(self, execute_command):
+        """
+        Wrap the execute_command method of a client
+        """
+        if inspect.iscoroutinefunction(execute_command):
+            async def instrumented(*args, **options):
+                start = time.perf_counter()
+                try:
+                    response = await execute_command(*args, **options)
+                except Exception as error:
+                    self._command_event(args, start, None, error)
+                    raise
+                self._command_event(args, start, response, None)
+                return response
+        else:
+            def instrumented(*args, **options):
+                start = time.perf_counter()
+                try:
+                    response = execute_command(*args, **options)
+                except Exception as error:
+                    self._command_event(args, start, None, error)
+                    raise
+                self._command_event(args, start, response, None)
+                return response
+        return instrumented
+
+    def _wrap_pipeline_execute(self, pipe):
+        """
+        Wrap the execute method of a pipeline
+        """
+        execute = pipe.execute
+        if inspect.iscoroutinefunction(execute):
+            async def instrumented(*args, **kwargs):
+                stack = list(pipe.command_stack)
+                start = time.perf_counter()
+                try:
+                    response = await execute(*args, **kwargs)
+                except Exception as error:
+                    self._pipeline_event(stack, start, None, error)
+                    raise
+                self._pipeline_event(stack, start, response, None)
+                return response
+        else:
+            def instrumented(*args, **kwargs):
+                stack = list(pipe.command_stack)
+                start = time.perf_counter()
+                try:
+                    response = execute(*args, **kwargs)
+                except Exception as error:
+                    self._pipeline_event(stack, start, None, error)
+                    raise
+                self._pipeline_event(stack, start, response, None)
+                return response
+        pipe.execute = instrumented
+        return pipe
+
+    def install(self, client):
+        """
+        Instrument a redis client
+
+        The execute_command and pipeline methods of the client instance are
+        replaced, other instances of the class are not affected.
+
+        Parameters
+        ----------
+        client : redis.Redis or redis.asyncio.Redis
+            The client to instrument
+        """
+        # The current methods are wrapped, so the instrumentation can be
+        # combined with other wrappers like the client cache.
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        def instrumented_pipeline(*args, **kwargs):
+            return self._wrap_pipeline_execute(pipeline(*args, **kwargs))
+
+        client.execute_command = self._wrap_execute_command(execute_command)
+        client.pipeline = instrumented_pipeline
+
+    @staticmethod
+    def uninstall(client):
+        """
+        Remove the instrumentation from a redis client
+
+        Parameters
+        ----------
+        client : redis.Redis or redis.asyncio.Redis
+            The instrumented client
+        """
+        for name in ['execute_command', 'pipeline']:
+            client.__dict__.pop(name, None)
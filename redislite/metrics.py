@@ -0,0 +1,244 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite server metrics
+
+This module contains the :class:`MetricsCollector()` class, which samples the
+statistics, latency events and slow log of an embedded redis server and the
+resource use of the redis-server process, optionally in a background thread.
+
+Example:
+  Sample the metrics of a redislite instance every 10 seconds and log them::
+
+      >>> import logging
+      >>> import redislite
+      >>> connection = redislite.Redis(
+      ...     metrics_interval=10, metrics_callback=logging.info
+      ... )
+      >>> connection.metrics()['info']['used_memory']
+      873104
+"""
+import logging
+import psutil
+import redis
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+# The INFO fields included in the metrics
+INFO_FIELDS = [
+    'instantaneous_ops_per_sec', 'total_commands_processed',
+    'connected_clients', 'used_memory', 'used_memory_rss', 'used_memory_peak',
+    'mem_fragmentation_ratio', 'maxmemory', 'evicted_keys', 'expired_keys',
+    'keyspace_hits', 'keyspace_misses', 'latest_fork_usec',
+    'rdb_changes_since_last_save', 'rdb_bgsave_in_progress',
+    'rdb_last_bgsave_status', 'rdb_last_save_time', 'aof_enabled',
+    'aof_rewrite_in_progress', 'aof_last_bgrewrite_status',
+]
+
+
+class MetricsCollector(object):
+    """
+    Sample the metrics of a redis server
+
+    Parameters
+    ----------
+    socket_file : str
+        The unix socket of the redis-server
+
+    pid : int, optional
+        The process id of the redis-server, used to sample its cpu, memory and
+        file descriptor use
+
+    interval : float, optional
+        Number of seconds between the samples taken by the background thread,
+        default=10
+
+    callback : callable, optional
+        Function called with each metrics snapshot taken by the background
+        thread
+
+    latency_threshold : int, optional
+        If set, the latency-monitor-threshold of the server is set to this
+        number of milliseconds, so events that take longer are reported.
+
+    slowlog_entries : int, optional
+        Maximum number of new slow log entries included in a snapshot,
+        default=128
+
+    password : str, optional
+        The password of the redis-server, if it requires one
+
+    Attributes
+    ----------
+    snapshot : dict
+        The most recent metrics snapshot, None until the first sample
+    """
+    def __init__(
+            self, socket_file, pid=None, interval=10, callback=None,
+            latency_threshold=None, slowlog_entries=128, password=None
+    ):
+        self.interval = interval
+        self.callback = callback
+        self.slowlog_entries = slowlog_entries
+        self.snapshot = None
+        self.connection = redis.Redis(
+            unix_socket_path=socket_file, password=password
+        )
+        self.process = None
+        if pid:
+            try:
+                self.process = psutil.Process(pid)
+                # The first call starts the cpu measurement
+                self.process.cpu_percent()
+            except psutil.NoSuchProcess:  # pragma: no cover
+                pass
+        if latency_threshold is not None:
+            self.connection.config_set(
+                'latency-monitor-threshold', latency_threshold
+            )
+        self._previous_time = time.time()
+        self._previous_commandstats = {}
+        self._slowlog_id = -1
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _commandstats(self):
+        """
+        Get the number of calls and time spent per command since the previous
+        sample
+        """
+        current = {}
+        for name, stats in self.connection.info('commandstats').items():
+            current[name.replace('cmdstat_', '', 1)] = stats
+        deltas = {}
+        for name, stats in current.items():
+            previous = self._previous_commandstats.get(name, {})
+            calls = stats.get('calls', 0) - previous.get('calls', 0)
+            if calls <= 0:
+                continue
+            usec = stats.get('usec', 0) - previous.get('usec', 0)
+            deltas[name] = {
+                'calls': calls, 'usec': usec, 'usec_per_call': usec / calls
+            }
+        self._previous_commandstats = current
+        return deltas
+
+    def _latency(self):
+        """
+        Get the latest latency monitor events
+        """
+        return [
+            {
+                'event': event.decode() if isinstance(event, bytes) else event,
+                'time': timestamp,
+                'latest_ms': latest,
+                'max_ms': maximum,
+            }
+            for event, timestamp, latest, maximum in
+            self.connection.execute_command('LATENCY', 'LATEST')
+        ]
+
+    def _slowlog(self):
+        """
+        Get the slow log entries added since the previous sample
+        """
+        entries = [
+            entry for entry in self.connection.slowlog_get(
+                self.slowlog_entries
+            ) if entry['id'] > self._slowlog_id
+        ]
+        if entries:
+            self._slowlog_id = max(entry['id'] for entry in entries)
+        return entries
+
+    def _process(self):
+        """
+        Get the resource use of the redis-server process
+        """
+        if not self.process:
+            return {}
+        try:
+            with self.process.oneshot():
+                return {
+                    'cpu_percent': self.process.cpu_percent(),
+                    'rss': self.process.memory_info().rss,
+                    'num_fds': self.process.num_fds(),
+                }
+        except psutil.Error:  # pragma: no cover
+            return {}
+
+    def sample(self):
+        """
+        Take a metrics snapshot
+
+        Returns
+        -------
+        dict
+            The time of the snapshot, the interval in seconds since the
+            previous one, the INFO fields in INFO_FIELDS, the calls and usec
+            per command since the previous snapshot, the latest latency events,
+            the new slow log entries and the cpu_percent, rss and num_fds of
+            the redis-server process.
+        """
+        with self._lock:
+            now = time.time()
+            info = self.connection.info()
+            snapshot = {
+                'time': now,
+                'interval': now - self._previous_time,
+                'info': {
+                    field: info[field] for field in INFO_FIELDS
+                    if field in info
+                },
+                'commandstats': self._commandstats(),
+                'latency': self._latency(),
+                'slowlog': self._slowlog(),
+                'process': self._process(),
+            }
+            self._previous_time = now
+            self.snapshot = snapshot
+        return snapshot
+
+    def _run(self):
+        """
+        Take a snapshot every interval until stopped
+        """
+        while not self._stop.wait(self.interval):
+            try:
+                snapshot = self.sample()
+            except redis.ConnectionError:  # pragma: no cover
+                logger.debug('Redis server gone, stopping metrics collection')
+                return
+            if self.callback:
+                try:
+                    self.callback(snapshot)
+                except Exception:  # pragma: no cover
+                    logger.exception('Metrics callback failed')
+
+    def start(self):
+        """
+        Start taking snapshots in a background thread
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='redislite-metrics', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and close the connection
+        """
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.connection.close()
@@ -20,6 +20,15 @@ Redis_Patched = False
 StrictRedis_Patched = False
 
 
+def _reset_dbfile(cls):
+    """
+    Remove the db file settings a patch function set on a redislite class
+    """
+    for attribute in ['dbdir', 'dbfilename', 'settingregistryfile']:
+        if attribute in vars(cls):
+            delattr(cls, attribute)
+
+
 def patch_redis_Redis(dbfile=None):
     """
     This class patches the redis module to replace the :class:`redis.Redis()`
@@ -87,6 +96,7 @@ def unpatch_redis_Redis():
     if original_classes['Redis']:    # pragma: no cover
         redis.Redis = original_classes['Redis']
         original_classes['Redis'] = None
+    _reset_dbfile(Redis)
     Redis_Patched = False
 
 
@@ -158,6 +168,7 @@ def unpatch_redis_StrictRedis():
     if original_classes['StrictRedis']:   # pragma: no cover
         redis.StrictRedis = original_classes['StrictRedis']
         original_classes['StrictRedis'] = None
+    _reset_dbfile(StrictRedis)
     StrictRedis_Patched = False
 
 
@@ -0,0 +1,201 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite server pool
+
+This module contains the :class:`ServerPool()` class, which keeps a number of
+idle embedded redis servers started and ready to use.  Redislite instances
+created without a db file take their server from the pool instead of starting
+a new one, and the pool starts replacements in the background.
+
+Example:
+  Create a pool with 4 idle servers and have all anonymous redislite
+  instances use it::
+
+      >>> import redislite
+      >>> pool = redislite.ServerPool(size=4)
+      >>> pool.install()
+      >>> connection = redislite.Redis()
+"""
+import collections
+import concurrent.futures
+import logging
+import threading
+from .client import BaseRedis, RedisMixin
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+class _PooledRedis(RedisMixin, BaseRedis):
+    """
+    Redislite class used to start the pooled servers, it doesn't pick up the
+    db file settings :mod:`redislite.patch` sets on :class:`redislite.Redis`.
+    """
+    pass
+
+
+class ServerPool(object):
+    """
+    A pool of idle embedded redis servers that are started in parallel in the
+    background.
+
+    Parameters
+    ----------
+    size : int, optional
+        Number of idle servers to keep running, default=4
+
+    serverconfig : dict, optional
+        The redis server settings used for the pooled servers.  Only redislite
+        instances created with the same serverconfig will use the pool.
+
+    profile : str, optional
+        The configuration profile used for the pooled servers.  Only redislite
+        instances created with the same profile will use the pool.
+
+    Attributes
+    ----------
+    size : int
+        Number of idle servers the pool keeps running
+
+    serverconfig : dict
+        The redis server settings used for the pooled servers
+
+    profile : str
+        The configuration profile used for the pooled servers
+    """
+    def __init__(self, size=4, serverconfig=None, profile=None):
+        self.size = size
+        self.serverconfig = serverconfig or {}
+        self.profile = profile
+        self.closed = False
+        self._idle = collections.deque()
+        self._pending = 0
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix='redislite-pool'
+        )
+        self._fill()
+
+    def __len__(self):
+        return len(self._idle)
+
+    def _fill(self):
+        """
+        Start enough servers in the background to bring the pool to its size
+        """
+        with self._lock:
+            if self.closed:
+                return
+            needed = self.size - len(self._idle) - self._pending
+            self._pending += max(needed, 0)
+        for _ in range(needed):
+            future = self._executor.submit(self._start_server)
+            with self._lock:
+                self._futures.add(future)
+            future.add_done_callback(self._forget)
+
+    def _forget(self, future):
+        """
+        Stop tracking a finished server start
+        """
+        with self._lock:
+            self._futures.discard(future)
+
+    def _start_server(self):
+        """
+        Start a server and add it to the idle servers
+        """
+        try:
+            server = _PooledRedis(
+                serverconfig=self.serverconfig, profile=self.profile,
+                server_pool=None
+            )
+        except Exception:  # pragma: no cover
+            logger.exception('Unable to start a pooled redis server')
+            with self._lock:
+                self._pending -= 1
+            return
+        with self._lock:
+            self._pending -= 1
+            if not self.closed:
+                self._idle.append(server)
+                return
+        server._cleanup()  # pragma: no cover
+
+    def checkout(self, serverconfig=None, profile=None):
+        """
+        Take an idle server from the pool
+
+        Parameters
+        ----------
+        serverconfig : dict, optional
+            The server settings the caller needs, no server is returned if
+            they differ from the settings of the pool.
+
+        profile : str, optional
+            The configuration profile the caller needs, no server is returned
+            if it differs from the profile of the pool.
+
+        Returns
+        -------
+        redislite.client.RedisMixin or None
+            The redislite instance that started the idle server, or None if
+            no matching server is ready.
+        """
+        if (serverconfig or {}) != self.serverconfig or \
+                profile != self.profile:
+            return None
+        with self._lock:
+            server = self._idle.popleft() if self._idle else None
+        self._fill()
+        if server:
+            # Make sure a server that was touched while idle is handed out
+            # empty.
+            server.flushall()
+        return server
+
+    def wait(self, timeout=None):
+        """
+        Wait until all the servers the pool is starting are running
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum number of seconds to wait
+
+        Returns
+        -------
+        bool
+            True if the pool is full
+        """
+        with self._lock:
+            futures = list(self._futures)
+        _, not_done = concurrent.futures.wait(futures, timeout)
+        return not not_done and len(self._idle) >= self.size
+
+    def install(self):
+        """
+        Make this pool the default pool for all redislite instances
+        """
+        RedisMixin.server_pool = self
+
+    def uninstall(self):
+        """
+        Stop using this pool as the default pool for redislite instances
+        """
+        if RedisMixin.server_pool is self:
+            RedisMixin.server_pool = None
+
+    def close(self):
+        """
+        Stop refilling the pool and shut down all the idle servers
+        """
+        self.uninstall()
+        with self._lock:
+            self.closed = True
+        self._executor.shutdown(wait=True)
+        while self._idle:
+            self._idle.popleft()._cleanup()
@@ -0,0 +1,742 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite RDB file parser
+
+This module reads the keys of a redis rdb file, like the db file of a
+redislite instance, without running a redis-server.  The file is memory
+mapped and the records are parsed one at a time as they are iterated over, so
+snapshots larger than the available memory can be scanned.  The values of
+the records that are filtered out are skipped without being decoded.
+
+The string, list, set, sorted set, hash and stream types are decoded in all
+their encodings, including the ziplist, listpack, intset and zipmap
+encodings.  The values of module types are skipped.
+
+Example:
+  List the hashes of the users in a redislite db file::
+
+      >>> import redislite.rdb
+      >>> for record in redislite.rdb.parse(
+      ...     '/tmp/redis.db', pattern='user:*', types=['hash']
+      ... ):
+      ...     print(record.key, record.value)
+      b'user:1' {b'name': b'alice'}
+"""
+import collections
+import fnmatch
+import logging
+import mmap
+import os
+import struct
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+Record = collections.namedtuple(
+    'Record', ['db', 'key', 'type', 'value', 'expiry']
+)
+Record.__doc__ = """
+A key read from an rdb file
+
+Attributes
+----------
+db : int
+    The database number
+
+key : bytes
+    The key
+
+type : str
+    The type of the value, 'string', 'list', 'set', 'zset', 'hash', 'stream'
+    or 'module'
+
+value : bytes, list, set, dict or None
+    The value, bytes for strings, a list for lists, a set for sets, a dict of
+    members and float scores for sorted sets, a dict for hashes, a list of
+    (id, fields) tuples for streams and None for modules
+
+expiry : int or None
+    The expiration time of the key in milliseconds since the epoch
+"""
+
+
+# The types of the rdb value type codes
+TYPES = {
+    0: 'string',
+    1: 'list',
+    2: 'set',
+    3: 'zset',
+    4: 'hash',
+    5: 'zset',
+    6: 'module',
+    7: 'module',
+    9: 'hash',
+    10: 'list',
+    11: 'set',
+    12: 'zset',
+    13: 'hash',
+    14: 'list',
+    15: 'stream',
+    16: 'hash',
+    17: 'zset',
+    18: 'list',
+    19: 'stream',
+    20: 'set',
+    21: 'stream',
+}
+
+# Opcodes
+_OPCODE_SLOT_INFO = 0xf4
+_OPCODE_FUNCTION2 = 0xf5
+_OPCODE_MODULE_AUX = 0xf7
+_OPCODE_IDLE = 0xf8
+_OPCODE_FREQ = 0xf9
+_OPCODE_AUX = 0xfa
+_OPCODE_RESIZEDB = 0xfb
+_OPCODE_EXPIRETIME_MS = 0xfc
+_OPCODE_EXPIRETIME = 0xfd
+_OPCODE_SELECTDB = 0xfe
+_OPCODE_EOF = 0xff
+
+# Special string encodings
+_ENCODING_INT8 = 0
+_ENCODING_INT16 = 1
+_ENCODING_INT32 = 2
+_ENCODING_LZF = 3
+
+# Module value opcodes
+_MODULE_EOF = 0
+_MODULE_FLOAT = 3
+_MODULE_DOUBLE = 4
+_MODULE_STRING = 5
+
+# Stream listpack entry flags
+_STREAM_ITEM_DELETED = 1
+_STREAM_ITEM_SAMEFIELDS = 2
+
+# Quicklist node containers
+_QUICKLIST_NODE_PLAIN = 1
+
+
+def _lzf_decompress(data, length):
+    """
+    Decompress an LZF compressed string
+    """
+    output = bytearray()
+    index = 0
+    while index < len(data):
+        control = data[index]
+        index += 1
+        if control < 32:
+            # Literal run
+            output += data[index:index + control + 1]
+            index += control + 1
+            continue
+        size = control >> 5
+        if size == 7:
+            size += data[index]
+            index += 1
+        reference = len(output) - ((control & 0x1f) << 8) - data[index] - 1
+        index += 1
+        size += 2
+        if reference + size <= len(output):
+            output += output[reference:reference + size]
+        else:
+            # The back reference overlaps the output being written
+            for offset in range(size):
+                output.append(output[reference + offset])
+    if len(output) != length:
+        raise ValueError('Invalid LZF compressed string in the RDB file')
+    return bytes(output)
+
+
+class _Reader(object):
+    """
+    Read the rdb encoded values from a buffer
+    """
+    def __init__(self, data, position=0):
+        self.data = data
+        self.position = position
+
+    def read(self, size):
+        """
+        Read a number of bytes
+        """
+        end = self.position + size
+        if end > len(self.data):
+            raise ValueError('Unexpected end of the RDB data')
+        value = self.data[self.position:end]
+        self.position = end
+        return value
+
+    def skip(self, size):
+        """
+        Skip a number of bytes
+        """
+        if self.position + size > len(self.data):
+            raise ValueError('Unexpected end of the RDB data')
+        self.position += size
+
+    def byte(self):
+        """
+        Read an unsigned byte
+        """
+        if self.position >= len(self.data):
+            raise ValueError('Unexpected end of the RDB data')
+        self.position += 1
+        return self.data[self.position - 1]
+
+    def integer(self, size, byteorder='little', signed=False):
+        """
+        Read an integer
+        """
+        return int.from_bytes(
+            self.read(size), byteorder=byteorder, signed=signed
+        )
+
+    def length(self):
+        """
+        Read a length encoded value
+
+        Returns
+        -------
+        tuple
+            The value and True if it's the type of a special string encoding
+            instead of a length
+        """
+        first = self.byte()
+        kind = first >> 6
+        if kind == 0:
+            return first & 0x3f, False
+        if kind == 1:
+            return ((first & 0x3f) << 8) | self.byte(), False
+        if kind == 3:
+            return first & 0x3f, True
+        if first == 0x80:
+            return self.integer(4, 'big'), False
+        if first == 0x81:
+            return self.integer(8, 'big'), False
+        raise ValueError('Invalid length encoding %#x in the RDB data' % first)
+
+    def count(self):
+        """
+        Read a length
+        """
+        return self.length()[0]
+
+    def string(self, skip=False):
+        """
+        Read a string, None is returned if it's skipped
+        """
+        length, encoded = self.length()
+        if not encoded:
+            if skip:
+                self.skip(length)
+                return None
+            return self.read(length)
+        if length == _ENCODING_INT8:
+            value = self.integer(1, signed=True)
+        elif length == _ENCODING_INT16:
+            value = self.integer(2, signed=True)
+        elif length == _ENCODING_INT32:
+            value = self.integer(4, signed=True)
+        elif length == _ENCODING_LZF:
+            compressed_length = self.count()
+            length = self.count()
+            if skip:
+                self.skip(compressed_length)
+                return None
+            return _lzf_decompress(self.read(compressed_length), length)
+        else:
+            raise ValueError(
+                'Invalid string encoding %d in the RDB data' % length
+            )
+        return None if skip else str(value).encode()
+
+    def double(self):
+        """
+        Read a double stored as a string
+        """
+        length = self.byte()
+        if length == 253:
+            return float('nan')
+        if length == 254:
+            return float('inf')
+        if length == 255:
+            return float('-inf')
+        return float(self.read(length))
+
+    def binary_double(self):
+        """
+        Read a double stored in binary
+        """
+        return struct.unpack('<d', self.read(8))[0]
+
+
+def _ziplist(data):
+    """
+    Decode a ziplist
+
+    Returns
+    -------
+    list
+        The entries as bytes, integer entries are converted to strings like
+        the redis-server does
+    """
+    reader = _Reader(data, 10)
+    entries = []
+    while True:
+        first = reader.byte()
+        if first == 0xff:
+            return entries
+        if first == 0xfe:
+            reader.skip(4)
+        encoding = reader.byte()
+        kind = encoding >> 6
+        if kind == 0:
+            entries.append(reader.read(encoding & 0x3f))
+            continue
+        if kind == 1:
+            length = ((encoding & 0x3f) << 8) | reader.byte()
+            entries.append(reader.read(length))
+            continue
+        if kind == 2:
+            entries.append(reader.read(reader.integer(4, 'big')))
+            continue
+        if encoding == 0xc0:
+            value = reader.integer(2, signed=True)
+        elif encoding == 0xd0:
+            value = reader.integer(4, signed=True)
+        elif encoding == 0xe0:
+            value = reader.integer(8, signed=True)
+        elif encoding == 0xf0:
+            value = reader.integer(3, signed=True)
+        elif encoding == 0xfe:
+            value = reader.integer(1, signed=True)
+        elif 0xf1 <= encoding <= 0xfd:
+            value = (encoding & 0x0f) - 1
+        else:
+            raise ValueError('Invalid ziplist entry encoding %#x' % encoding)
+        entries.append(str(value).encode())
+
+
+def _backlen_size(length):
+    """
+    Get the size of the back length of a listpack entry
+    """
+    for size, limit in enumerate([127, 16383, 2097151, 268435455], 1):
+        if length <= limit:
+            return size
+    return 5
+
+
+def _listpack(data):
+    """
+    Decode a listpack
+
+    Returns
+    -------
+    list
+        The entries as bytes, integer entries are converted to strings like
+        the redis-server does
+    """
+    reader = _Reader(data, 6)
+    entries = []
+    while True:
+        encoding = reader.byte()
+        if encoding == 0xff:
+            return entries
+        value = None
+        if encoding < 0x80:
+            value, size = encoding, 1
+        elif encoding >> 6 == 2:
+            length = encoding & 0x3f
+            entries.append(reader.read(length))
+            size = 1 + length
+        elif encoding >> 5 == 6:
+            value = ((encoding & 0x1f) << 8) | reader.byte()
+            if value >= 1 << 12:
+                value -= 1 << 13
+            size = 2
+        elif encoding >> 4 == 0xe:
+            length = ((encoding & 0x0f) << 8) | reader.byte()
+            entries.append(reader.read(length))
+            size = 2 + length
+        elif encoding == 0xf0:
+            length = reader.integer(4)
+            entries.append(reader.read(length))
+            size = 5 + length
+        elif 0xf1 <= encoding <= 0xf4:
+            length = {0xf1: 2, 0xf2: 3, 0xf3: 4, 0xf4: 8}[encoding]
+            value = reader.integer(length, signed=True)
+            size = 1 + length
+        else:
+            raise ValueError('Invalid listpack entry encoding %#x' % encoding)
+        if value is not None:
+            entries.append(str(value).encode())
+        reader.skip(_backlen_size(size))
+
+
+def _intset(data):
+    """
+    Decode an intset
+    """
+    reader = _Reader(data)
+    size = reader.integer(4)
+    length = reader.integer(4)
+    return set(
+        str(reader.integer(size, signed=True)).encode()
+        for _ in range(length)
+    )
+
+
+def _zipmap(data):
+    """
+    Decode a zipmap
+    """
+    reader = _Reader(data, 1)
+
+    def length():
+        value = reader.byte()
+        if value == 254:
+            return reader.integer(4)
+        return value
+
+    value = {}
+    while True:
+        if reader.data[reader.position] == 255:
+            return value
+        field = reader.read(length())
+        size = length()
+        free = reader.byte()
+        value[field] = reader.read(size)
+        reader.skip(free)
+
+
+def _pairs(entries):
+    """
+    Get the consecutive pairs of a list of entries
+    """
+    return zip(entries[0::2], entries[1::2])
+
+
+def _stream_entries(master_id, entries):
+    """
+    Decode the stream entries of a listpack
+
+    Parameters
+    ----------
+    master_id : bytes
+        The id of the master entry of the listpack
+
+    entries : list
+        The listpack entries
+
+    Returns
+    -------
+    list
+        An (id, fields) tuple for each entry that isn't deleted
+    """
+    master_ms = int.from_bytes(master_id[:8], 'big')
+    master_seq = int.from_bytes(master_id[8:], 'big')
+    values = iter(entries)
+    count = int(next(values)) + int(next(values))
+    master_fields = [next(values) for _ in range(int(next(values)))]
+    next(values)  # The master entry terminator
+    decoded = []
+    for _ in range(count):
+        flags = int(next(values))
+        entry_id = '%d-%d' % (
+            master_ms + int(next(values)), master_seq + int(next(values))
+        )
+        if flags & _STREAM_ITEM_SAMEFIELDS:
+            fields = dict((field, next(values)) for field in master_fields)
+        else:
+            fields = dict(
+                (next(values), next(values))
+                for _ in range(int(next(values)))
+            )
+        next(values)  # The number of listpack entries of the entry
+        if not flags & _STREAM_ITEM_DELETED:
+            decoded.append((entry_id.encode(), fields))
+    return decoded
+
+
+def _skip_module_value(reader):
+    """
+    Skip the opcode prefixed values saved by a module
+    """
+    while True:
+        opcode = reader.count()
+        if opcode == _MODULE_EOF:
+            return
+        if opcode == _MODULE_FLOAT:
+            reader.skip(4)
+        elif opcode == _MODULE_DOUBLE:
+            reader.skip(8)
+        elif opcode == _MODULE_STRING:
+            reader.string(skip=True)
+        else:
+            reader.count()
+
+
+def _read_stream(reader, type_code, skip):
+    """
+    Read a stream value
+    """
+    entries = []
+    for _ in range(reader.count()):
+        master_id = reader.string(skip)
+        listpack = reader.string(skip)
+        if not skip:
+            entries += _stream_entries(master_id, _listpack(listpack))
+    # Length and last id, then the first id, max deleted id and entries added
+    # of newer versions
+    for _ in range(3 if type_code == 15 else 8):
+        reader.count()
+    for _ in range(reader.count()):
+        # Consumer group name, last id and entries read
+        reader.string(skip=True)
+        for _ in range(2 if type_code == 15 else 3):
+            reader.count()
+        # Pending entries list, the id, delivery time and delivery count
+        for _ in range(reader.count()):
+            reader.skip(16 + 8)
+            reader.count()
+        for _ in range(reader.count()):
+            # Consumer name, seen time, active time and pending entry ids
+            reader.string(skip=True)
+            reader.skip(8 if type_code < 21 else 16)
+            reader.skip(16 * reader.count())
+    return entries
+
+
+def _read_value(reader, type_code, skip=False):
+    """
+    Read a value of an rdb type, None is returned if it's skipped
+    """
+    if type_code == 0:
+        return reader.string(skip)
+    if type_code in [1, 2]:
+        items = [reader.string(skip) for _ in range(reader.count())]
+        if skip:
+            return None
+        return items if type_code == 1 else set(items)
+    if type_code in [3, 5]:
+        value = {}
+        for _ in range(reader.count()):
+            member = reader.string(skip)
+            if type_code == 3:
+                value[member] = reader.double()
+            else:
+                value[member] = reader.binary_double()
+        return None if skip else value
+    if type_code == 4:
+        value = {}
+        for _ in range(reader.count()):
+            field = reader.string(skip)
+            value[field] = reader.string(skip)
+        return None if skip else value
+    if type_code == 7:
+        reader.count()  # The module id
+        _skip_module_value(reader)
+        return None
+    if type_code in [15, 19, 21]:
+        return _read_stream(reader, type_code, skip)
+    if type_code in [14, 18]:
+        items = []
+        for _ in range(reader.count()):
+            container = reader.count() if type_code == 18 else None
+            data = reader.string(skip)
+            if skip:
+                continue
+            if container == _QUICKLIST_NODE_PLAIN:
+                items.append(data)
+            elif type_code == 14:
+                items += _ziplist(data)
+            else:
+                items += _listpack(data)
+        return None if skip else items
+    if type_code not in TYPES or type_code == 6:
+        raise ValueError('Unsupported RDB value type %d' % type_code)
+
+    # Types stored as a single encoded string
+    data = reader.string(skip)
+    if skip:
+        return None
+    if type_code == 9:
+        return _zipmap(data)
+    if type_code == 11:
+        return _intset(data)
+    entries = _ziplist(data) if type_code in [10, 12, 13] else \
+        _listpack(data)
+    if type_code == 20:
+        return set(entries)
+    if type_code == 10:
+        return entries
+    if type_code in [12, 17]:
+        return dict(
+            (member, float(score)) for member, score in _pairs(entries)
+        )
+    return dict(_pairs(entries))
+
+
+def _records(data, wanted):
+    """
+    Parse the records of an rdb file
+
+    Parameters
+    ----------
+    data : bytes or mmap.mmap
+        The rdb file contents
+
+    wanted : callable
+        Called with the db, key and type of each record, the value of the
+        record is only decoded and the record yielded if it returns True
+    """
+    reader = _Reader(data)
+    header = reader.read(9)
+    if not header.startswith(b'REDIS') or not header[5:].isdigit():
+        raise ValueError('Not an RDB file')
+    logger.debug('Parsing RDB version %d', int(header[5:]))
+    db = 0
+    expiry = None
+    while True:
+        opcode = reader.byte()
+        if opcode == _OPCODE_EOF:
+            return
+        if opcode == _OPCODE_SELECTDB:
+            db = reader.count()
+        elif opcode == _OPCODE_EXPIRETIME:
+            expiry = reader.integer(4) * 1000
+        elif opcode == _OPCODE_EXPIRETIME_MS:
+            expiry = reader.integer(8)
+        elif opcode == _OPCODE_RESIZEDB:
+            reader.count()
+            reader.count()
+        elif opcode == _OPCODE_AUX:
+            reader.string(skip=True)
+            reader.string(skip=True)
+        elif opcode == _OPCODE_MODULE_AUX:
+            # The module id and when the aux data was saved
+            reader.count()
+            reader.count()
+            reader.count()
+            _skip_module_value(reader)
+        elif opcode == _OPCODE_IDLE:
+            reader.count()
+        elif opcode == _OPCODE_FREQ:
+            reader.skip(1)
+        elif opcode == _OPCODE_FUNCTION2:
+            reader.string(skip=True)
+        elif opcode == _OPCODE_SLOT_INFO:
+            # The slot, its size and the number of keys with an expiry
+            reader.count()
+            reader.count()
+            reader.count()
+        else:
+            key = reader.string()
+            type_name = TYPES.get(opcode)
+            decode = type_name is not None and wanted(db, key, type_name)
+            value = _read_value(reader, opcode, skip=not decode)
+            if decode:
+                yield Record(db, key, type_name, value, expiry)
+            expiry = None
+
+
+def _parse_file(filename, wanted):
+    """
+    Memory map an rdb file and parse its records
+    """
+    with open(filename, 'rb') as file_handle:
+        # An empty file can't be memory mapped
+        if not os.fstat(file_handle.fileno()).st_size:
+            raise ValueError('Not an RDB file, %s is empty' % filename)
+        with mmap.mmap(
+                file_handle.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            for record in _records(data, wanted):
+                yield record
+
+
+def _encode(value):
+    """
+    Return a key or pattern as bytes
+    """
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    return value
+
+
+def parse(filename, pattern=None, types=None, db=None):
+    """
+    Iterate over the keys of an rdb file
+
+    Parameters
+    ----------
+    filename : str
+        The rdb file, like the :attr:`redislite.Redis.db` of a redislite
+        instance
+
+    pattern : str or bytes, optional
+        Only return the keys matching this glob style pattern
+
+    types : list, optional
+        Only return the keys with these types, 'string', 'list', 'set',
+        'zset', 'hash', 'stream' or 'module'
+
+    db : int, optional
+        Only return the keys of this database
+
+    Returns
+    -------
+    generator
+        A :class:`Record()` for each key, in the order of the file
+    """
+    pattern = _encode(pattern)
+    types = set(types) if types is not None else None
+
+    def wanted(record_db, key, type_name):
+        if db is not None and record_db != db:
+            return False
+        if types is not None and type_name not in types:
+            return False
+        return pattern is None or fnmatch.fnmatchcase(key, pattern)
+
+    return _parse_file(filename, wanted)
+
+
+def get(filename, key, db=0):
+    """
+    Read one key from an rdb file
+
+    Parameters
+    ----------
+    filename : str
+        The rdb file
+
+    key : str or bytes
+        The key
+
+    db : int, optional
+        The database of the key, default=0
+
+    Returns
+    -------
+    Record or None
+        The record of the key, None if the file doesn't contain the key
+    """
+    key = _encode(key)
+    records = _parse_file(
+        filename,
+        lambda record_db, record_key, _: record_db == db and record_key == key
+    )
+    try:
+        for record in records:
+            return record
+    finally:
+        records.close()
+    return None
@@ -0,0 +1,314 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite read replica sets
+
+This module contains the :class:`ReplicaSet()` class, a redislite instance
+that starts a number of embedded replica servers of its own server and sends
+the read-only commands to them.  The replicas are kept up to date with
+diskless replication and only store their data in memory, so reads can use
+several cores while writes still go to the single primary server.
+
+Example:
+  Start a primary with 3 replicas and spread the reads over the replicas::
+
+      >>> import redislite
+      >>> connection = redislite.ReplicaSet('/tmp/redis.db', replicas=3)
+      >>> connection.set('key', 'value')
+      True
+      >>> connection.wait_for_replicas()
+      3
+      >>> connection.get('key')
+      b'value'
+"""
+import itertools
+import logging
+import redis
+import secrets
+import socket
+import threading
+import time
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+from .client import (
+    BaseRedis, Redis, RedisMixin, RedisLiteException,
+    RedisLiteServerStartError
+)
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+# The ways the reads can be spread over the replicas
+READ_STRATEGIES = ['round-robin', 'least-loaded']
+
+# The arguments only used by the primary instance
+_PRIMARY_ONLY = [
+    'client_cache', 'instrument', 'metrics_callback', 'metrics_interval',
+    'server_pool', 'shutdown_save', 'template'
+]
+
+# Read-only commands that are sent to the primary, a scan cursor is only
+# valid on the server that returned it
+_PRIMARY_READS = frozenset(['HSCAN', 'SCAN', 'SSCAN', 'ZSCAN'])
+
+
+class _ReplicaRedis(RedisMixin, BaseRedis):
+    """
+    Redislite class used to start the replica servers, it doesn't pick up the
+    db file settings :mod:`redislite.patch` sets on :class:`redislite.Redis`.
+    """
+    pass
+
+
+def _free_port():
+    """
+    Get a tcp port on the loopback interface that is not in use
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ReplicaSet(Redis):
+    """
+    A redislite instance with embedded read replicas
+
+    The primary server listens on a port of the loopback interface for the
+    replication connections of the replicas, the clients of all the servers
+    use their unix sockets.  Since other users of the host can connect to
+    the port, the servers require a password, a random one unless a password
+    is passed.  Commands that the server flags as read-only are
+    sent to the replicas, all the other commands and pipelines are sent to
+    the primary.  The SCAN, HSCAN, SSCAN and ZSCAN commands are sent to the
+    primary too, since a cursor is only valid on the server that returned
+    it.  A replica that can't be reached is skipped and the command is sent
+    to the primary instead.
+
+    Replication is asynchronous, so a read from a replica right after a write
+    may not see the write yet.  Use :meth:`wait_for_replicas` after the
+    writes that must be visible to the following reads.
+
+    Parameters
+    ----------
+    dbfilename : str, optional
+        The db file of the primary server, the replicas don't store their
+        data on disk
+
+    replicas : int, optional
+        Number of replica servers to start, default=2
+
+    read_from : str, optional
+        'round-robin' to send the reads to each replica in turn or
+        'least-loaded' to send them to the replica with the fewest commands
+        in progress, default='round-robin'
+
+    replica_timeout : float, optional
+        Number of seconds to wait for the replicas to finish their initial
+        synchronization, default=10
+
+    password : str, optional
+        The password of the primary and replica servers, default is a random
+        password
+
+    **kwargs : optional
+        The other :class:`redislite.Redis` arguments, the serverconfig,
+        profile, memory_budget, concurrency and redis client arguments are
+        used for the replicas too
+
+    Attributes
+    ----------
+    replicas : list
+        The redislite instances of the replica servers
+
+    read_from : str
+        How the reads are spread over the replicas
+    """
+    replicas = []
+    read_from = 'round-robin'
+    _readonly_commands = frozenset()
+
+    def __init__(self, *args, **kwargs):
+        self._lock = threading.Lock()
+        replicas = kwargs.pop('replicas', 2)
+        self.read_from = kwargs.pop('read_from', self.read_from)
+        if self.read_from not in READ_STRATEGIES:
+            raise RedisLiteException(
+                'Invalid read_from setting {0!r}'.format(self.read_from)
+            )
+        replica_timeout = kwargs.pop('replica_timeout', 10)
+        kwargs['password'] = password = kwargs.get(
+            'password'
+        ) or secrets.token_hex(32)
+        replica_kwargs = {
+            key: value for key, value in kwargs.items()
+            if key not in _PRIMARY_ONLY + ['dbfilename']
+        }
+        serverconfig = dict(kwargs.pop('serverconfig', None) or {})
+        replica_kwargs['serverconfig'] = dict(serverconfig, **{
+            'save': '""',
+            'appendonly': 'no',
+            'repl-diskless-load': 'on-empty-db',
+            'requirepass': password,
+            'masterauth': password,
+        })
+        # Reads from a replica that can't be reached go to the primary right
+        # away instead of retrying
+        replica_kwargs.setdefault('retry', Retry(NoBackoff(), 0))
+        serverconfig.setdefault('requirepass', password)
+        serverconfig.setdefault('bind', '127.0.0.1')
+        serverconfig.setdefault('port', str(_free_port()))
+        serverconfig.setdefault('repl-diskless-sync', 'yes')
+        serverconfig.setdefault('repl-diskless-sync-delay', '0')
+        kwargs['serverconfig'] = serverconfig
+
+        self.replicas = []
+        self._load = []
+        self._next = itertools.count()
+        super(ReplicaSet, self).__init__(*args, **kwargs)
+
+        port = self.config_get('port').get('port')
+        if str(port) == '0':
+            raise RedisLiteException(
+                'The redis-server for {0} is already running without a tcp '
+                'port the replicas can connect to'.format(self.db)
+            )
+        replica_kwargs['serverconfig']['replicaof'] = '127.0.0.1 {0}'.format(
+            port
+        )
+        self._readonly_commands = frozenset(
+            name.upper() for name, info in super(
+                ReplicaSet, self
+            ).execute_command('COMMAND').items()
+            if 'readonly' in info['flags']
+        ) - _PRIMARY_READS
+        try:
+            for _ in range(replicas):
+                self.replicas.append(_ReplicaRedis(**replica_kwargs))
+                self._load.append(0)
+            self._wait_for_sync(replica_timeout)
+        except Exception:
+            self._cleanup()
+            raise
+
+    def _wait_for_sync(self, timeout):
+        """
+        Wait until all the replicas finished their initial synchronization
+        """
+        deadline = time.time() + timeout
+        for replica in self.replicas:
+            while replica.info('replication').get(
+                    'master_link_status'
+            ) != 'up':
+                if time.time() > deadline:
+                    raise RedisLiteServerStartError(
+                        'The replica {0} did not synchronize with the '
+                        'primary in {1} seconds'.format(replica.db, timeout)
+                    )
+                time.sleep(.01)
+        # After a diskless sync the primary only streams the writes to a
+        # replica once it received the first REPLCONF ACK, which replicas
+        # send every second, so wait for a write all replicas acknowledged.
+        if self.replicas:
+            super(ReplicaSet, self).execute_command(
+                'PUBLISH', '__redislite__:sync', ''
+            )
+            if self.wait_for_replicas(
+                    max(deadline - time.time(), .001)
+            ) < len(self.replicas):  # pragma: no cover
+                raise RedisLiteServerStartError(
+                    'The replicas did not acknowledge the writes of the '
+                    'primary in {0} seconds'.format(timeout)
+                )
+        logger.debug('%d replicas synchronized', len(self.replicas))
+
+    def _cleanup(self, *args, **kwargs):
+        """
+        Shut down the replicas and the primary server
+        """
+        replicas = self.replicas
+        with self._lock:
+            self.replicas = []
+            self._load = []
+        for replica in replicas:
+            replica._cleanup(*args, **kwargs)
+        super(ReplicaSet, self)._cleanup(*args, **kwargs)
+
+    def _pick_replica(self, replicas):
+        """
+        Choose the replica for the next read
+
+        Parameters
+        ----------
+        replicas : list
+            The replicas the read can be sent to
+
+        Returns
+        -------
+        int or None
+            The index of the replica in replicas, None if the replicas were
+            shut down
+        """
+        count = len(replicas)
+        with self._lock:
+            if self.replicas is not replicas:
+                return None
+            offset = next(self._next)
+            if self.read_from == 'least-loaded':
+                # Ties are broken in turn so idle replicas share the reads
+                index = min(
+                    ((offset + index) % count for index in range(count)),
+                    key=self._load.__getitem__
+                )
+            else:
+                index = offset % count
+            self._load[index] += 1
+            return index
+
+    def execute_command(self, *args, **options):
+        """
+        Execute a command on a replica if it is read-only, on the primary
+        otherwise
+        """
+        name = args[0]
+        if isinstance(name, bytes):
+            name = name.decode()
+        replicas = self.replicas
+        if not replicas or \
+                name.split()[0].upper() not in self._readonly_commands:
+            return super(ReplicaSet, self).execute_command(*args, **options)
+        index = self._pick_replica(replicas)
+        if index is None:  # pragma: no cover
+            return super(ReplicaSet, self).execute_command(*args, **options)
+        try:
+            return replicas[index].execute_command(*args, **options)
+        except redis.ConnectionError:
+            logger.warning(
+                'Replica %s is unavailable, reading from the primary',
+                replicas[index].db
+            )
+            return super(ReplicaSet, self).execute_command(*args, **options)
+        finally:
+            with self._lock:
+                # The load counts are reset when the replicas are shut down
+                if self.replicas is replicas:
+                    self._load[index] -= 1
+
+    def wait_for_replicas(self, timeout=1):
+        """
+        Wait until the replicas received the writes made so far
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum number of seconds to wait, default=1
+
+        Returns
+        -------
+        int
+            The number of replicas that received the writes
+        """
+        return super(ReplicaSet, self).execute_command(
+            'WAIT', len(self.replicas), int(timeout * 1000)
+        )
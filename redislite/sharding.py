@@ -0,0 +1,510 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite client side sharding
+
+This module contains the :class:`ShardedRedis()` class, which spreads the keys
+over a number of independent embedded redis servers with consistent hashing.
+There is no cluster protocol between the servers, each shard is a plain
+redislite server, and the commands on several keys are split into a batch
+per shard that run concurrently.
+
+Like in a redis cluster, only the part of a key between the first '{' and
+the following '}' is hashed if it is not empty, so keys that must be on the
+same shard can share a hash tag, for example 'user:{42}:name' and
+'user:{42}:email'.
+
+Example:
+  Spread the keys over 4 servers that save their data in /tmp/shards::
+
+      >>> import redislite
+      >>> connection = redislite.ShardedRedis(shards=4, dbdir='/tmp/shards')
+      >>> connection.mset({'a': 1, 'b': 2, 'c': 3})
+      True
+      >>> connection.mget(['a', 'b', 'c'])
+      [b'1', b'2', b'3']
+"""
+import bisect
+import collections
+import concurrent.futures
+import hashlib
+import logging
+import os
+from .client import BaseRedis, RedisMixin, RedisLiteException
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+# Number of points each shard has on the hash ring
+RING_POINTS = 160
+
+
+class _ShardRedis(RedisMixin, BaseRedis):
+    """
+    Redislite class used to start the shards, it doesn't pick up the db file
+    settings :mod:`redislite.patch` sets on :class:`redislite.Redis`.
+    """
+    pass
+
+
+def _hash(value):
+    """
+    Hash bytes to an integer position on the hash ring
+    """
+    return int.from_bytes(hashlib.md5(value).digest()[:8], 'big')
+
+
+def hash_key(key):
+    """
+    Get the part of a key that decides its shard
+
+    Parameters
+    ----------
+    key : str or bytes
+        The key
+
+    Returns
+    -------
+    bytes
+        The hash tag of the key if it has one, the whole key otherwise
+    """
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    elif not isinstance(key, bytes):
+        key = str(key).encode('utf-8')
+    start = key.find(b'{')
+    if start >= 0:
+        end = key.find(b'}', start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    return key
+
+
+class ShardedPipeline(object):
+    """
+    A pipeline that queues the commands of each shard separately and
+    executes the pipelines of the shards concurrently
+
+    The commands are called like the :class:`redis.client.Pipeline` commands
+    and must take the key as their first argument.  The pipelines of the
+    shards don't use transactions.
+    """
+    def __init__(self, sharded):
+        self.sharded = sharded
+        self._commands = []
+
+    def __len__(self):
+        return len(self._commands)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.reset()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def queue(key, *args, **kwargs):
+            self._commands.append((
+                self.sharded.get_shard_index(key), name, (key,) + args,
+                kwargs
+            ))
+            return self
+        return queue
+
+    def reset(self):
+        """
+        Discard the queued commands
+        """
+        self._commands = []
+
+    def execute(self, raise_on_error=True):
+        """
+        Execute the queued commands
+
+        Returns
+        -------
+        list
+            The result of each command, in the order they were queued
+        """
+        batches = collections.defaultdict(list)
+        for position, (index, name, args, kwargs) in enumerate(
+                self._commands
+        ):
+            batches[index].append((position, name, args, kwargs))
+        self.reset()
+
+        def run(index, batch):
+            pipe = self.sharded.shards[index].pipeline(transaction=False)
+            for _, name, args, kwargs in batch:
+                getattr(pipe, name)(*args, **kwargs)
+            return pipe.execute(raise_on_error=raise_on_error)
+
+        results = [None] * sum(len(batch) for batch in batches.values())
+        for batch, batch_results in self.sharded._map(run, batches):
+            for (position, _, _, _), result in zip(batch, batch_results):
+                results[position] = result
+        return results
+
+
+class ShardedRedis(object):
+    """
+    A client for keys spread over several embedded redis servers
+
+    The methods of :class:`redislite.Redis` that take a key as their first
+    argument are run on the shard of that key.  :meth:`mget`, :meth:`mset`,
+    :meth:`delete`, :meth:`unlink`, :meth:`exists` and pipelines split their
+    keys into a batch per shard, and :meth:`keys`, :meth:`scan_iter`,
+    :meth:`dbsize`, :meth:`flushdb`, :meth:`flushall` and :meth:`ping` are
+    run on all the shards.  Other commands on several keys, like SUNION or
+    RENAME, only work for keys with the same hash tag.
+
+    Parameters
+    ----------
+    shards : int, optional
+        Number of redis servers to spread the keys over, default=4
+
+    dbdir : str, optional
+        Directory the shards save their db files in, a ShardedRedis started
+        again with the same directory and number of shards finds its keys
+        again.  By default the shards don't save their data.
+
+    **kwargs : optional
+        The :class:`redislite.Redis` arguments used for each shard, like
+        serverconfig, profile or decode_responses
+
+    Attributes
+    ----------
+    shards : list
+        The redislite instances of the shards
+    """
+    shards = []
+
+    def __init__(self, shards=4, dbdir=None, **kwargs):
+        if shards < 1:
+            raise RedisLiteException(
+                'ShardedRedis needs at least one shard, not {0}'.format(
+                    shards
+                )
+            )
+        if dbdir:
+            dbdir = os.path.abspath(dbdir)
+            if not os.path.isdir(dbdir):
+                os.makedirs(dbdir)
+        self._ring = sorted(
+            (_hash('shard-{0}-{1}'.format(index, point).encode()), index)
+            for index in range(shards) for point in range(RING_POINTS)
+        )
+        self._positions = [position for position, _ in self._ring]
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=shards, thread_name_prefix='redislite-shard'
+        )
+
+        def start_shard(index):
+            if dbdir:
+                return _ShardRedis(
+                    os.path.join(dbdir, 'shard-{0}.db'.format(index)),
+                    **kwargs
+                )
+            return _ShardRedis(**kwargs)
+
+        futures = [
+            self._executor.submit(start_shard, index)
+            for index in range(shards)
+        ]
+        concurrent.futures.wait(futures)
+        self.shards = [
+            future.result() for future in futures if not future.exception()
+        ]
+        if len(self.shards) < shards:
+            self.close()
+            # Raise the error of the first shard that failed to start
+            for future in futures:
+                future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def command(key, *args, **kwargs):
+            return getattr(self.shard_for(key), name)(key, *args, **kwargs)
+        command.__name__ = name
+        return command
+
+    def get_shard_index(self, key):
+        """
+        Get the index of the shard that stores a key
+
+        Parameters
+        ----------
+        key : str or bytes
+            The key
+
+        Returns
+        -------
+        int
+            The index of the shard in shards
+        """
+        position = bisect.bisect(self._positions, _hash(hash_key(key)))
+        return self._ring[position % len(self._ring)][1]
+
+    def shard_for(self, key):
+        """
+        Get the shard that stores a key
+
+        Parameters
+        ----------
+        key : str or bytes
+            The key
+
+        Returns
+        -------
+        redislite.client.RedisMixin
+            The redislite instance of the shard
+        """
+        return self.shards[self.get_shard_index(key)]
+
+    def _map(self, function, batches):
+        """
+        Run function(index, batch) for each shard batch on the thread pool
+
+        Returns
+        -------
+        list
+            A (batch, result) tuple for each batch
+        """
+        if len(batches) == 1:
+            # No need to hand a single batch to another thread
+            index, batch = list(batches.items())[0]
+            return [(batch, function(index, batch))]
+        futures = [
+            (batch, self._executor.submit(function, index, batch))
+            for index, batch in batches.items()
+        ]
+        return [(batch, future.result()) for batch, future in futures]
+
+    def _all_shards(self, name, *args, **kwargs):
+        """
+        Run a command on all the shards concurrently
+
+        Returns
+        -------
+        list
+            The result of each shard
+        """
+        return [
+            result for _, result in self._map(
+                lambda index, batch: getattr(self.shards[index], name)(
+                    *args, **kwargs
+                ),
+                {index: None for index in range(len(self.shards))}
+            )
+        ]
+
+    def _group(self, keys):
+        """
+        Group keys by shard
+
+        Returns
+        -------
+        dict
+            A list of (position, key) tuples for each shard index
+        """
+        batches = collections.defaultdict(list)
+        for position, key in enumerate(keys):
+            batches[self.get_shard_index(key)].append((position, key))
+        return batches
+
+    def mget(self, keys, *args):
+        """
+        Get the values of several keys
+
+        Parameters
+        ----------
+        keys : list or str
+            The keys, or the first key with the other keys in args
+
+        Returns
+        -------
+        list
+            The values, None for the keys that don't exist
+        """
+        keys = list(keys) + list(args) if isinstance(
+            keys, (list, tuple)
+        ) else [keys] + list(args)
+        values = [None] * len(keys)
+        results = self._map(
+            lambda index, batch: self.shards[index].mget(
+                [key for _, key in batch]
+            ),
+            self._group(keys)
+        )
+        for batch, batch_values in results:
+            for (position, _), value in zip(batch, batch_values):
+                values[position] = value
+        return values
+
+    def mset(self, mapping):
+        """
+        Set several keys, each shard sets its keys atomically but the shards
+        are not updated in one transaction
+
+        Parameters
+        ----------
+        mapping : dict
+            The values of the keys
+
+        Returns
+        -------
+        bool
+            True
+        """
+        self._map(
+            lambda index, batch: self.shards[index].mset(
+                {key: mapping[key] for _, key in batch}
+            ),
+            self._group(list(mapping))
+        )
+        return True
+
+    def _count_keys(self, name, keys):
+        """
+        Run a command that counts keys on the shard of each key
+        """
+        return sum(
+            result for _, result in self._map(
+                lambda index, batch: getattr(self.shards[index], name)(
+                    *[key for _, key in batch]
+                ),
+                self._group(keys)
+            )
+        )
+
+    def delete(self, *keys):
+        """
+        Delete keys
+
+        Returns
+        -------
+        int
+            The number of keys deleted
+        """
+        return self._count_keys('delete', keys)
+
+    def unlink(self, *keys):
+        """
+        Delete keys, reclaiming their memory in the background
+
+        Returns
+        -------
+        int
+            The number of keys deleted
+        """
+        return self._count_keys('unlink', keys)
+
+    def exists(self, *keys):
+        """
+        Count the keys that exist
+
+        Returns
+        -------
+        int
+            The number of keys that exist
+        """
+        return self._count_keys('exists', keys)
+
+    def pipeline(self):
+        """
+        Create a pipeline that runs the batch of each shard concurrently
+
+        Returns
+        -------
+        ShardedPipeline
+            The pipeline
+        """
+        return ShardedPipeline(self)
+
+    def keys(self, pattern='*'):
+        """
+        Get the keys matching a pattern on all the shards
+
+        Returns
+        -------
+        list
+            The keys
+        """
+        return [
+            key for keys in self._all_shards('keys', pattern) for key in keys
+        ]
+
+    def scan_iter(self, match=None, count=None, _type=None):
+        """
+        Iterate over the keys of all the shards, one shard after the other
+
+        Yields
+        ------
+        bytes or str
+            The keys
+        """
+        for shard in self.shards:
+            for key in shard.scan_iter(match=match, count=count, _type=_type):
+                yield key
+
+    def dbsize(self):
+        """
+        Get the number of keys on all the shards
+
+        Returns
+        -------
+        int
+            The number of keys
+        """
+        return sum(self._all_shards('dbsize'))
+
+    def flushdb(self):
+        """
+        Delete the keys of the current database of all the shards
+        """
+        return all(self._all_shards('flushdb'))
+
+    def flushall(self):
+        """
+        Delete the keys of all the databases of all the shards
+        """
+        return all(self._all_shards('flushall'))
+
+    def ping(self):
+        """
+        Ping all the shards
+
+        Returns
+        -------
+        bool
+            True if all the shards answered
+        """
+        return all(self._all_shards('ping'))
+
+    def close(self):
+        """
+        Shut down the servers of the shards and the thread pool
+        """
+        shards, self.shards = self.shards, []
+        for shard in shards:
+            shard._cleanup()
+        self._executor.shutdown(wait=True)
+
+    def _cleanup(self):
+        """
+        Shut down the shards, like :class:`redislite.Redis` instances
+        """
+        self.close()
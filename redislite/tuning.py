@@ -0,0 +1,278 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Redislite encoding tuning
+
+This module contains functions that sample the hashes, sorted sets and sets of
+a running redis server and recommend compact encoding thresholds, the
+``*-max-ziplist-*`` and ``set-max-intset-entries`` settings, that keep most of
+the collections compactly encoded.  Compactly encoded collections use several
+times less memory.
+
+Example:
+  Sample the keys of a redislite instance, then apply and keep the
+  recommended settings::
+
+      >>> import redislite
+      >>> import redislite.tuning
+      >>> connection = redislite.Redis('/tmp/redis.db')
+      >>> settings = redislite.tuning.recommend_encoding_settings(connection)
+      >>> redislite.tuning.apply_encoding_settings(connection, settings)
+"""
+import logging
+import math
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+# The command returning the number of elements of each collection type
+LENGTH_COMMANDS = {
+    'hash': 'HLEN',
+    'set': 'SCARD',
+    'zset': 'ZCARD',
+}
+
+# Upper limits for the recommended thresholds, operations on compactly encoded
+# collections are O(n), so larger collections are better off with the
+# regular encoding.
+MAX_ENTRIES = 1024
+MAX_VALUE = 512
+MAX_INTSET_ENTRIES = 4096
+
+
+def _decode(value):
+    """
+    Return a server response as a str
+    """
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return value
+
+
+def _scan_batches(connection, sample_size, batch_size):
+    """
+    Iterate over batches of keys from the SCAN command until sample_size keys
+    were returned or all keys were scanned.
+    """
+    cursor = 0
+    sampled = 0
+    while True:
+        cursor, keys = connection.scan(cursor=cursor, count=batch_size)
+        keys = keys[:sample_size - sampled]
+        sampled += len(keys)
+        if keys:
+            yield keys
+        if not int(cursor) or sampled >= sample_size:
+            return
+
+
+def _element_lengths(collection_type, elements):
+    """
+    Return the length of the longest element and if all elements are
+    integers
+    """
+    if collection_type == 'hash':
+        elements = list(elements.keys()) + list(elements.values())
+    elif collection_type == 'zset':
+        elements = [member for member, _ in elements]
+    elements = [
+        element if isinstance(element, bytes) else str(element).encode()
+        for element in elements
+    ]
+    integers = all(element.lstrip(b'-').isdigit() for element in elements)
+    return max([len(element) for element in elements] or [0]), integers
+
+
+def sample_collections(
+        connection, sample_size=1000, batch_size=100, max_elements=MAX_ENTRIES
+):
+    """
+    Sample the hashes, sets and sorted sets of a redis server
+
+    The keys are found with SCAN and the commands for each batch of keys are
+    pipelined.
+
+    Parameters
+    ----------
+    connection : redis.Redis
+        Connection to the redis server
+
+    sample_size : int, optional
+        Maximum number of keys to sample, default=1000
+
+    batch_size : int, optional
+        Number of keys to request with each SCAN command, default=100
+
+    max_elements : int, optional
+        The elements of collections with more elements are not read, so their
+        element size is not known, default=MAX_ENTRIES.  The elements of sets
+        with up to MAX_INTSET_ENTRIES elements are always read, to find the
+        integer sets.
+
+    Returns
+    -------
+    list
+        A dict for each sampled collection with the key, type, encoding,
+        memory (the MEMORY USAGE result), length (number of elements),
+        max_length (length of the longest element or None if not read) and
+        integers (True if all elements are integers or None if not read)
+    """
+    samples = []
+    for keys in _scan_batches(connection, sample_size, batch_size):
+        pipe = connection.pipeline(transaction=False)
+        for key in keys:
+            pipe.type(key)
+        keys = [
+            (key, _decode(key_type))
+            for key, key_type in zip(keys, pipe.execute())
+            if _decode(key_type) in LENGTH_COMMANDS
+        ]
+        if not keys:
+            continue
+
+        for key, key_type in keys:
+            pipe.execute_command(LENGTH_COMMANDS[key_type], key)
+            pipe.object('encoding', key)
+            pipe.memory_usage(key)
+        results = pipe.execute()
+        batch = []
+        for index, (key, key_type) in enumerate(keys):
+            length, encoding, memory = results[index * 3:index * 3 + 3]
+            batch.append({
+                'key': key,
+                'type': key_type,
+                'encoding': _decode(encoding),
+                'memory': memory,
+                'length': length,
+                'max_length': None,
+                'integers': None,
+            })
+
+        readable = [
+            sample for sample in batch if sample['length'] <= (
+                max(max_elements, MAX_INTSET_ENTRIES)
+                if sample['type'] == 'set' else max_elements
+            )
+        ]
+        for sample in readable:
+            if sample['type'] == 'hash':
+                pipe.hgetall(sample['key'])
+            elif sample['type'] == 'zset':
+                pipe.zrange(sample['key'], 0, -1, withscores=True)
+            else:
+                pipe.smembers(sample['key'])
+        for sample, elements in zip(readable, pipe.execute()):
+            sample['max_length'], sample['integers'] = _element_lengths(
+                sample['type'], elements
+            )
+        samples += batch
+    return samples
+
+
+def _percentile(values, coverage):
+    """
+    Return the smallest value that is at least as large as the coverage
+    fraction of the values
+    """
+    values = sorted(values)
+    return values[max(int(math.ceil(coverage * len(values))) - 1, 0)]
+
+
+def recommend_encoding_settings(
+        connection, samples=None, coverage=.95, sample_size=1000
+):
+    """
+    Recommend compact encoding thresholds for the data of a redis server
+
+    The thresholds are raised until the coverage fraction of the sampled
+    collections fits in the compact encoding, up to MAX_ENTRIES entries,
+    MAX_VALUE bytes per value and MAX_INTSET_ENTRIES integer set entries.
+    Thresholds are never lowered.
+
+    Parameters
+    ----------
+    connection : redis.Redis
+        Connection to the redis server
+
+    samples : list, optional
+        The result of :func:`sample_collections`, the collections are sampled
+        if not given.
+
+    coverage : float, optional
+        Fraction of the collections that should be compactly encoded,
+        default=.95
+
+    sample_size : int, optional
+        Maximum number of keys to sample, default=1000
+
+    Returns
+    -------
+    dict
+        The settings that should be raised, with the recommended values
+    """
+    if samples is None:
+        samples = sample_collections(connection, sample_size=sample_size)
+
+    wanted = {}
+    for key_type, prefix in [('hash', 'hash'), ('zset', 'zset')]:
+        typed = [sample for sample in samples if sample['type'] == key_type]
+        if not typed:
+            continue
+        entries = _percentile(
+            [sample['length'] for sample in typed], coverage
+        )
+        wanted[prefix + '-max-ziplist-entries'] = min(entries, MAX_ENTRIES)
+        value_lengths = [
+            sample['max_length'] for sample in typed
+            if sample['max_length'] is not None
+        ]
+        if value_lengths:
+            wanted[prefix + '-max-ziplist-value'] = min(
+                _percentile(value_lengths, coverage), MAX_VALUE
+            )
+
+    integer_sets = [
+        sample['length'] for sample in samples
+        if sample['type'] == 'set' and sample['integers']
+    ]
+    if integer_sets:
+        wanted['set-max-intset-entries'] = min(
+            _percentile(integer_sets, coverage), MAX_INTSET_ENTRIES
+        )
+
+    recommended = {}
+    for setting, value in wanted.items():
+        current = connection.config_get(setting)
+        current = int(_decode(list(current.values())[0])) if current else 0
+        if value > current:
+            recommended[setting] = str(value)
+    logger.debug('Recommended encoding settings: %s', recommended)
+    return recommended
+
+
+def apply_encoding_settings(connection, settings):
+    """
+    Set encoding thresholds on a running redis server
+
+    The settings are also added to the serverconfig of a redislite instance,
+    so they are used if the redis-server is started again.  The settings
+    apply to the collections created or converted after they are set,
+    redis doesn't convert existing collections back to the compact encoding
+    when they are modified, only when the data is loaded again after a
+    restart or a DEBUG RELOAD.
+
+    Parameters
+    ----------
+    connection : redis.Redis
+        Connection to the redis server
+
+    settings : dict
+        The settings to apply, as returned by
+        :func:`recommend_encoding_settings`
+    """
+    for setting, value in settings.items():
+        connection.config_set(setting, value)
+    if hasattr(connection, 'server_config'):
+        connection.server_config = dict(connection.server_config, **settings)
@@ -0,0 +1,104 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.analyze` module.
+"""
+from __future__ import print_function
+import contextlib
+import io
+import json
+import logging
+import os
+import redislite
+import redislite.analyze
+import shutil
+import tempfile
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteAnalyze(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.dbfilename = os.path.join(self.tempdir, 'redis.db')
+        self.redis = redislite.Redis(self.dbfilename)
+        pipe = self.redis.pipeline(transaction=False)
+        for index in range(500):
+            pipe.hset('user:%d' % index, mapping={'name': 'user%d' % index})
+        for index in range(5):
+            pipe.hset(
+                'big:%d' % index,
+                mapping={'field%d' % field: 'v' for field in range(600)}
+            )
+        pipe.set('session:deadbeefcafe', 'x' * 1000)
+        pipe.execute()
+
+    def tearDown(self):
+        self.redis._cleanup()
+        shutil.rmtree(self.tempdir)
+
+    def test_key_pattern(self):
+        self.assertEqual(
+            redislite.analyze.key_pattern('user:1234:profile'),
+            'user:*:profile'
+        )
+        self.assertEqual(
+            redislite.analyze.key_pattern(b'session:deadbeefcafe'),
+            'session:*'
+        )
+        self.assertEqual(
+            redislite.analyze.key_pattern('cache/page/7', separator='/'),
+            'cache/page/*'
+        )
+
+    def test_analyze(self):
+        report = redislite.analyze.analyze(self.redis, batch_size=50, top=3)
+        self.assertEqual(report['keys'], 506)
+        patterns = {
+            (group['pattern'], group['type']): group
+            for group in report['patterns']
+        }
+        self.assertEqual(patterns[('user:*', 'hash')]['keys'], 500)
+        self.assertEqual(patterns[('big:*', 'hash')]['keys'], 5)
+        self.assertEqual(patterns[('session:*', 'string')]['keys'], 1)
+        self.assertEqual(report['memory'], sum(
+            group['memory'] for group in report['patterns']
+        ))
+        self.assertEqual(len(report['biggest_keys']), 3)
+        self.assertTrue(report['biggest_keys'][0]['key'].startswith('big:'))
+        self.assertEqual(report['encoding_savings']['hash']['keys'], 5)
+        self.assertGreater(
+            report['encoding_savings']['hash']['estimated_savings'], 0
+        )
+
+    def test_analyze_sample_size(self):
+        report = redislite.analyze.analyze(
+            self.redis, batch_size=10, sample_size=25
+        )
+        self.assertEqual(report['keys'], 25)
+
+    def test_main(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            redislite.analyze.main([self.dbfilename, '--top', '2'])
+        self.assertIn('Keyspace analysis: 506 keys', output.getvalue())
+        self.assertIn('user:*', output.getvalue())
+
+    def test_main_json(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            redislite.analyze.main([self.dbfilename, '--json'])
+        self.assertEqual(json.loads(output.getvalue())['keys'], 506)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteAnalyze
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
@@ -0,0 +1,142 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.asyncio` module.
+"""
+from __future__ import print_function
+import logging
+import os
+import psutil
+import redislite.asyncio
+import redislite.instrumentation
+import shutil
+import tempfile
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteAsyncio(unittest.IsolatedAsyncioTestCase):
+
+    async def test_redislite_asyncio_Redis(self):
+        r = await redislite.asyncio.Redis.create()
+        self.assertEqual(psutil.Process(r.pid).ppid(), os.getpid())
+        await r.set('key', 'value')
+        self.assertEqual(await r.get('key'), b'value')
+        self.assertIn('spawn', r.timings)
+
+        pid = r.pid
+        redis_dir = r.redis_dir
+        await r.aclose()
+        self.assertFalse(os.path.exists(redis_dir))
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+
+    async def test_redislite_asyncio_Redis_await(self):
+        r = await redislite.asyncio.StrictRedis()
+        self.assertTrue(await r.ping())
+        await r.aclose()
+
+    async def test_redislite_asyncio_Redis_lazy_start(self):
+        r = redislite.asyncio.Redis()
+        self.assertEqual(r.pid, 0)
+        self.assertTrue(await r.set('key', 'value'))
+        self.assertGreater(r.pid, 0)
+        await r.aclose()
+
+    async def test_redislite_asyncio_Redis_metrics(self):
+        r = await redislite.asyncio.Redis.create()
+        await r.set('key', 'value')
+        metrics = await r.metrics()
+        self.assertEqual(metrics['commandstats']['set']['calls'], 1)
+        self.assertGreater(metrics['process']['rss'], 0)
+        await r.aclose()
+
+    async def test_redislite_asyncio_Redis_instrument(self):
+        sink = redislite.instrumentation.MemorySink()
+        r = redislite.asyncio.Redis(instrument=[sink])
+        await r.set('key', 'value')
+        await r.pipeline().get('key').get('key').execute()
+        await r.aclose()
+        stats = sink.stats()
+        self.assertEqual(stats['commands']['SET']['calls'], 1)
+        self.assertEqual(stats['commands']['GET']['pipelined'], 2)
+
+    async def test_redislite_asyncio_Redis_unstarted_aclose(self):
+        r = redislite.asyncio.Redis()
+        redis_dir = r.redis_dir
+        await r.aclose()
+        self.assertFalse(os.path.exists(redis_dir))
+
+    async def test_redislite_asyncio_Redis_with_db_file(self):
+        temp_dir = tempfile.mkdtemp()
+        filename = os.path.join(temp_dir, 'redis.db')
+        r = await redislite.asyncio.Redis.create(filename)
+        s = await redislite.asyncio.Redis.create(filename)
+        self.assertEqual(r.pid, s.pid)
+        await r.set('key', 'value')
+        self.assertEqual(await s.get('key'), b'value')
+
+        pid = r.pid
+        await r.aclose()
+        self.assertTrue(psutil.Process(pid).is_running())
+        await s.aclose()
+        self.assertTrue(os.path.exists(filename))
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+        shutil.rmtree(temp_dir)
+
+    async def test_redislite_asyncio_Redis_shared_with_sync(self):
+        r = await redislite.asyncio.Redis.create()
+        s = redislite.Redis(r.db)
+        self.assertEqual(r.pid, s.pid)
+        pid = r.pid
+        await r.aclose()
+        self.assertEqual(s.pid, pid)
+        s._cleanup()
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+
+    async def test_redislite_asyncio_Redis_from_template(self):
+        temp_dir = tempfile.mkdtemp()
+        template = os.path.join(temp_dir, 'template.db')
+        r = await redislite.asyncio.Redis.create(template)
+        await r.set('key', 'value')
+        await r.aclose()
+
+        t = await redislite.asyncio.Redis.from_template(template)
+        self.assertEqual(await t.get('key'), b'value')
+        self.assertIn('clone', t.timings)
+        await t.aclose()
+        shutil.rmtree(temp_dir)
+
+    async def test_redislite_asyncio_Redis_cleanup_without_aclose(self):
+        r = await redislite.asyncio.Redis.create()
+        await r.set('key', 'value')
+        pid = r.pid
+        redis_dir = r.redis_dir
+        r._cleanup()
+        self.assertFalse(os.path.exists(redis_dir))
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+        await r.connection_pool.disconnect()
+
+    async def test_redislite_asyncio_Redis_requirepass(self):
+        r = await redislite.asyncio.Redis.create(
+            serverconfig={'requirepass': 'secret'}, password='secret'
+        )
+        self.assertTrue(await r.set('key', 'value'))
+        pid = r.pid
+        redis_dir = r.redis_dir
+        await r.aclose()
+        self.assertFalse(os.path.exists(redis_dir))
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main(verbosity=2)
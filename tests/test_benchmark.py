@@ -0,0 +1,54 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.benchmark` module.
+"""
+from __future__ import print_function
+import contextlib
+import io
+import json
+import logging
+import redislite.benchmark
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteBenchmark(unittest.TestCase):
+
+    def test_run(self):
+        result = redislite.benchmark.run(
+            io_threads=1, clients=2, requests=100, pipeline=10
+        )
+        self.assertEqual(result['io_threads'], 1)
+        self.assertEqual(result['requests'], 200)
+        self.assertGreater(result['requests_per_second'], 0)
+
+    def test_compare(self):
+        results = redislite.benchmark.compare(clients=1, requests=10)
+        self.assertEqual([result['io_threads'] for result in results], [1])
+        text = redislite.benchmark.format_results(results)
+        self.assertIn('1 clients', text)
+        self.assertIn('Requests/s', text)
+
+    def test_main_json(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            redislite.benchmark.main([
+                '--clients', '1', '--requests', '10', '--io-threads', '2',
+                '--json'
+            ])
+        results = json.loads(output.getvalue())
+        self.assertEqual(results[0]['io_threads'], 2)
+        self.assertEqual(results[0]['requests'], 10)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteBenchmark
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
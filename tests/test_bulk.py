@@ -0,0 +1,105 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.bulk` module.
+"""
+from __future__ import print_function
+import logging
+import redis
+import redislite
+import redislite.bulk
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = redislite.Redis()
+
+    def tearDown(self):
+        self.redis._cleanup()
+
+    def test_encode_command(self):
+        self.assertEqual(
+            redislite.bulk.encode_command(['SET', b'k\xff', 10, 1.5]),
+            b'*4\r\n$3\r\nSET\r\n$2\r\nk\xff\r\n$2\r\n10\r\n$3\r\n1.5\r\n'
+        )
+
+    def test_reply_parser(self):
+        parser = redislite.bulk._ReplyParser()
+        self.assertEqual(parser.feed(b'+OK\r\n:1\r\n$3\r\nab'), [None, None])
+        self.assertEqual(parser.feed(b'c\r\n$-1\r\n*2\r\n-ERR x\r\n'), [
+            None, None
+        ])
+        self.assertEqual(parser.feed(b':1\r\n-ERR y\r\n'), ['ERR x', 'ERR y'])
+        with self.assertRaises(redis.InvalidResponse):
+            parser.feed(b'?\r\n')
+
+    def test_load(self):
+        stats = redislite.bulk.load(
+            (('key%d' % i, i) for i in range(20000)), self.redis,
+            command='SET', buffer_size=4096, max_pending=100
+        )
+        self.assertEqual(stats['commands'], 20000)
+        self.assertEqual(stats['errors'], 0)
+        self.assertGreater(stats['bytes'], 20000 * 20)
+        self.assertGreater(stats['commands_per_second'], 0)
+        self.assertEqual(self.redis.dbsize(), 20000)
+        self.assertEqual(self.redis.get('key19999'), b'19999')
+
+    def test_load_commands(self):
+        redislite.bulk.load([
+            ('RPUSH', 'list', 'a', 'b'), ('HSET', 'hash', 'field', 'value'),
+            ('GET', 'list'), ('SADD', 'set', b'\x00\xff'),
+        ], self.redis, raise_on_error=False)
+        self.assertEqual(self.redis.lrange('list', 0, -1), [b'a', b'b'])
+        self.assertEqual(self.redis.hget('hash', 'field'), b'value')
+        self.assertEqual(self.redis.smembers('set'), {b'\x00\xff'})
+
+    def test_load_errors(self):
+        self.redis.rpush('list', 'a')
+        commands = [('SET', 'a', 1), ('INCR', 'list'), ('SET', 'b', 2)]
+        stats = redislite.bulk.load(commands, self.redis, raise_on_error=False)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['error_messages'][0][0], 1)
+        self.assertTrue(stats['error_messages'][0][1].startswith('WRONGTYPE'))
+        self.assertEqual(self.redis.get('b'), b'2')
+        with self.assertRaises(redis.ResponseError):
+            redislite.bulk.load(commands, self.redis)
+
+    def test_load_db(self):
+        connection = redislite.Redis(self.redis.db, db=2)
+        stats = redislite.bulk.load(
+            [('SET', 'key', 'value'), ('LPUSH', 'key', 'x')], connection,
+            raise_on_error=False
+        )
+        self.assertEqual(stats['commands'], 2)
+        self.assertEqual(stats['error_messages'][0][0], 1)
+        self.assertEqual(connection.get('key'), b'value')
+        self.assertIsNone(self.redis.get('key'))
+        connection._cleanup()
+
+    def test_load_password(self):
+        connection = redislite.Redis(
+            serverconfig={'requirepass': 'secret'}, password='secret', db=1
+        )
+        stats = redislite.bulk.load(
+            [('SET', 'key', 'value'), ('LPUSH', 'key', 'x')], connection,
+            raise_on_error=False
+        )
+        self.assertEqual(stats['commands'], 2)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['error_messages'][0][0], 1)
+        self.assertEqual(connection.get('key'), b'value')
+        connection._cleanup()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(TestRedisliteBulk)
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
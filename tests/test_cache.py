@@ -0,0 +1,167 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.cache` module.
+"""
+from __future__ import print_function
+import logging
+import redislite
+import redislite.instrumentation
+import time
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = redislite.Redis(client_cache=True)
+
+    def tearDown(self):
+        self.redis._cleanup()
+
+    def wait_for_invalidation(self, key, value):
+        # Changes made by other clients are seen once the invalidation
+        # message arrives
+        for _ in range(100):
+            if self.redis.get(key) == value:
+                return
+            time.sleep(.01)
+        self.fail('The cached read of %r was not invalidated' % key)
+
+    def test_cache_hit(self):
+        self.redis.set('key', 'value')
+        self.assertEqual(self.redis.get('key'), b'value')
+        self.assertEqual(self.redis.get('key'), b'value')
+        self.assertIsNone(self.redis.get('missing'))
+        self.assertIsNone(self.redis.get('missing'))
+        stats = self.redis.client_cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['hit_ratio'], .5)
+
+    def test_cache_own_writes(self):
+        self.redis.set('key', 'value')
+        self.redis.hset('hash', mapping={'field': 'value'})
+        self.assertEqual(self.redis.get('key'), b'value')
+        self.assertEqual(self.redis.hgetall('hash'), {b'field': b'value'})
+        self.redis.set('key', 'changed')
+        self.redis.pipeline().hset('hash', 'field', 'changed').execute()
+        self.assertEqual(self.redis.get('key'), b'changed')
+        self.assertEqual(self.redis.hget('hash', 'field'), b'changed')
+        self.assertEqual(self.redis.hgetall('hash'), {b'field': b'changed'})
+        self.redis.flushall()
+        self.assertIsNone(self.redis.get('key'))
+
+    def test_cache_other_client_writes(self):
+        other = redislite.Redis(self.redis.db)
+        self.redis.set('key', 'value')
+        self.assertEqual(self.redis.get('key'), b'value')
+        other.set('key', 'changed')
+        self.wait_for_invalidation('key', b'changed')
+        other.delete('key')
+        self.wait_for_invalidation('key', None)
+        other._cleanup()
+        self.assertGreaterEqual(
+            self.redis.client_cache.stats()['invalidations'], 2
+        )
+
+    def test_cache_mget(self):
+        self.redis.mset({'a': '1', 'b': '2'})
+        self.assertEqual(self.redis.get('a'), b'1')
+        self.assertEqual(self.redis.mget('a', 'b', 'c'), [b'1', b'2', None])
+        self.assertEqual(self.redis.mget(['a', 'b']), [b'1', b'2'])
+        stats = self.redis.client_cache.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 3)
+
+    def test_cache_limits(self):
+        self.redis.enable_client_cache(max_entries=2)
+        for key in ['a', 'b', 'c']:
+            self.redis.get(key)
+        stats = self.redis.client_cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['evictions'], 1)
+
+        self.redis.enable_client_cache(max_bytes=1000)
+        self.redis.set('big', 'x' * 2000)
+        self.redis.get('big')
+        self.redis.get('small')
+        self.assertEqual(self.redis.client_cache.stats()['entries'], 1)
+
+    def test_cache_ttl(self):
+        self.redis.enable_client_cache(ttl=.05)
+        self.redis.get('key')
+        time.sleep(.1)
+        self.redis.get('key')
+        stats = self.redis.client_cache.stats()
+        self.assertEqual(stats['expirations'], 1)
+        self.assertEqual(stats['hits'], 0)
+
+    def test_cache_bcast_prefixes(self):
+        other = redislite.Redis(self.redis.db)
+        self.redis.enable_client_cache(bcast=True, prefixes=['flag:'])
+        self.redis.set('flag:a', 'on')
+        self.redis.set('other', 'value')
+        self.assertEqual(self.redis.get('flag:a'), b'on')
+        self.assertEqual(self.redis.get('other'), b'value')
+        self.assertEqual(self.redis.client_cache.stats()['entries'], 1)
+        other.set('flag:a', 'off')
+        self.wait_for_invalidation('flag:a', b'off')
+        other._cleanup()
+
+    def test_cache_decode_responses(self):
+        connection = redislite.Redis(
+            self.redis.db, decode_responses=True, client_cache=True
+        )
+        connection.set('key', 'value')
+        self.assertEqual(connection.get('key'), 'value')
+        self.assertEqual(connection.get('key'), 'value')
+        connection._cleanup()
+
+    def test_cache_db(self):
+        connection = redislite.Redis(self.redis.db, db=3, client_cache=True)
+        connection.set('key', 'value')
+        self.redis.set('key', 'other')
+        self.assertEqual(connection.get('key'), b'value')
+        self.assertEqual(connection.get('key'), b'value')
+        self.assertEqual(connection.client_cache.stats()['hits'], 1)
+        connection.set('key', 'changed')
+        self.assertEqual(connection.get('key'), b'changed')
+        connection._cleanup()
+
+    def test_cache_password(self):
+        connection = redislite.Redis(
+            serverconfig={'requirepass': 'secret'}, password='secret',
+            client_cache=True
+        )
+        connection.set('key', 'value')
+        self.assertEqual(connection.get('key'), b'value')
+        self.assertEqual(connection.get('key'), b'value')
+        self.assertEqual(connection.client_cache.stats()['hits'], 1)
+        connection._cleanup()
+
+    def test_disable_client_cache(self):
+        sink = redislite.instrumentation.MemorySink()
+        self.redis.instrument(sink)
+        self.redis.set('key', 'value')
+        self.redis.disable_client_cache()
+        self.assertIsNone(self.redis.client_cache)
+        self.assertNotIn('get', self.redis.__dict__)
+        self.redis.get('key')
+        commands = sink.stats()['commands']
+        self.assertEqual(commands['SET']['calls'], 1)
+        self.assertEqual(commands['GET']['calls'], 1)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteCache
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
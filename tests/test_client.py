@@ -5,17 +5,21 @@
 Tests for `redislite.client` module.
 """
 from __future__ import print_function
+import gc
 import getpass
 import inspect
 import logging
 import os
 import psutil
+import redis
 import redislite
 import shutil
+import signal
 import stat
 import tempfile
 import time
 import unittest
+import weakref
 from redis.exceptions import ConnectionError
 
 
@@ -123,6 +127,117 @@ class TestRedisliteClient(unittest.TestCase):
         self.assertTrue(os.path.exists(filename))
         shutil.rmtree(temp_dir)
 
+    def test_redislite_Redis_from_template(self):
+        temp_dir = tempfile.mkdtemp()
+        template = os.path.join(temp_dir, 'template.db')
+        r = redislite.Redis(template)
+        r.set('key', 'value')
+        r.save()
+        r._cleanup()
+
+        t1 = redislite.Redis.from_template(template)
+        t2 = redislite.StrictRedis.from_template(template)
+        self.assertNotEqual(t1.db, template)
+        self.assertTrue(t1.db.startswith(t1.redis_dir))
+        self.assertEqual(t1.get('key'), b'value')
+        self.assertIn('clone', t1.timings)
+        self.assertIn('load', t1.timings)
+
+        t1.set('key', 'other')
+        self.assertEqual(t2.get('key'), b'value')
+        t1._cleanup()
+        t2._cleanup()
+
+        r = redislite.Redis(template)
+        self.assertEqual(r.get('key'), b'value')
+        r._cleanup()
+        shutil.rmtree(temp_dir)
+
+    def test_redislite_Redis_template_db_file_exists(self):
+        temp_dir = tempfile.mkdtemp()
+        template = os.path.join(temp_dir, 'template.db')
+        filename = os.path.join(temp_dir, 'redis.db')
+        for name in [template, filename]:
+            with open(name, 'wb'):
+                pass
+        with self.assertRaises(redislite.client.RedisLiteException):
+            redislite.Redis(filename, template=template)
+        shutil.rmtree(temp_dir)
+
+    def test_redislite_Redis_shutdown_save_default(self):
+        r = redislite.Redis()
+        s = redislite.Redis(r.db)
+        self.assertEqual(r._shutdown_save_mode(), 'nosave')
+        self.assertEqual(s._shutdown_save_mode(), 'nosave')
+        s._cleanup()
+        r._cleanup()
+
+        temp_dir = tempfile.mkdtemp()
+        r = redislite.Redis(os.path.join(temp_dir, 'redis.db'))
+        self.assertEqual(r._shutdown_save_mode(), 'save')
+        r._cleanup()
+        shutil.rmtree(temp_dir)
+
+    def test_redislite_Redis_shutdown_save(self):
+        temp_dir = tempfile.mkdtemp()
+        filename = os.path.join(temp_dir, 'redis.db')
+        for shutdown_save, saved in [
+            ('nosave', False), ('bgsave', True), ('save', True)
+        ]:
+            if os.path.exists(filename):
+                os.remove(filename)
+            r = redislite.Redis(filename, shutdown_save=shutdown_save)
+            r.set('key', 'value')
+            r._cleanup()
+            self.assertEqual(os.path.exists(filename), saved)
+            r = redislite.Redis(filename)
+            self.assertEqual(r.get('key'), b'value' if saved else None)
+            r._cleanup()
+        shutil.rmtree(temp_dir)
+
+    def test_redislite_Redis_shutdown_save_invalid(self):
+        with self.assertRaises(redislite.client.RedisLiteException):
+            redislite.Redis(shutdown_save='sometimes')
+
+    def test_redislite_Redis_profile(self):
+        r = redislite.Redis(
+            profile='cache', serverconfig={'maxmemory-policy': 'allkeys-lfu'}
+        )
+        self.assertEqual(r.config_get('save')['save'], '')
+        self.assertEqual(
+            r.config_get('maxmemory-policy')['maxmemory-policy'],
+            'allkeys-lfu'
+        )
+        r._cleanup()
+
+    def test_redislite_Redis_profile_unknown(self):
+        with self.assertRaises(redislite.client.RedisLiteException):
+            redislite.Redis(profile='unknown')
+
+    def test_redislite_Redis_memory_budget(self):
+        r = redislite.Redis(profile='ephemeral', memory_budget=1024 * 1024)
+        self.assertEqual(
+            r.config_get('maxmemory')['maxmemory'], str(1024 * 1024)
+        )
+        stats = r.eviction_stats()
+        self.assertEqual(stats['maxmemory'], 1024 * 1024)
+        self.assertEqual(stats['evicted_keys'], 0)
+        r._cleanup()
+
+    def test_redislite_Redis_memory_budget_invalid(self):
+        with self.assertRaises(redislite.client.RedisLiteException):
+            redislite.Redis(memory_budget=2.0)
+
+    def test_redislite_Redis_concurrency(self):
+        r = redislite.Redis(concurrency=64)
+        self.assertEqual(
+            r.config_get('io-threads')['io-threads'],
+            redislite.configuration.io_thread_settings(64)['io-threads']
+        )
+        r._cleanup()
+        with self.assertRaises(redislite.client.RedisLiteException):
+            redislite.Redis(concurrency=-1)
+
     def test_redislite_Redis_multiple_connections(self):
         # Generate a new redis server
         r = redislite.Redis()
@@ -144,6 +259,55 @@ class TestRedisliteClient(unittest.TestCase):
         r._cleanup()
         self.assertIsNone(r.socket_file)
 
+    def test_redislite_Redis_garbage_collected(self):
+        r = redislite.Redis()
+        self._log_redis_pid(r)
+        pid = r.pid
+        reference = weakref.ref(r)
+        del r
+        gc.collect()
+        self.assertIsNone(reference())
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+
+    def test_redislite_cleanup_instances(self):
+        r = redislite.Redis()
+        s = redislite.Redis()
+        pids = [r.pid, s.pid]
+        sockets = [r.socket_file, s.socket_file]
+        shutdown_timings = redislite.client._cleanup_instances()
+        for pid in pids:
+            with self.assertRaises(psutil.NoSuchProcess):
+                psutil.Process(pid)
+        self.assertIsNone(r.socket_file)
+        self.assertIsNone(s.socket_file)
+        for socket_file in sockets:
+            self.assertIn(socket_file, shutdown_timings)
+        self.assertIn('shutdown', r.timings)
+
+    def test_redislite_cleanup_instances_timeout(self):
+        r = redislite.Redis()
+        pid = r.pid
+        # A stopped server never answers the shutdown command
+        os.kill(pid, signal.SIGSTOP)
+        start = time.time()
+        redislite.client._cleanup_instances(timeout=1)
+        self.assertLess(time.time() - start, 5)
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+
+    def test_redislite_cleanup_instances_deadline(self):
+        r = redislite.Redis()
+        pid = r.pid
+        socket_file = r.socket_file
+        os.kill(pid, signal.SIGSTOP)
+        # The cleanup isn't given up before the deadline
+        shutdown_timings = redislite.client._cleanup_instances(timeout=7)
+        self.assertIn(socket_file, shutdown_timings)
+        self.assertGreater(shutdown_timings[socket_file], 6)
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+
     def test_redislite_Redis_create_redis_directory_tree(self):
         r = redislite.Redis()
         self._log_redis_pid(r)
@@ -192,6 +356,47 @@ class TestRedisliteClient(unittest.TestCase):
         self.assertTrue(r.pidfile)
         self.assertGreater(r.pid, 0)
 
+    def test_redislite_Redis_supervised(self):
+        r = redislite.Redis()
+        self._log_redis_pid(r)
+        self.assertEqual(psutil.Process(r.pid).ppid(), os.getpid())
+        pid = r.pid
+        r._cleanup()
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+
+    def test_redislite_Redis_pid_after_exit(self):
+        r = redislite.Redis()
+        self._log_redis_pid(r)
+        pid = r.pid
+        os.kill(pid, 9)
+        time.sleep(.1)
+        self.assertEqual(r.pid, 0)
+        r._cleanup()
+
+    def test_redislite_Redis_pid_attached(self):
+        test_db = 'test_pid_attached.db'
+        r = redislite.Redis(test_db)
+        r2 = redislite.Redis(test_db)
+        self._log_redis_pid(r)
+        self.assertEqual(r2.pid, r.pid)
+        server_process = redislite.client._server_processes[r.socket_file]
+        self.assertEqual(server_process.pid, r.pid)
+        self.assertTrue(server_process.is_running())
+        r2._cleanup()
+        r._cleanup()
+        self.assertNotIn(r.socket_file, redislite.client._server_processes)
+        if os.path.exists(test_db):
+            os.remove(test_db)
+
+    def test_redislite_Redis_daemonized(self):
+        r = redislite.Redis(serverconfig={'daemonize': 'yes'})
+        self._log_redis_pid(r)
+        self.assertNotEqual(psutil.Process(r.pid).ppid(), os.getpid())
+        r.set('key', 'value')
+        self.assertEqual(r.get('key'), b'value')
+        r._cleanup()
+
     def test_redislite_db_file_cwd_args(self):
         test_db = 'test_unit_redis.db'
         if os.path.exists(test_db):
@@ -283,6 +488,134 @@ class TestRedisliteClient(unittest.TestCase):
         s = redislite.Redis(r.db)
         self.assertEqual(r._connection_count(), 2)
 
+    def test_connection_count_cleanup(self):
+        r = redislite.Redis()
+        self._log_redis_pid(r)
+        s = redislite.Redis(r.db)
+        refcount_file = r._refcount_file
+        s._cleanup()
+        s._cleanup()
+        self.assertEqual(r._connection_count(), 1)
+        r._cleanup()
+        self.assertFalse(os.path.exists(refcount_file))
+
+    def test_connection_count_exited_process(self):
+        r = redislite.Redis()
+        pid = os.fork()
+        if not pid:  # pragma: no cover
+            # Attach and exit without cleaning up, like a crashed process
+            try:
+                connection = redislite.Redis(r.db)
+                connection.ping()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(r._connection_count(), 1)
+        server_process = redislite.client._get_server_process(
+            r.socket_file, r.pidfile
+        )
+        r._cleanup()
+        self.assertTrue(server_process.wait(timeout=10))
+
+    def test_server_process_in_forked_process(self):
+        r = redislite.Redis()
+        server_process = redislite.client._get_server_process(
+            r.socket_file, r.pidfile
+        )
+        pid = os.fork()
+        if not pid:  # pragma: no cover
+            # The forked process can't reap the server started by its parent
+            status = 1
+            try:
+                if server_process.is_running() and \
+                        not server_process.wait(timeout=0):
+                    status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(status, 0)
+        self.assertTrue(server_process.is_running())
+        r._cleanup()
+
+    def test_registry_removed_by_last_client(self):
+        temp_dir = tempfile.mkdtemp()
+        filename = os.path.join(temp_dir, 'redis.db')
+        r = redislite.Redis(filename)
+        self._log_redis_pid(r)
+        s = redislite.Redis(filename)
+        self.assertTrue(os.path.exists(r.settingregistryfile))
+        r._cleanup()
+        self.assertTrue(os.path.exists(s.settingregistryfile))
+        s._cleanup()
+        self.assertFalse(os.path.exists(filename + '.settings'))
+        shutil.rmtree(temp_dir)
+
+    def test_registry_settings_cached(self):
+        temp_dir = tempfile.mkdtemp()
+        filename = os.path.join(temp_dir, 'redis.db')
+        r = redislite.Redis(filename)
+        settings = redislite.client._registry_settings[r.settingregistryfile]
+        self.assertEqual(settings['unixsocket'], r.socket_file)
+        s = redislite.Redis(filename)
+        self.assertEqual(s.socket_file, r.socket_file)
+        s._cleanup()
+        r._cleanup()
+        self.assertNotIn(
+            filename + '.settings', redislite.client._registry_settings
+        )
+        shutil.rmtree(temp_dir)
+
+    def test_shared_pool(self):
+        temp_dir = tempfile.mkdtemp()
+        filename = os.path.join(temp_dir, 'redis.db')
+        r = redislite.Redis(filename, shared_pool=True)
+        pool = r.connection_pool
+        for _ in range(10):
+            s = redislite.Redis(filename, shared_pool=True)
+            self.assertIs(s.connection_pool, pool)
+            s.set('key', 'value')
+            s._cleanup()
+        self.assertEqual(len(r.client_list()), 1)
+
+        # Different connection settings get a different pool
+        s = redislite.Redis(
+            filename, shared_pool=True, decode_responses=True
+        )
+        self.assertIsNot(s.connection_pool, pool)
+        self.assertEqual(s.get('key'), 'value')
+        s = redislite.Redis(filename)
+        self.assertIsNot(s.connection_pool, pool)
+        s._cleanup()
+        r._cleanup()
+        self.assertEqual(redislite.client._shared_pools, {})
+        shutil.rmtree(temp_dir)
+
+    def test_shared_pool_options(self):
+        temp_dir = tempfile.mkdtemp()
+        filename = os.path.join(temp_dir, 'redis.db')
+        r = redislite.Redis(filename, shared_pool={
+            'blocking': True, 'max_connections': 2, 'timeout': .1, 'warm': 2
+        })
+        self.assertIsInstance(r.connection_pool, redis.BlockingConnectionPool)
+        self.assertEqual(len(r.client_list()), 2)
+        s = redislite.Redis(filename, shared_pool=True)
+        self.assertIs(s.connection_pool, r.connection_pool)
+        connections = [
+            r.connection_pool.get_connection() for _ in range(2)
+        ]
+        with self.assertRaises(redis.ConnectionError):
+            s.ping()
+        for connection in connections:
+            r.connection_pool.release(connection)
+        self.assertTrue(s.ping())
+        s._cleanup()
+        r._cleanup()
+        shutil.rmtree(temp_dir)
+
+    def test_shared_pool_invalid(self):
+        with self.assertRaises(redislite.client.RedisLiteException):
+            redislite.Redis(shared_pool='yes')
+
     def test_connection_fallthrough(self):
         """
         Create a connection with an argument that will cause redislite
@@ -0,0 +1,81 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.cluster` module.
+"""
+from __future__ import print_function
+import logging
+import os
+import redis.cluster
+import redislite
+import redislite.cluster
+import shutil
+import tempfile
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteCluster(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_slot_ranges(self):
+        self.assertEqual(
+            redislite.cluster._slot_ranges(3),
+            [(0, 5461), (5462, 10922), (10923, 16383)]
+        )
+        self.assertEqual(redislite.cluster._slot_ranges(1), [(0, 16383)])
+
+    def test_cluster(self):
+        cluster = redislite.Cluster(nodes=3)
+        self.assertIsInstance(cluster, redis.cluster.RedisCluster)
+        self.assertEqual(len(cluster.servers), 3)
+        self.assertEqual(len(cluster.get_primaries()), 3)
+        for index in range(100):
+            cluster.set('key%d' % index, index)
+        self.assertEqual(cluster.get('key42'), b'42')
+        sizes = [server.dbsize() for server in cluster.servers]
+        self.assertEqual(sum(sizes), 100)
+        self.assertTrue(all(sizes))
+
+        servers = cluster.servers
+        cluster.close()
+        self.assertEqual(cluster.servers, [])
+        for server in servers:
+            self.assertFalse(server.running)
+
+    def test_cluster_dbdir(self):
+        dbdir = os.path.join(self.tempdir, 'cluster')
+        cluster = redislite.Cluster(nodes=2, dbdir=dbdir)
+        cluster.mset_nonatomic({'key%d' % index: index for index in range(20)})
+        cluster.close()
+        self.assertTrue(os.path.exists(os.path.join(dbdir, 'node-0.db')))
+        self.assertTrue(os.path.exists(os.path.join(dbdir, 'node-1.conf')))
+
+        # The restarted cluster keeps its data and slot assignment
+        cluster = redislite.Cluster(nodes=2, dbdir=dbdir)
+        self.assertEqual(cluster.get('key7'), b'7')
+        self.assertEqual(
+            sum(server.dbsize() for server in cluster.servers), 20
+        )
+        cluster._cleanup()
+
+    def test_cluster_invalid_nodes(self):
+        with self.assertRaises(redislite.client.RedisLiteException):
+            redislite.Cluster(nodes=0)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteCluster
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
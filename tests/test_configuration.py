@@ -112,6 +112,128 @@ class TestRedisliteConfiguration(unittest.TestCase):
         )
 
 
+    def test_configuration_settings_profile(self):
+        result = redislite.configuration.settings(profile='cache')
+        self.assertEqual(result['save'], '""')
+        self.assertEqual(result['maxmemory-policy'], 'allkeys-lru')
+        self.assertEqual(result['daemonize'], 'yes')
+
+    def test_configuration_settings_profile_override(self):
+        result = redislite.configuration.settings(
+            profile='durable-aof', appendfsync='always'
+        )
+        self.assertEqual(result['appendonly'], 'yes')
+        self.assertEqual(result['appendfsync'], 'always')
+
+    def test_configuration_settings_profile_unknown(self):
+        with self.assertRaises(ValueError):
+            redislite.configuration.settings(profile='unknown')
+
+    def test_configuration_config_profile(self):
+        result = redislite.configuration.config(profile='ephemeral')
+        self.assertIn('\nsave ""\n', result)
+        self.assertNotIn('save 900 1', result)
+
+    def test_configuration_memory_limit(self):
+        limit = redislite.configuration.memory_limit()
+        self.assertGreater(limit, 0)
+        self.assertLessEqual(limit, psutil.virtual_memory().total)
+
+    def test_configuration_memory_settings(self):
+        result = redislite.configuration.memory_settings(
+            1000, {'save': '""', 'appendonly': 'no'}
+        )
+        self.assertEqual(result['maxmemory'], '1000')
+        self.assertEqual(result['maxmemory-policy'], 'allkeys-lfu')
+
+        # Persistent servers leave headroom for copy-on-write
+        result = redislite.configuration.memory_settings(
+            1000, redislite.configuration.settings(profile='durable-rdb')
+        )
+        self.assertEqual(result['maxmemory'], '750')
+        self.assertEqual(result['maxmemory-policy'], 'noeviction')
+
+    def test_configuration_memory_settings_fraction(self):
+        result = redislite.configuration.memory_settings(.5)
+        self.assertEqual(
+            int(result['maxmemory']),
+            int(redislite.configuration.memory_limit() * .5)
+        )
+
+    def test_configuration_memory_settings_invalid(self):
+        for memory_budget in [1.5, 0.0, -1, '1gb']:
+            with self.assertRaises(ValueError):
+                redislite.configuration.memory_settings(memory_budget)
+
+    def test_configuration_settings_memory_budget(self):
+        result = redislite.configuration.settings(
+            profile='cache', memory_budget=2048, maxmemory='1024'
+        )
+        self.assertEqual(result['maxmemory'], '1024')
+        self.assertEqual(result['maxmemory-policy'], 'allkeys-lru')
+
+    def test_configuration_cpu_limit(self):
+        limit = redislite.configuration.cpu_limit()
+        self.assertGreater(limit, 0)
+        self.assertLessEqual(limit, len(os.sched_getaffinity(0)))
+
+    def test_configuration_cpu_limit_cgroup(self):
+        cpu_max = os.path.join(self.tempdir, 'cpu.max')
+        quota = os.path.join(self.tempdir, 'cpu.cfs_quota_us')
+        period = os.path.join(self.tempdir, 'cpu.cfs_period_us')
+        missing = os.path.join(self.tempdir, 'missing')
+        with open(quota, 'w') as file_handle:
+            file_handle.write('50000\n')
+        with open(period, 'w') as file_handle:
+            file_handle.write('100000\n')
+        cgroup_cpu_files = redislite.configuration._cgroup_cpu_files
+        try:
+            redislite.configuration._cgroup_cpu_files = lambda: [
+                (missing, missing), (quota, period)
+            ]
+            self.assertEqual(redislite.configuration.cpu_limit(), .5)
+            redislite.configuration._cgroup_cpu_files = lambda: [
+                (cpu_max, cpu_max)
+            ]
+            with open(cpu_max, 'w') as file_handle:
+                file_handle.write('max 100000\n')
+            self.assertEqual(
+                redislite.configuration.cpu_limit(),
+                len(os.sched_getaffinity(0))
+            )
+        finally:
+            redislite.configuration._cgroup_cpu_files = cgroup_cpu_files
+
+    def test_configuration_io_thread_settings(self):
+        io_thread_settings = redislite.configuration.io_thread_settings
+        self.assertEqual(io_thread_settings(64, cpus=1), {
+            'io-threads': '1', 'io-threads-do-reads': 'no'
+        })
+        self.assertEqual(io_thread_settings(64, cpus=4), {
+            'io-threads': '3', 'io-threads-do-reads': 'yes'
+        })
+        self.assertEqual(
+            io_thread_settings(8, cpus=16)['io-threads'], '2'
+        )
+        self.assertEqual(
+            io_thread_settings(1000, cpus=64)['io-threads'], '8'
+        )
+        for concurrency in [0, -1, 1.5, True]:
+            with self.assertRaises(ValueError):
+                io_thread_settings(concurrency)
+
+    def test_configuration_settings_concurrency(self):
+        result = redislite.configuration.settings(concurrency=1)
+        self.assertEqual(result['io-threads'], '1')
+        result = redislite.configuration.settings(
+            concurrency=64, **{'io-threads': '2'}
+        )
+        self.assertEqual(result['io-threads'], '2')
+        self.assertIn(
+            '\nio-threads ',
+            redislite.configuration.config(concurrency=16)
+        )
+
     def test_configuration_config_db(self):
         pidfile = os.path.join(self.tempdir, 'test.pid')
         unixsocket = os.path.join(self.tempdir, 'redis.socket')
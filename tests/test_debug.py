@@ -20,6 +20,26 @@ class TestRedisliteDebug(unittest.TestCase):
         import redislite.debug
         redislite.debug.print_debug_info()
 
+    def test_command_stats(self):
+        import redislite.debug
+        import redislite.instrumentation
+        sink = redislite.instrumentation.MemorySink()
+        connection = redislite.Redis(instrument=[sink])
+        connection.set('key', 'value')
+        connection.pipeline().get('key').get('key').execute()
+        connection._cleanup()
+        self.assertEqual(
+            redislite.debug.command_stats(sink)['commands']['SET']['calls'], 1
+        )
+        lines = redislite.debug.command_stats_list(sink)
+        self.assertTrue(lines[0].startswith('Command'))
+        self.assertEqual(
+            sorted(line.split()[0] for line in lines[1:3]),
+            ['PIPELINE', 'SET']
+        )
+        self.assertTrue(lines[-1].startswith('Pipeline batch sizes'))
+        redislite.debug.print_command_stats(sink)
+
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG)
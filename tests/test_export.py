@@ -0,0 +1,132 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.export` module.
+"""
+from __future__ import print_function
+import contextlib
+import csv
+import io
+import json
+import logging
+import os
+import redislite
+import redislite.export
+import shutil
+import tempfile
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.dbfilename = os.path.join(self.tempdir, 'redis.db')
+        self.redis = redislite.Redis(self.dbfilename)
+        pipe = self.redis.pipeline(transaction=False)
+        for index in range(300):
+            pipe.hset('user:%d' % index, mapping={'name': 'user%d' % index})
+        pipe.set('string', 'value', px=100000)
+        pipe.set('binary', b'\xff\x00')
+        pipe.rpush('list', 'a', 'b', 'a')
+        pipe.sadd('set', 'y', 'x')
+        pipe.zadd('zset', {'a': 1.5, 'b': 2})
+        pipe.xadd('stream', {'field': 'value'}, id='1-1')
+        pipe.execute()
+
+    def tearDown(self):
+        self.redis._cleanup()
+        shutil.rmtree(self.tempdir)
+
+    def test_iter_rows(self):
+        rows = {
+            row['key']: row for row in redislite.export.iter_rows(
+                self.redis, batch_size=20, workers=2
+            )
+        }
+        self.assertEqual(len(rows), 306)
+        self.assertEqual(rows['user:7']['value'], {'name': 'user7'})
+        self.assertEqual(rows['string']['value'], 'value')
+        self.assertGreater(rows['string']['pttl'], 0)
+        self.assertIsNone(rows['list']['pttl'])
+        self.assertEqual(rows['binary']['value'], '\\xff\x00')
+        self.assertEqual(rows['list']['value'], ['a', 'b', 'a'])
+        self.assertEqual(rows['set']['value'], ['x', 'y'])
+        self.assertEqual(rows['zset']['value'], [['a', 1.5], ['b', 2.0]])
+        self.assertEqual(
+            rows['stream']['value'], [['1-1', {'field': 'value'}]]
+        )
+
+    def test_iter_rows_filters(self):
+        rows = list(redislite.export.iter_rows(self.redis, types=['hash']))
+        self.assertEqual(len(rows), 300)
+        rows = list(redislite.export.iter_rows(
+            self.redis, pattern='user:1*', types=['hash', 'set']
+        ))
+        self.assertEqual(len(rows), 111)
+        rows = list(redislite.export.iter_rows(
+            self.redis, types=['set', 'list']
+        ))
+        self.assertEqual(sorted(row['key'] for row in rows), ['list', 'set'])
+
+    def test_export_empty_string(self):
+        self.redis.flushdb()
+        self.redis.set('empty', '')
+        self.redis.set('full', 'x')
+        output = io.StringIO()
+        self.assertEqual(redislite.export.export(self.redis, output), 2)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(
+            sorted((row['key'], row['value']) for row in rows),
+            [('empty', ''), ('full', 'x')]
+        )
+
+    def test_export_csv(self):
+        output = io.StringIO(newline='')
+        count = redislite.export.export(
+            self.redis, output, output_format='csv', pattern='[lz]*'
+        )
+        self.assertEqual(count, 2)
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(
+            sorted(row['key'] for row in rows), ['list', 'zset']
+        )
+        self.assertEqual(
+            json.loads([row for row in rows if row['key'] == 'list'][0][
+                'value'
+            ]),
+            ['a', 'b', 'a']
+        )
+        with self.assertRaises(ValueError):
+            redislite.export.export(self.redis, output, output_format='xml')
+
+    def test_main(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            redislite.export.main([self.dbfilename, '--type', 'string'])
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(
+            sorted(row['key'] for row in rows), ['binary', 'string']
+        )
+
+    def test_main_output_file(self):
+        filename = os.path.join(self.tempdir, 'export.csv')
+        redislite.export.main([
+            self.dbfilename, '--format', 'csv', '--output', filename,
+            '--pattern', 'user:*'
+        ])
+        with open(filename, newline='') as handle:
+            self.assertEqual(len(list(csv.DictReader(handle))), 300)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteExport
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
@@ -0,0 +1,100 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.exporter` module.
+"""
+from __future__ import print_function
+import logging
+import redislite
+import redislite.exporter
+import unittest
+import urllib.error
+import urllib.request
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = redislite.Redis()
+        self.label = '{socket="%s"}' % self.redis.socket_file
+
+    def tearDown(self):
+        self.redis._cleanup()
+
+    def test_render(self):
+        self.redis.set('key', 'value')
+        self.redis.get('key')
+        lines = redislite.exporter.render().splitlines()
+        self.assertIn('redislite_up%s 1' % self.label, lines)
+        self.assertIn('redislite_keyspace_hits_total%s 1' % self.label, lines)
+        self.assertIn('redislite_rdb_last_bgsave_ok%s 1' % self.label, lines)
+        self.assertIn('# TYPE redislite_evicted_keys_total counter', lines)
+        for name in [
+            'redislite_memory_used_bytes', 'redislite_connected_clients',
+            'redislite_latest_fork_seconds', 'redislite_process_open_fds',
+            'redislite_process_resident_memory_bytes'
+        ]:
+            self.assertTrue(
+                [line for line in lines if line.startswith(name + self.label)],
+                name
+            )
+        self.assertTrue([
+            line for line in lines if line.startswith(
+                'redislite_server_duration_seconds{socket="%s",'
+                'phase="spawn"}' % self.redis.socket_file
+            )
+        ])
+
+    def test_render_shared_server(self):
+        connection = redislite.Redis(self.redis.db)
+        lines = redislite.exporter.render().splitlines()
+        connection._cleanup()
+        self.assertEqual(lines.count('redislite_up%s 1' % self.label), 1)
+
+    def test_render_shutdown_timing(self):
+        connection = redislite.Redis()
+        socket_file = connection.socket_file
+        connection._cleanup()
+        text = redislite.exporter.render([connection])
+        self.assertNotIn('redislite_up', text)
+        self.assertIn(
+            'redislite_server_duration_seconds{socket="%s",'
+            'phase="shutdown"}' % socket_file, text
+        )
+
+    def test_escape(self):
+        self.assertEqual(
+            redislite.exporter._labels([('socket', '/tmp/"a"\\b\n')]),
+            '{socket="/tmp/\\"a\\"\\\\b\\n"}'
+        )
+
+    def test_http_server(self):
+        server = redislite.exporter.start_http_server(0)
+        try:
+            url = 'http://127.0.0.1:%d' % server.server_address[1]
+            response = urllib.request.urlopen(url + '/metrics')
+            self.assertEqual(
+                response.headers['Content-Type'],
+                redislite.exporter.CONTENT_TYPE
+            )
+            self.assertIn(
+                'redislite_up%s 1' % self.label, response.read().decode()
+            )
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(url + '/missing')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteExporter
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
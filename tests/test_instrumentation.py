@@ -0,0 +1,112 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.instrumentation` module.
+"""
+from __future__ import print_function
+import logging
+import redis
+import redislite
+import redislite.instrumentation
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = redislite.Redis()
+        self.sink = redislite.instrumentation.MemorySink()
+
+    def tearDown(self):
+        self.redis._cleanup()
+
+    def test_latency_histogram(self):
+        histogram = redislite.instrumentation.LatencyHistogram()
+        for value in range(1, 10001):
+            histogram.record(value)
+        summary = histogram.to_dict()
+        self.assertEqual(summary['count'], 10000)
+        self.assertEqual(summary['min'], 1)
+        self.assertEqual(summary['max'], 10000)
+        for percentile in [50, 90, 99]:
+            self.assertAlmostEqual(
+                summary['p%d' % percentile] / (percentile * 100.0), 1,
+                delta=1 / 16.0
+            )
+        self.assertEqual(histogram.percentile(100), 10000)
+
+    def test_latency_histogram_empty(self):
+        histogram = redislite.instrumentation.LatencyHistogram()
+        self.assertEqual(histogram.to_dict()['p99'], 0)
+
+    def test_instrument(self):
+        self.redis.instrument(self.sink)
+        self.redis.set('key', 'value')
+        self.redis.get('key')
+        self.redis.get('key')
+        commands = self.sink.stats()['commands']
+        self.assertEqual(sorted(commands.keys()), ['GET', 'SET'])
+        self.assertEqual(commands['GET']['calls'], 2)
+        self.assertEqual(commands['GET']['bytes_received'], 10)
+        self.assertEqual(commands['SET']['bytes_sent'], 11)
+        self.assertEqual(commands['GET']['latency']['count'], 2)
+        self.assertGreater(commands['GET']['latency']['max'], 0)
+
+    def test_instrument_errors(self):
+        self.redis.instrument(self.sink)
+        self.redis.set('key', 'value')
+        with self.assertRaises(redis.ResponseError):
+            self.redis.lpush('key', 'value')
+        self.assertEqual(self.sink.stats()['commands']['LPUSH']['errors'], 1)
+
+    def test_instrument_pipeline(self):
+        self.redis.instrument(self.sink)
+        pipe = self.redis.pipeline()
+        for index in range(10):
+            pipe.set('key%d' % index, 'value')
+        pipe.execute()
+        stats = self.sink.stats()
+        self.assertEqual(stats['commands']['PIPELINE']['calls'], 1)
+        self.assertEqual(stats['commands']['SET']['calls'], 0)
+        self.assertEqual(stats['commands']['SET']['pipelined'], 10)
+        self.assertEqual(stats['pipeline_batch_sizes']['max'], 10)
+
+    def test_uninstrument(self):
+        self.redis.instrument(self.sink)
+        self.redis.instrument(self.sink)
+        self.redis.set('key', 'value')
+        self.redis.uninstrument()
+        self.redis.set('key', 'value')
+        self.assertIsNone(self.redis.instrumentation)
+        self.assertNotIn('execute_command', self.redis.__dict__)
+        self.assertEqual(self.sink.stats()['commands']['SET']['calls'], 1)
+
+    def test_instrument_argument(self):
+        connection = redislite.Redis(instrument=[self.sink])
+        connection.ping()
+        connection._cleanup()
+        self.assertEqual(self.sink.stats()['commands']['PING']['calls'], 1)
+
+    def test_logging_sink(self):
+        log = logging.getLogger('redislite.test.instrumentation')
+        self.redis.instrument(
+            redislite.instrumentation.LoggingSink(log, logging.INFO)
+        )
+        with self.assertLogs(log, logging.INFO) as logs:
+            self.redis.set('key', 'value')
+            self.redis.pipeline().get('key').get('key').execute()
+        self.assertIn('SET: ', logs.output[0])
+        self.assertIn('PIPELINE of 2 commands: ', logs.output[1])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteInstrumentation
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
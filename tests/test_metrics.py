@@ -0,0 +1,102 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.metrics` module.
+"""
+from __future__ import print_function
+import logging
+import redislite
+import redislite.metrics
+import threading
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = redislite.Redis()
+
+    def tearDown(self):
+        self.redis._cleanup()
+
+    def test_metrics(self):
+        metrics = self.redis.metrics()
+        self.assertEqual(
+            sorted(metrics.keys()),
+            [
+                'commandstats', 'info', 'interval', 'latency', 'process',
+                'slowlog', 'time'
+            ]
+        )
+        self.assertIn('used_memory', metrics['info'])
+        self.assertIn('keyspace_hits', metrics['info'])
+        self.assertGreater(metrics['process']['rss'], 0)
+        self.assertGreater(metrics['process']['num_fds'], 0)
+
+    def test_metrics_commandstats_delta(self):
+        collector = redislite.metrics.MetricsCollector(self.redis.socket_file)
+        collector.sample()
+        for index in range(5):
+            self.redis.set('key%d' % index, 'value')
+        stats = collector.sample()['commandstats']
+        collector.stop()
+        self.assertEqual(stats['set']['calls'], 5)
+        self.assertNotIn('ping', stats)
+
+    def test_metrics_slowlog(self):
+        self.redis.config_set('slowlog-log-slower-than', 0)
+        collector = redislite.metrics.MetricsCollector(self.redis.socket_file)
+        collector.sample()
+        self.redis.set('key', 'value')
+        entries = collector.sample()['slowlog']
+        collector.stop()
+        commands = [entry['command'] for entry in entries]
+        self.assertIn(b'SET key value', commands)
+
+    def test_metrics_latency(self):
+        collector = self.redis.start_metrics(latency_threshold=10)
+        self.redis.execute_command('DEBUG', 'SLEEP', '.05')
+        events = collector.sample()['latency']
+        self.assertEqual(events[0]['event'], 'command')
+        self.assertGreaterEqual(events[0]['max_ms'], 50)
+
+    def test_metrics_callback(self):
+        snapshots = []
+        sampled = threading.Event()
+
+        def callback(snapshot):
+            snapshots.append(snapshot)
+            sampled.set()
+
+        self.redis.start_metrics(interval=.1, callback=callback)
+        self.assertTrue(sampled.wait(5))
+        self.assertIs(
+            self.redis.metrics(), self.redis.metrics_collector.snapshot
+        )
+        self.redis.stop_metrics()
+        self.assertIsNone(self.redis.metrics_collector)
+        self.assertIn('used_memory', snapshots[0]['info'])
+
+    def test_metrics_interval_argument(self):
+        sampled = threading.Event()
+        connection = redislite.Redis(
+            metrics_interval=.1, metrics_callback=lambda _: sampled.set()
+        )
+        collector = connection.metrics_collector
+        self.assertTrue(sampled.wait(5))
+        connection._cleanup()
+        self.assertIsNone(connection.metrics_collector)
+        self.assertIsNone(collector._thread)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteMetrics
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
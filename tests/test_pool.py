@@ -0,0 +1,78 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.pool` module.
+"""
+from __future__ import print_function
+import logging
+import os
+import psutil
+import redislite
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedislitePool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = redislite.ServerPool(size=2)
+        self.assertTrue(self.pool.wait(timeout=10))
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_pool_checkout(self):
+        server = self.pool.checkout()
+        self.assertIsInstance(server, redislite.client.RedisMixin)
+        self.assertTrue(server.ping())
+        self.assertTrue(self.pool.wait(timeout=10))
+        self.assertEqual(len(self.pool), 2)
+
+    def test_pool_checkout_serverconfig_mismatch(self):
+        self.assertIsNone(self.pool.checkout({'databases': '2'}))
+
+    def test_pool_checkout_profile_mismatch(self):
+        self.assertIsNone(self.pool.checkout(profile='cache'))
+
+    def test_pool_redis(self):
+        pooled_pids = [server.pid for server in self.pool._idle]
+        r = redislite.StrictRedis(server_pool=self.pool)
+        self.assertIn(r.pid, pooled_pids)
+        r.set('key', 'value')
+        self.assertEqual(r.get('key'), b'value')
+        self.assertEqual(r.keys(), [b'key'])
+        pid = r.pid
+        redis_dir = r.redis_dir
+        r._cleanup()
+        self.assertFalse(os.path.exists(redis_dir))
+        with self.assertRaises(psutil.NoSuchProcess):
+            psutil.Process(pid)
+
+    def test_pool_install(self):
+        self.pool.install()
+        try:
+            pooled_pids = [server.pid for server in self.pool._idle]
+            r = redislite.Redis()
+            self.assertIn(r.pid, pooled_pids)
+            s = redislite.Redis(r.db)
+            self.assertEqual(r.pid, s.pid)
+        finally:
+            self.pool.uninstall()
+        self.assertIsNone(redislite.Redis.server_pool)
+
+    def test_pool_close(self):
+        pids = [server.pid for server in self.pool._idle]
+        self.pool.close()
+        self.assertEqual(len(self.pool), 0)
+        for pid in pids:
+            self.assertFalse(psutil.pid_exists(pid))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(TestRedislitePool)
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
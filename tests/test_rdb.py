@@ -0,0 +1,180 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.rdb` module.
+"""
+from __future__ import print_function
+import logging
+import os
+import redislite
+import redislite.rdb
+import shutil
+import tempfile
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+def rdb_string(value):
+    return bytes([len(value)]) + value
+
+
+def listpack(entries):
+    """
+    Build a listpack with small string and integer entries
+    """
+    data = b''
+    for entry in entries:
+        if isinstance(entry, int) and 0 <= entry < 128:
+            encoded = bytes([entry])
+        elif isinstance(entry, int):
+            encoded = b'\xf1' + entry.to_bytes(2, 'little', signed=True)
+        else:
+            encoded = bytes([0x80 | len(entry)]) + entry
+        data += encoded + bytes([len(encoded)])
+    data += b'\xff'
+    return (len(data) + 6).to_bytes(4, 'little') + \
+        len(entries).to_bytes(2, 'little') + data
+
+
+def rdb_file(records):
+    """
+    Build an rdb file from (type, key, encoded value) tuples
+    """
+    data = b'REDIS0011'
+    for type_code, key, value in records:
+        data += bytes([type_code]) + rdb_string(key) + value
+    return data + b'\xff' + b'\0' * 8
+
+
+# noinspection PyPep8Naming
+class TestRedisliteRdb(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'redis.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, data):
+        with open(self.filename, 'wb') as file_handle:
+            file_handle.write(data)
+
+    def test_parse_server_db(self):
+        connection = redislite.Redis(self.filename)
+        connection.set('string', 'value')
+        connection.set('integer', -12345)
+        connection.set('compressed', 'abc' * 1000)
+        connection.set('expiring', 'value', px=100000)
+        connection.rpush('list', *range(10))
+        connection.rpush('biglist', *['x' * 100 for _ in range(200)])
+        connection.sadd('intset', 1, 2, -5)
+        connection.sadd('bigset', *['m%d' % i for i in range(1000)])
+        connection.hset('hash', mapping={'a': '1', 'b': 'two'})
+        connection.hset(
+            'bighash', mapping={'f%d' % i: 'v' * 100 for i in range(600)}
+        )
+        connection.zadd('zset', {'a': 1.5, 'b': 2})
+        connection.zadd('bigzset', {'m%d' % i: i for i in range(200)})
+        first = connection.xadd('stream', {'a': '1'})
+        connection.xadd('stream', {'b': '2', 'c': '3'})
+        connection.xdel('stream', first)
+        connection.xgroup_create('stream', 'group', id='0')
+        connection.xreadgroup('group', 'consumer', {'stream': '>'})
+        connection.execute_command('SELECT', 1)
+        connection.execute_command('SET', 'other', 'db')
+        connection.execute_command('SELECT', 0)
+        connection.save()
+
+        records = {
+            record.key: record for record in redislite.rdb.parse(self.filename)
+        }
+        self.assertEqual(records[b'string'].value, b'value')
+        self.assertEqual(records[b'integer'].value, b'-12345')
+        self.assertEqual(
+            records[b'compressed'].value, connection.get('compressed')
+        )
+        self.assertGreater(records[b'expiring'].expiry, 0)
+        self.assertIsNone(records[b'string'].expiry)
+        for key in [b'list', b'biglist']:
+            self.assertEqual(records[key].type, 'list')
+            self.assertEqual(records[key].value, connection.lrange(key, 0, -1))
+        for key in [b'intset', b'bigset']:
+            self.assertEqual(records[key].value, connection.smembers(key))
+        for key in [b'hash', b'bighash']:
+            self.assertEqual(records[key].value, connection.hgetall(key))
+        for key in [b'zset', b'bigzset']:
+            self.assertEqual(
+                records[key].value,
+                dict(connection.zrange(key, 0, -1, withscores=True))
+            )
+        self.assertEqual(
+            records[b'stream'].value,
+            [(entry_id, fields) for entry_id, fields in connection.xrange(
+                'stream'
+            )]
+        )
+        self.assertEqual(records[b'other'].db, 1)
+        connection._cleanup()
+
+    def test_parse_filters(self):
+        connection = redislite.Redis(self.filename)
+        connection.set('user:1', 'value')
+        connection.hset('user:2', 'field', 'value')
+        connection.hset('group:1', 'field', 'value')
+        connection.save()
+        connection._cleanup()
+
+        records = list(redislite.rdb.parse(
+            self.filename, pattern='user:*', types=['hash']
+        ))
+        self.assertEqual([record.key for record in records], [b'user:2'])
+        self.assertEqual(
+            len(list(redislite.rdb.parse(self.filename, db=1))), 0
+        )
+        record = redislite.rdb.get(self.filename, 'group:1')
+        self.assertEqual(record.value, {b'field': b'value'})
+        self.assertIsNone(redislite.rdb.get(self.filename, 'missing'))
+
+    def test_parse_listpack_encodings(self):
+        self.write(rdb_file([
+            (16, b'hash', rdb_string(listpack([b'a', 1, b'b', 1000]))),
+            (17, b'zset', rdb_string(listpack([b'm', 5, b'n', b'1.5']))),
+            (20, b'set', rdb_string(listpack([b'x', -200]))),
+            (
+                18, b'list', b'\x02' + b'\x02' + rdb_string(
+                    listpack([b'a', 7])
+                ) + b'\x01' + rdb_string(b'plain')
+            ),
+        ]))
+        records = {
+            record.key: record.value
+            for record in redislite.rdb.parse(self.filename)
+        }
+        self.assertEqual(records[b'hash'], {b'a': b'1', b'b': b'1000'})
+        self.assertEqual(records[b'zset'], {b'm': 5.0, b'n': 1.5})
+        self.assertEqual(records[b'set'], {b'x', b'-200'})
+        self.assertEqual(records[b'list'], [b'a', b'7', b'plain'])
+
+    def test_parse_invalid(self):
+        self.write(b'NOTRDB0009\xff')
+        with self.assertRaises(ValueError):
+            list(redislite.rdb.parse(self.filename))
+        self.write(rdb_file([(0, b'key', rdb_string(b'value'))])[:-12])
+        with self.assertRaises(ValueError):
+            list(redislite.rdb.parse(self.filename))
+        self.write(rdb_file([(6, b'module', b'')]))
+        with self.assertRaises(ValueError):
+            list(redislite.rdb.parse(self.filename))
+        self.write(b'')
+        with self.assertRaisesRegex(ValueError, 'is empty'):
+            list(redislite.rdb.parse(self.filename))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(TestRedisliteRdb)
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
@@ -0,0 +1,163 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.replication` module.
+"""
+from __future__ import print_function
+import logging
+import os
+import redis
+import redislite
+import shutil
+import tempfile
+import unittest
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_calls(connection):
+    return connection.info('commandstats').get(
+        'cmdstat_get', {}
+    ).get('calls', 0)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteReplication(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.dbfilename = os.path.join(self.tempdir, 'redis.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_replica_set(self):
+        connection = redislite.ReplicaSet(self.dbfilename, replicas=2)
+        self.assertEqual(len(connection.replicas), 2)
+        self.assertTrue(connection.set('key', 'value'))
+        self.assertEqual(connection.wait_for_replicas(), 2)
+        for _ in range(4):
+            self.assertEqual(connection.get('key'), b'value')
+        self.assertEqual(
+            [get_calls(replica) for replica in connection.replicas], [2, 2]
+        )
+        self.assertEqual(get_calls(connection), 0)
+        self.assertEqual(
+            connection.info('replication')['connected_slaves'], 2
+        )
+        for replica in connection.replicas:
+            self.assertEqual(
+                replica.config_get('save')['save'], ''
+            )
+            with self.assertRaises(redis.ReadOnlyError):
+                replica.set('key', 'other')
+
+        # Pipelines and writes go to the primary
+        pipe = connection.pipeline()
+        pipe.incr('counter').get('counter')
+        self.assertEqual(pipe.execute(), [1, b'1'])
+        self.assertEqual(get_calls(connection), 1)
+        replicas = connection.replicas
+        connection._cleanup()
+        self.assertEqual(connection.replicas, [])
+        for replica in replicas:
+            self.assertFalse(replica.running)
+        self.assertEqual(
+            redislite.Redis(self.dbfilename).get('key'), b'value'
+        )
+
+    def test_replica_set_scan(self):
+        connection = redislite.ReplicaSet(replicas=2)
+        keys = {('key%d' % index).encode() for index in range(2000)}
+        connection.mset({key: 1 for key in keys})
+        connection.sadd('set', *keys)
+        connection.wait_for_replicas()
+        scanned = list(connection.scan_iter(count=100))
+        self.assertEqual(len(scanned), len(keys) + 1)
+        self.assertEqual(set(scanned), keys | {b'set'})
+        members = list(connection.sscan_iter('set', count=100))
+        self.assertEqual(sorted(members), sorted(keys))
+        connection._cleanup()
+
+    def test_replica_set_password(self):
+        connection = redislite.ReplicaSet(replicas=1)
+        port = int(connection.config_get('port')['port'])
+        with self.assertRaises(redis.AuthenticationError):
+            redis.Redis(
+                host='127.0.0.1', port=port, retry=Retry(NoBackoff(), 0)
+            ).get('key')
+        with self.assertRaises(redis.AuthenticationError):
+            redis.Redis(
+                unix_socket_path=connection.replicas[0].socket_file,
+                retry=Retry(NoBackoff(), 0)
+            ).get('key')
+        connection.set('key', 'value')
+        connection.wait_for_replicas()
+        self.assertEqual(connection.get('key'), b'value')
+        self.assertIn('info', connection.metrics())
+        connection._cleanup()
+
+        connection = redislite.ReplicaSet(replicas=1, password='secret')
+        self.assertEqual(
+            connection.config_get('requirepass')['requirepass'], 'secret'
+        )
+        connection._cleanup()
+
+    def test_replica_set_least_loaded(self):
+        connection = redislite.ReplicaSet(
+            replicas=3, read_from='least-loaded', decode_responses=True
+        )
+        connection.set('key', 'value')
+        connection.wait_for_replicas()
+        for _ in range(6):
+            self.assertEqual(connection.get('key'), 'value')
+        self.assertEqual(
+            [get_calls(replica) for replica in connection.replicas],
+            [2, 2, 2]
+        )
+        self.assertEqual(connection._load, [0, 0, 0])
+        connection._cleanup()
+
+    def test_replica_set_cleanup_during_read(self):
+        connection = redislite.ReplicaSet(replicas=1)
+        replica = connection.replicas[0]
+
+        def cleanup_and_read(*args, **options):
+            connection._cleanup()
+            return b'value'
+
+        replica.execute_command = cleanup_and_read
+        self.assertEqual(connection.get('key'), b'value')
+        self.assertEqual(connection.replicas, [])
+        self.assertEqual(connection._load, [])
+
+    def test_replica_unavailable(self):
+        connection = redislite.ReplicaSet(replicas=1)
+        connection.set('key', 'value')
+        connection.replicas[0]._cleanup()
+        self.assertEqual(connection.get('key'), b'value')
+        self.assertEqual(get_calls(connection), 1)
+        connection._cleanup()
+
+    def test_no_replicas(self):
+        connection = redislite.ReplicaSet(replicas=0)
+        connection.set('key', 'value')
+        self.assertEqual(connection.get('key'), b'value')
+        self.assertEqual(connection.wait_for_replicas(), 0)
+        connection._cleanup()
+
+    def test_invalid_read_from(self):
+        with self.assertRaises(redislite.client.RedisLiteException):
+            redislite.ReplicaSet(read_from='random')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteReplication
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
@@ -0,0 +1,111 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.sharding` module.
+"""
+from __future__ import print_function
+import logging
+import os
+import redis
+import redislite
+import redislite.sharding
+import shutil
+import tempfile
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteSharding(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.redis = redislite.ShardedRedis(shards=3)
+
+    def tearDown(self):
+        self.redis.close()
+        shutil.rmtree(self.tempdir)
+
+    def test_hash_key(self):
+        hash_key = redislite.sharding.hash_key
+        self.assertEqual(hash_key('user:{42}:name'), b'42')
+        self.assertEqual(hash_key(b'{a}{b}'), b'a')
+        self.assertEqual(hash_key('{}key'), b'{}key')
+        self.assertEqual(hash_key('no{tag'), b'no{tag')
+        self.assertEqual(hash_key(7), b'7')
+        self.assertEqual(
+            self.redis.get_shard_index('user:{42}:name'),
+            self.redis.get_shard_index('user:{42}:email')
+        )
+
+    def test_single_key_commands(self):
+        self.assertTrue(self.redis.set('key', 'value'))
+        self.assertEqual(self.redis.get('key'), b'value')
+        self.assertEqual(self.redis.shard_for('key').get('key'), b'value')
+        self.redis.hset('hash', mapping={'field': 'value'})
+        self.assertEqual(self.redis.hgetall('hash'), {b'field': b'value'})
+        self.redis.sadd('{tag}a', 'x')
+        self.redis.sadd('{tag}b', 'y')
+        self.assertEqual(self.redis.sunion('{tag}a', '{tag}b'), {b'x', b'y'})
+        self.assertTrue(self.redis.ping())
+
+    def test_multi_key_commands(self):
+        mapping = {'key%d' % index: index for index in range(300)}
+        self.assertTrue(self.redis.mset(mapping))
+        sizes = [shard.dbsize() for shard in self.redis.shards]
+        self.assertTrue(all(sizes))
+        self.assertEqual(self.redis.dbsize(), 300)
+        self.assertEqual(
+            self.redis.mget(['key5', 'missing', 'key299']),
+            [b'5', None, b'299']
+        )
+        self.assertEqual(self.redis.mget('key1', 'key2'), [b'1', b'2'])
+        self.assertEqual(self.redis.exists('key1', 'key2', 'missing'), 2)
+        self.assertEqual(self.redis.delete('key1', 'key2', 'missing'), 2)
+        self.assertEqual(self.redis.unlink('key3'), 1)
+        self.assertEqual(len(self.redis.keys('key*')), 297)
+        self.assertEqual(len(set(self.redis.scan_iter(match='key1*'))), 110)
+        self.assertTrue(self.redis.flushall())
+        self.assertEqual(self.redis.dbsize(), 0)
+
+    def test_pipeline(self):
+        with self.redis.pipeline() as pipe:
+            for index in range(50):
+                pipe.set('key%d' % index, index)
+            pipe.incr('key7').get('key7').lpush('key8', 'x')
+            self.assertEqual(len(pipe), 53)
+            results = pipe.execute(raise_on_error=False)
+        self.assertEqual(results[:50], [True] * 50)
+        self.assertEqual(results[50:52], [8, b'8'])
+        self.assertIsInstance(results[52], redis.ResponseError)
+        self.assertEqual(self.redis.pipeline().execute(), [])
+
+    def test_dbdir(self):
+        dbdir = os.path.join(self.tempdir, 'shards')
+        sharded = redislite.ShardedRedis(
+            shards=2, dbdir=dbdir, decode_responses=True
+        )
+        sharded.mset({'a': 1, 'b': 2, 'c': 3})
+        sharded.close()
+        self.assertEqual(sharded.shards, [])
+        sharded = redislite.ShardedRedis(
+            shards=2, dbdir=dbdir, decode_responses=True
+        )
+        self.assertEqual(sharded.mget(['a', 'b', 'c']), ['1', '2', '3'])
+        sharded.close()
+        self.assertTrue(os.path.exists(os.path.join(dbdir, 'shard-1.db')))
+
+    def test_invalid_shards(self):
+        with self.assertRaises(redislite.client.RedisLiteException):
+            redislite.ShardedRedis(shards=0)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteSharding
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)
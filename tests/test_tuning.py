@@ -0,0 +1,92 @@
+# Copyright (c) 2015, Yahoo Inc.
+# Copyrights licensed under the New BSD License
+# See the accompanying LICENSE.txt file for terms.
+"""
+Tests for `redislite.tuning` module.
+"""
+from __future__ import print_function
+import logging
+import redislite
+import redislite.tuning
+import unittest
+
+
+logger = logging.getLogger(__name__)
+
+
+# noinspection PyPep8Naming
+class TestRedisliteTuning(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = redislite.Redis()
+        for index in range(10):
+            self.redis.hset(
+                'hash:%d' % index,
+                mapping={'field%d' % field: 'v' * 80 for field in range(600)}
+            )
+            self.redis.sadd('set:%d' % index, *range(1000))
+            self.redis.zadd('zset:%d' % index, {'member': 1})
+        self.redis.set('string', 'value')
+
+    def tearDown(self):
+        self.redis._cleanup()
+
+    def test_sample_collections(self):
+        samples = redislite.tuning.sample_collections(self.redis)
+        self.assertEqual(len(samples), 30)
+        hashes = [sample for sample in samples if sample['type'] == 'hash']
+        self.assertEqual(len(hashes), 10)
+        self.assertEqual(hashes[0]['length'], 600)
+        self.assertEqual(hashes[0]['max_length'], 80)
+        self.assertEqual(hashes[0]['encoding'], 'hashtable')
+        self.assertGreater(hashes[0]['memory'], 0)
+
+    def test_sample_collections_sample_size(self):
+        samples = redislite.tuning.sample_collections(
+            self.redis, sample_size=5, batch_size=2
+        )
+        self.assertLessEqual(len(samples), 5)
+
+    def test_recommend_encoding_settings(self):
+        settings = redislite.tuning.recommend_encoding_settings(self.redis)
+        self.assertEqual(
+            settings,
+            {
+                'hash-max-ziplist-entries': '600',
+                'hash-max-ziplist-value': '80',
+                'set-max-intset-entries': '1000',
+            }
+        )
+
+    def test_recommend_encoding_settings_large_integer_sets(self):
+        for index in range(10):
+            self.redis.sadd('set:%d' % index, *range(1000, 3000))
+        settings = redislite.tuning.recommend_encoding_settings(self.redis)
+        self.assertEqual(settings['set-max-intset-entries'], '3000')
+        self.redis.sadd('set:large', *range(5000))
+        samples = redislite.tuning.sample_collections(self.redis)
+        large = [
+            sample for sample in samples if sample['key'] == b'set:large'
+        ]
+        self.assertIsNone(large[0]['integers'])
+
+    def test_apply_encoding_settings(self):
+        settings = redislite.tuning.recommend_encoding_settings(self.redis)
+        redislite.tuning.apply_encoding_settings(self.redis, settings)
+        self.assertEqual(
+            self.redis.config_get('hash-max-ziplist-entries'),
+            {'hash-max-ziplist-entries': '600'}
+        )
+        self.assertEqual(
+            self.redis.server_config['set-max-intset-entries'], '1000'
+        )
+        self.redis.sadd('set:new', *range(1000))
+        self.assertEqual(self.redis.object('encoding', 'set:new'), b'intset')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    test_suite = unittest.TestLoader().loadTestsFromTestCase(
+        TestRedisliteTuning
+    )
+    unittest.TextTestRunner(verbosity=2).run(test_suite)